@@ -5,7 +5,7 @@ from jose import JWTError, jwt
 from typing import Optional
 
 from app.core.config import get_settings
-from app.repository import pick_repo
+from app.repository import get_repo
 
 settings = get_settings()
 
@@ -36,25 +36,20 @@ def get_token(
     raise credentials_exception
 
 
-def get_current_user(token: str = Depends(get_token)):
-    print(">>> get_current_user(): raw token from request =", repr(token))  # DEBUG
-
+async def get_current_user(token: str = Depends(get_token), repo=Depends(get_repo)):
     try:
         payload = jwt.decode(
             token,
             settings.JWT_SECRET,
             algorithms=[settings.ALGORITHM],
         )
-        print(">>> payload decoded OK =", payload)                          # DEBUG
         user_id: str | None = payload.get("sub")
         if not user_id:
             raise credentials_exception
-    except JWTError as ex:
-        print("!!! jwt.decode FAILED:", ex)                                 # DEBUG
+    except JWTError:
         raise credentials_exception
 
-    user = pick_repo().get_by_id(user_id)
-    print(">>> repo.get_by_id() returned:", user)                           # DEBUG
+    user = await repo.get_by_id(user_id)
     if not user:
         raise credentials_exception
     return user
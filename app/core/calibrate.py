@@ -0,0 +1,82 @@
+# app/core/calibrate.py
+"""
+Pick Argon2id parameters for this host and print them as ``.env`` lines:
+
+    python -m app.core.calibrate --target-ms 250 --max-mem-mib 64 >> .env
+
+Lanes follow the core count (up to ``--max-lanes``).  Memory starts at the
+budget and is halved while a single pass is already slower than the
+target; passes are then added until one derivation takes about
+``--target-ms``.  Never goes below the OWASP minimums (19 MiB with two
+passes, or 46 MiB with one).
+
+Users registered afterwards get the new parameters; existing users are
+re-wrapped on their next unlock (app.core.rekey).  Each concurrent unlock
+holds this much memory – keep ``HASH_WORKERS × KDF_MEM_KIB`` affordable.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from app.core.kdf import derive_key
+
+MIN_MEM_KIB = 19 * 1024
+
+
+def min_passes(mem_kib: int) -> int:
+    return 1 if mem_kib >= 46 * 1024 else 2
+
+
+def measure(mem_kib: int, passes: int, lanes: int, rounds: int = 3) -> float:
+    """Median seconds for one derivation."""
+    salt = os.urandom(16)
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        derive_key("calibration", salt, mem_kib=mem_kib, time=passes, lanes=lanes)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def calibrate(target_s: float, max_mem_kib: int, max_lanes: int) -> tuple[int, int, int, float]:
+    """(mem_kib, time, lanes, measured seconds)"""
+    lanes = max(1, min(os.cpu_count() or 1, max_lanes))
+    mem = max(max_mem_kib, MIN_MEM_KIB)
+    one_pass = measure(mem, 1, lanes)
+    while one_pass > target_s and mem > MIN_MEM_KIB:
+        mem = max(MIN_MEM_KIB, mem // 2)
+        one_pass = measure(mem, 1, lanes)
+    # cost ≈ fill + passes × per_pass; estimate both, then settle by measuring
+    per_pass = max(measure(mem, 2, lanes) - one_pass, 1e-4)
+    passes = max(min_passes(mem), round((target_s - one_pass) / per_pass) + 1)
+    took = measure(mem, passes, lanes)
+    while took > target_s and passes > min_passes(mem):
+        passes -= 1
+        took = measure(mem, passes, lanes)
+    while (nxt := measure(mem, passes + 1, lanes)) <= target_s:
+        passes, took = passes + 1, nxt
+    return mem, passes, lanes, took
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        prog="python -m app.core.calibrate",
+        description="Benchmark Argon2id here and print KDF_* settings for a target latency.",
+    )
+    ap.add_argument("--target-ms", type=float, default=250.0, help="one derivation (default 250)")
+    ap.add_argument("--max-mem-mib", type=int, default=64, help="memory per derivation (default 64)")
+    ap.add_argument("--max-lanes", type=int, default=8)
+    args = ap.parse_args()
+
+    mem, passes, lanes, took = calibrate(args.target_ms / 1000, args.max_mem_mib * 1024, args.max_lanes)
+    print(f"# Argon2id: {mem // 1024} MiB, {passes} passes, {lanes} lanes "
+          f"→ {took * 1000:.0f} ms on this host", file=sys.stderr)
+    print(f"KDF_MEM_KIB={mem}")
+    print(f"KDF_TIME={passes}")
+    print(f"KDF_LANES={lanes}")
+
+
+if __name__ == "__main__":
+    main()
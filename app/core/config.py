@@ -5,10 +5,21 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     # ---- choose storage backend ----
-    DB_BACKEND: str = "file"                    # 'file' or 'postgres'
+    DB_BACKEND: str = "file"                    # 'file', 'journal', 'sqlite' or 'postgres'
 
     # ---- file backend ----
     FILE_PATH: str = "./blockpass_users.json"   # <-- exact field name
+    FILE_COMMIT_WINDOW_MS: float = 2.0          # group-commit window for writes
+    FILE_VAULT_LAYOUT: str = "single"           # 'single' or 'sharded' (one file per user)
+    FILE_FORMAT: str = "json"                   # 'json' (readable), 'orjson' or 'binary'
+
+    # ---- journal backend (file backend + append-only log) ----
+    JOURNAL_COMPACT_BYTES: int = 4 * 1024 * 1024   # fold log into snapshot past this
+
+    # ---- sqlite (single node, no server) ----
+    SQLITE_PATH: str = "./blockpass.db"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"          # WAL + NORMAL: durable except on power loss
+    SQLITE_CACHE_MB: int = 64                   # page cache per connection
 
     # ---- postgres (for later) ----
     POSTGRES_USER: str = "postgres"
@@ -16,12 +27,47 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "blockpass"
     POSTGRES_HOST: str = "localhost"
     POSTGRES_PORT: str = "5432"
+    # read replicas: comma-separated postgresql:// DSNs; empty = primary only
+    POSTGRES_REPLICA_URLS: str = ""
+    READ_YOUR_WRITES_SECONDS: float = 5.0       # user's reads stay on the primary after a write
+    # connection pool, per engine (primary, each replica; sync and asyncpg alike)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10                   # extra connections under bursts
+    DB_POOL_TIMEOUT: float = 30.0               # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800                 # reconnect after this many seconds; -1 = never
+    DB_POOL_PRE_PING: bool = False              # test each checkout (one extra round trip)
+    # apply pending schema migrations on startup (else: python -m app.database.migrations upgrade)
+    AUTO_MIGRATE: bool = False
 
     # ---- JWT ----
     JWT_SECRET: str = "supersecret"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # ---- unlocked vault keys (app.core.keycache) ----
+    KEY_CACHE_TTL_SECONDS: int = 3600           # unlock lasts at most this long
+    KEY_CACHE_IDLE_SECONDS: int = 900           # … or until this long unused
+
+    # ---- Argon2id vault-key parameters for new / re-keyed users ----
+    # pick them per host with `python -m app.core.calibrate`
+    KDF_MEM_KIB: int = 19 * 1024
+    KDF_TIME: int = 2
+    KDF_LANES: int = 1
+
+    # ---- Argon2id / bcrypt executor (app.core.hashpool) ----
+    HASH_WORKERS: int = 0                       # concurrent hashes; 0 = from cores and HASH_MEMORY_MB
+    HASH_MEMORY_MB: int = 0                     # Argon2 memory budget; 0 = a quarter of RAM
+    HASH_QUEUE: int = 32                        # waiting beyond that ⇒ 503
+    HASH_RETRY_AFTER_SECONDS: int = 1
+
+    # ---- vault item blobs (app.core.encryption) ----
+    ITEM_COMPRESSION: str = "zlib"              # 'zlib', 'zstd' (needs zstandard) or 'none'
+    ITEM_COMPRESSION_MIN_BYTES: int = 1024      # smaller plaintexts are never compressed
+
+    # ---- attachments (app.repository.attachments) ----
+    ATTACHMENT_DIR: str = "./attachments"       # encrypted files, one per vault item
+    ATTACHMENT_MAX_MB: int = 1024               # larger uploads ⇒ 413
+
     # vault encryption
     # VAULT_KEY: str  # must be a 32‑byte URL‑safe base64 key
 
@@ -1,26 +1,249 @@
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-import secrets
+# app/core/encryption.py
+"""
+AES-256-GCM for vault items, in a compact binary envelope:
+
+    version (1) ‖ alg (1) ‖ key id (1) ‖ nonce (12) ‖ ciphertext ‖ tag (16)
+
+The three header bytes are bound as associated data, so a blob cannot be
+relabelled.  ``key id`` says which key the item is under: the user's
+vault key (1), or for items from before the key hierarchy the
+password-derived key (0) – see app.core.rekey.
+
+Plaintexts of ``ITEM_COMPRESSION_MIN_BYTES`` or more (notes, JSON
+configs, certificate bundles) are compressed first – ``ITEM_COMPRESSION``
+zlib or zstd – and ``alg`` records it (4, 5).  A payload that does not
+shrink by an eighth is stored as it is, so every blob costs at most the
+plain cipher.  Below the threshold nothing changes: compression lets the
+ciphertext length depend on the content, which for short secrets is
+better avoided.
+
+31 bytes of overhead instead of the ~90 of the old format – a JSON
+object with base64 nonce, ciphertext and tag – which ``decrypt`` still
+reads; ``repack_legacy`` (``python -m app.core.repack``) converts those
+without any key.
+
+Blobs are ``bytes``.  Where only text fits (JSON files, NDJSON export) an
+envelope travels as plain base64 – ``to_text`` / ``from_text``.
+
+``encrypt_many`` / ``decrypt_many`` do a whole batch under one key with a
+single cipher context – building ``AESGCM(key)`` costs about as much as
+sealing a short secret – optionally split across threads.
+"""
 import base64
+import binascii
 import json
+import logging
+import secrets
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Iterable, TypeVar
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from app.core.config import get_settings
+
+try:
+    import zstandard
+except ImportError:                     # optional: ITEM_COMPRESSION=zstd
+    zstandard = None
+
+log = logging.getLogger("blockpass.encryption")
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+VERSION = 1
+ALG_AES256GCM = 1           # header is the AAD
+ALG_AES256GCM_LEGACY = 2    # repacked JSON blob: same cipher, no AAD
+ALG_STREAM_AES256GCM = 3    # segmented attachments (app.core.streaming)
+ALG_AES256GCM_ZLIB = 4      # zlib-compressed plaintext, otherwise as ALG_AES256GCM
+ALG_AES256GCM_ZSTD = 5      # zstd-compressed plaintext, otherwise as ALG_AES256GCM
+KEY_PASSWORD = 0
+KEY_VAULT = 1
+
+HEADER_LEN = 3
+NONCE_LEN = 12
+TAG_LEN = 16
+
+PROBE_LEN = 16 * 1024        # bigger payloads: try this much before the whole
+MIN_CHUNK = 256              # fewer items per thread are not worth the hop
+
+
+def encrypt(plaintext: str, key: bytes, key_id: int = KEY_VAULT) -> bytes:
+    return _seal(AESGCM(key), plaintext, key_id)
+
+
+def decrypt(blob: bytes | str, key: bytes) -> str:
+    """Plaintext of an envelope (raw or base64 text) or of a legacy JSON blob."""
+    return _open(AESGCM(key), blob)
+
+
+def key_id(blob: bytes | str) -> int:
+    """The key id in the header (``KEY_PASSWORD`` for legacy blobs)."""
+    return KEY_PASSWORD if is_legacy(blob) else _envelope(blob)[2]
+
+
+def encrypt_many(
+    plaintexts: Iterable[str], key: bytes, key_id: int = KEY_VAULT, workers: int = 1
+) -> list[bytes]:
+    """``encrypt`` of each plaintext, in order; ``workers`` > 1 splits big batches across threads."""
+    aead = AESGCM(key)
+    return _map(lambda plaintext: _seal(aead, plaintext, key_id), plaintexts, workers)
+
+
+def decrypt_many(
+    blobs: Iterable[bytes | str], key: bytes, workers: int = 1, return_exceptions: bool = False
+) -> list[str | Exception]:
+    """
+    ``decrypt`` of each blob, in order.  The first failure raises, or with
+    ``return_exceptions`` takes that item's place in the result.
+    """
+    aead = AESGCM(key)
+
+    def one(blob):
+        try:
+            return _open(aead, blob)
+        except Exception as exc:
+            if not return_exceptions:
+                raise
+            return exc
+
+    return _map(one, blobs, workers)
+
+
+def _seal(aead: AESGCM, plaintext: str, key_id: int) -> bytes:
+    alg, data = _compress(plaintext.encode())
+    header = bytes((VERSION, alg, key_id))
+    nonce = secrets.token_bytes(NONCE_LEN)            # 96‑bit
+    return header + nonce + aead.encrypt(nonce, data, header)
+
+
+def _open(aead: AESGCM, blob: bytes | str) -> str:
+    if is_legacy(blob):
+        nonce, ct = _legacy_parts(blob)
+        return aead.decrypt(nonce, ct, None).decode()
+    env = _envelope(blob)
+    header, nonce = env[:HEADER_LEN], env[HEADER_LEN:HEADER_LEN + NONCE_LEN]
+    alg = header[1]
+    aad = None if alg == ALG_AES256GCM_LEGACY else header
+    data = aead.decrypt(nonce, env[HEADER_LEN + NONCE_LEN:], aad)
+    return _decompress(alg, data).decode()
+
+
+def _map(fn: Callable[[T], R], values: Iterable[T], workers: int) -> list[R]:
+    """``[fn(v) for v in values]``, in contiguous chunks on up to ``workers`` threads."""
+    values = list(values)
+    workers = min(workers, len(values) // MIN_CHUNK)
+    if workers <= 1:
+        return [fn(v) for v in values]
+    size = -(-len(values) // workers)
+    chunks = [values[i:i + size] for i in range(0, len(values), size)]
+    with ThreadPoolExecutor(workers, thread_name_prefix="aead") as pool:
+        return [r for part in pool.map(lambda chunk: [fn(v) for v in chunk], chunks) for r in part]
+
+
+# ── compression ──────────────────────────────────────────────────────
+def _zstd_compress(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=3).compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    if zstandard is None:
+        raise ValueError("zstd-compressed blob but the zstandard package is not installed")
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+_CODECS = {
+    ALG_AES256GCM_ZLIB: (lambda data: zlib.compress(data, 6), zlib.decompress),
+    ALG_AES256GCM_ZSTD: (_zstd_compress, _zstd_decompress),
+}
+
+
+@lru_cache
+def _codec() -> tuple[int | None, int]:
+    """(alg to compress with or None, threshold) from the settings."""
+    settings = get_settings()
+    name = settings.ITEM_COMPRESSION.lower()
+    if name == "zstd" and zstandard is None:
+        log.warning("ITEM_COMPRESSION=zstd but zstandard is not installed – using zlib")
+        name = "zlib"
+    alg = {"zlib": ALG_AES256GCM_ZLIB, "zstd": ALG_AES256GCM_ZSTD}.get(name)
+    return alg, settings.ITEM_COMPRESSION_MIN_BYTES
+
+
+def _shrinks(packed: bytes, size: int) -> bool:
+    return len(packed) <= size - size // 8
+
+
+def _compress(data: bytes) -> tuple[int, bytes]:
+    """(alg, payload): compressed only when that saves at least an eighth."""
+    alg, threshold = _codec()
+    if alg is None or len(data) < threshold:
+        return ALG_AES256GCM, data
+    compress = _CODECS[alg][0]
+    # large and incompressible (base64 key material, already compressed
+    # data): the first PROBE_LEN bytes say so for a fraction of the cost
+    if len(data) > 2 * PROBE_LEN and not _shrinks(compress(data[:PROBE_LEN]), PROBE_LEN):
+        return ALG_AES256GCM, data
+    packed = compress(data)
+    return (alg, packed) if _shrinks(packed, len(data)) else (ALG_AES256GCM, data)
+
+
+def _decompress(alg: int, data: bytes) -> bytes:
+    codec = _CODECS.get(alg)
+    return codec[1](data) if codec else data
+
+
+# ── legacy JSON blobs ────────────────────────────────────────────────
+def is_legacy(blob: bytes | str) -> bool:
+    head = blob[:1]
+    return head in (b"{", "{")
+
+
+def _legacy_parts(blob: bytes | str) -> tuple[bytes, bytes]:
+    obj = json.loads(blob)
+    nonce = base64.b64decode(obj["nonce"])
+    return nonce, base64.b64decode(obj["ciphertext"]) + base64.b64decode(obj["tag"])
+
+
+def repack_legacy(blob: bytes | str) -> bytes:
+    """The same ciphertext as an envelope – no key needed, nothing re-encrypted."""
+    nonce, ct = _legacy_parts(blob)
+    return bytes((VERSION, ALG_AES256GCM_LEGACY, KEY_PASSWORD)) + nonce + ct
+
+
+# ── storage forms ────────────────────────────────────────────────────
+def _envelope(blob: bytes | str) -> bytes:
+    env = base64.b64decode(blob) if isinstance(blob, str) else bytes(blob)
+    if len(env) < HEADER_LEN + NONCE_LEN + TAG_LEN or env[0] != VERSION:
+        raise ValueError("not a vault envelope")
+    if env[1] not in (ALG_AES256GCM, ALG_AES256GCM_LEGACY, *_CODECS):
+        raise ValueError(f"unknown algorithm id {env[1]}")
+    return env
+
+
+def to_bytes(blob: bytes | str) -> bytes:
+    """For ``LargeBinary`` / BLOB columns: envelopes raw, legacy JSON as UTF-8."""
+    if isinstance(blob, str):
+        return blob.encode("utf-8") if is_legacy(blob) else base64.b64decode(blob)
+    return bytes(blob)
+
+
+def to_text(blob: bytes | str) -> str:
+    """For JSON: legacy blobs as they are, envelopes as base64."""
+    if isinstance(blob, str):
+        return blob
+    blob = bytes(blob)
+    return blob.decode("utf-8") if is_legacy(blob) else base64.b64encode(blob).decode()
+
 
-def encrypt(plaintext: str, key: bytes) -> str:
-    aesgcm = AESGCM(key)
-    nonce  = secrets.token_bytes(12)          # 96‑bit
-    ct     = aesgcm.encrypt(nonce, plaintext.encode(), None)
-    # split tag and ciphertext (tag = last 16 bytes)
-    tag, cipher = ct[-16:], ct[:-16]
-    blob = {
-        "nonce":     base64.b64encode(nonce).decode(),
-        "ciphertext":base64.b64encode(cipher).decode(),
-        "tag":       base64.b64encode(tag).decode(),
-    }
-    return json.dumps(blob)
-
-def decrypt(blob_json: str, key: bytes) -> str:
-    blob = json.loads(blob_json)
-    nonce  = base64.b64decode(blob["nonce"])
-    cipher = base64.b64decode(blob["ciphertext"])
-    tag    = base64.b64decode(blob["tag"])
-    aesgcm = AESGCM(key)
-    plaintext = aesgcm.decrypt(nonce, cipher + tag, None)
-    return plaintext.decode()
+def from_text(text: str) -> bytes | str:
+    """Inverse of ``to_text``; ``ValueError`` for anything that is neither form."""
+    if is_legacy(text):
+        _legacy_parts(text)
+        return text
+    try:
+        return _envelope(base64.b64decode(text, validate=True))
+    except binascii.Error as exc:
+        raise ValueError(f"bad ciphertext: {exc}") from None
@@ -0,0 +1,87 @@
+# app/core/hashpool.py
+"""
+Dedicated, bounded executor for the expensive password work – Argon2id
+key derivation and bcrypt hashing / verification.
+
+At most ``workers`` hashes run at once (each Argon2id call holds
+``KDF_MEM_KIB``, 19 MiB by default) and at most ``queue`` more wait for a
+slot.  Anything beyond that is turned away at once with
+``503 Service Unavailable`` + ``Retry-After`` instead of piling up, so a
+burst of logins and reveals cannot take memory or the shared
+``asyncio.to_thread`` pool away from the cheap endpoints.
+
+Threads, not processes: argon2-cffi and bcrypt both release the GIL
+while hashing, so threads already run them in parallel without pickling
+every password across a process boundary.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.core.config import get_settings
+
+T = TypeVar("T")
+
+
+def default_workers(memory_mb: int = 0) -> int:
+    """One per core, but no more than ``memory_mb`` (default: ¼ of RAM) of Argon2 buffers."""
+    if memory_mb <= 0:
+        try:
+            memory_mb = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 4 // 2**20
+        except (ValueError, OSError, AttributeError):   # not POSIX
+            memory_mb = 512
+    by_memory = memory_mb * 1024 // get_settings().KDF_MEM_KIB
+    return max(1, min(os.cpu_count() or 1, by_memory))
+
+
+class HashPool:
+    def __init__(self, workers: int, queue: int, retry_after_s: int = 1):
+        self.workers = workers
+        self.limit = workers + queue
+        self.retry_after_s = retry_after_s
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="hash")
+        self._lock = threading.Lock()
+        self.admitted = 0           # running + waiting right now
+        self.rejected = 0           # since start
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        with self._lock:
+            if self.admitted >= self.limit:
+                self.rejected += 1
+                raise HTTPException(
+                    status.HTTP_503_SERVICE_UNAVAILABLE,
+                    "Too many password operations in progress, retry shortly",
+                    headers={"Retry-After": str(self.retry_after_s)},
+                )
+            self.admitted += 1
+        fut: Future = self._executor.submit(functools.partial(fn, *args, **kwargs))
+        # released when the hash *finishes* – a client that disconnects
+        # mid-request must not free a slot its thread is still using
+        fut.add_done_callback(self._release)
+        return await asyncio.wrap_future(fut)
+
+    def _release(self, _fut: Future) -> None:
+        with self._lock:
+            self.admitted -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue": self.limit - self.workers,
+            "running": min(self.admitted, self.workers),
+            "waiting": max(self.admitted - self.workers, 0),
+            "rejected": self.rejected,
+        }
+
+
+_settings = get_settings()
+pool = HashPool(
+    _settings.HASH_WORKERS or default_workers(_settings.HASH_MEMORY_MB),
+    _settings.HASH_QUEUE,
+    _settings.HASH_RETRY_AFTER_SECONDS,
+)
@@ -4,10 +4,13 @@ Requires `argon2‑cffi` 23.1.0+  (pip install argon2‑cffi)
 """
 
 import secrets
-from typing import Tuple
+from typing import Dict, Tuple
 
 from argon2.low_level import hash_secret_raw, Type
 
+from app.core import hashpool
+from app.core.config import get_settings
+
 
 # --------------------------- configuration defaults ---------------------------
 
@@ -15,6 +18,8 @@ from argon2.low_level import hash_secret_raw, Type
 DEFAULT_MEM_KIB = 19 * 1024
 DEFAULT_TIME    = 2
 DEFAULT_LANES   = 1           # single‑thread (set >1 on servers with many cores)
+# New users get KDF_MEM_KIB / KDF_TIME / KDF_LANES from the settings instead –
+# `python -m app.core.calibrate` picks them for the host.
 
 
 # --------------------------------- helpers ------------------------------------
@@ -53,6 +58,26 @@ def derive_key(
     )
 
 
+async def derive_key_async(master_pwd: str, salt: bytes, **params) -> bytes:
+    """
+    `derive_key` on the bounded hashing pool for async callers; raises a
+    503 HTTPException when that pool is saturated (see app.core.hashpool).
+    """
+    return await hashpool.pool.run(derive_key, master_pwd, salt, **params)
+
+
 def default_kdf_params() -> Tuple[int, int, int]:
-    """Expose defaults so callers can persist them next to the salt."""
-    return DEFAULT_MEM_KIB, DEFAULT_TIME, DEFAULT_LANES
\ No newline at end of file
+    """The configured (mem_kib, time, lanes), to persist next to the salt."""
+    s = get_settings()
+    return s.KDF_MEM_KIB, s.KDF_TIME, s.KDF_LANES
+
+
+def current_params() -> Dict[str, int]:
+    """``default_kdf_params`` as the ``kdf_*`` fields of a user record."""
+    mem, time, lanes = default_kdf_params()
+    return {"kdf_mem": mem, "kdf_time": time, "kdf_lanes": lanes}
+
+
+def is_current(user: dict) -> bool:
+    """False when ``user``'s key was derived with other parameters than today's."""
+    return all(user[k] == v for k, v in current_params().items())
@@ -0,0 +1,193 @@
+# app/core/keycache.py
+"""
+Unlocked vault keys, so Argon2id runs once per unlock instead of once per
+reveal / create.
+
+``unlock`` stores the vault key (app.core.rekey) *wrapped* (AES-GCM) under a random
+per-session secret that only the client holds – in the ``vault_session``
+cookie, or the ``X-Vault-Session`` header for API clients:
+
+    <session id>.<base64url secret>
+
+The server keeps ``session id → wrapped key``; neither half alone yields
+the key.  An entry dies after ``KEY_CACHE_TTL_SECONDS`` or after
+``KEY_CACHE_IDLE_SECONDS`` without use, on lock and on logout.
+
+The cache is per process: with several workers a request may land on one
+that never saw the unlock, and the routes then ask for the master
+password again.
+"""
+import base64
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from fastapi import HTTPException, Request, status
+
+from app.core import encryption, kdf, rekey
+from app.core.security import verify_password_async
+from app.core.config import get_settings
+
+COOKIE = "vault_session"
+HEADER = "X-Vault-Session"
+
+
+@dataclass(slots=True)
+class _Entry:
+    user_id: str
+    wrapped: bytes          # nonce ‖ AES-GCM(vault key)
+    expires: float          # absolute deadline (monotonic)
+    idle_until: float
+
+
+class KeyCache:
+    _PRUNE_AT = 1000
+
+    def __init__(self, ttl_s: float, idle_s: float):
+        self.ttl_s = ttl_s
+        self.idle_s = idle_s
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def unlock(self, user_id: str, key: bytes) -> str:
+        """Cache ``key`` for ``user_id``; returns the token for the client."""
+        sid = secrets.token_urlsafe(16)
+        secret = AESGCM.generate_key(bit_length=256)
+        nonce = secrets.token_bytes(12)
+        wrapped = nonce + AESGCM(secret).encrypt(nonce, key, _aad(sid, user_id))
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self._PRUNE_AT:
+                self._prune(now)
+            self._entries[sid] = _Entry(user_id, wrapped, now + self.ttl_s, now + self.idle_s)
+        return f"{sid}.{base64.urlsafe_b64encode(secret).decode()}"
+
+    def get(self, user_id: str, token: str | None) -> bytes | None:
+        """The cached key for ``user_id``, or None if locked / expired / not ours."""
+        if not token:
+            return None
+        sid, _, secret = token.partition(".")
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None or entry.user_id != user_id:
+                return None
+            if now >= entry.expires or now >= entry.idle_until:
+                del self._entries[sid]
+                return None
+            entry.idle_until = min(now + self.idle_s, entry.expires)
+        try:
+            return AESGCM(base64.urlsafe_b64decode(secret)).decrypt(
+                entry.wrapped[:12], entry.wrapped[12:], _aad(sid, user_id)
+            )
+        except (InvalidTag, ValueError):            # forged / truncated secret
+            return None
+
+    def lock(self, token: str | None) -> None:
+        if token:
+            with self._lock:
+                self._entries.pop(token.partition(".")[0], None)
+
+    def lock_user(self, user_id: str) -> None:
+        """Drop every session of ``user_id`` – e.g. after a master password change."""
+        with self._lock:
+            for sid in [sid for sid, e in self._entries.items() if e.user_id == user_id]:
+                del self._entries[sid]
+
+    def _prune(self, now: float) -> None:
+        for sid, e in list(self._entries.items()):
+            if now >= e.expires or now >= e.idle_until:
+                del self._entries[sid]
+
+
+def _aad(sid: str, user_id: str) -> bytes:
+    return f"{sid}|{user_id}".encode()
+
+
+_settings = get_settings()
+cache = KeyCache(_settings.KEY_CACHE_TTL_SECONDS, _settings.KEY_CACHE_IDLE_SECONDS)
+
+
+def session_token(request: Request) -> str | None:
+    return request.headers.get(HEADER) or request.cookies.get(COOKIE)
+
+
+async def derive_user_key(user: dict, master_password: str) -> bytes:
+    return await kdf.derive_key_async(
+        master_password,
+        salt=bytes.fromhex(user["kdf_salt"]),
+        mem_kib=user["kdf_mem"],
+        time=user["kdf_time"],
+        lanes=user["kdf_lanes"],
+    )
+
+
+async def user_key(request: Request, repo, user: dict, master_password: str | None) -> bytes | None:
+    """
+    The unlocked vault key if this session has one, else the one
+    ``master_password`` opens; None when locked and no (or a wrong)
+    password was given.
+    """
+    key = cache.get(user["id"], session_token(request))
+    if key is None and master_password:
+        key = await open_vault(repo, user, master_password)
+    return key
+
+
+async def key_opens_vault(repo, user: dict, key: bytes, master_password: str) -> bool:
+    """
+    Pre-hierarchy users have no wrapped key to check a password against,
+    and a wrong one still derives *a* key: try it on the newest item.  An
+    empty vault proves nothing, so there the login hash has to match – a
+    pre-hierarchy user never changed the master password, which started
+    out as the login password.
+    """
+    items, _ = await repo.list_item_meta(user["id"], limit=1)
+    item = items and await repo.get_item(user["id"], items[0].id)
+    if not item:
+        return await verify_password_async(master_password, user["password"])
+    try:
+        encryption.decrypt(item.data, key)
+    except Exception:
+        return False
+    return True
+
+
+async def open_vault(repo, user: dict, master_password: str) -> bytes | None:
+    """
+    Derive the password key and unwrap the vault key with it – None for a
+    wrong master password.  On the way, a pre-hierarchy user gets a vault
+    key and outdated KDF parameters are replaced (app.core.rekey).
+    """
+    password_key = await derive_user_key(user, master_password)
+    if user.get("vault_key"):
+        vault_key = rekey.unwrap(user, password_key)
+        if vault_key is not None:
+            await rekey.upgrade_if_outdated(repo, user, master_password, vault_key)
+        return vault_key
+    if not await key_opens_vault(repo, user, password_key, master_password):
+        return None
+    try:
+        vault_key = await rekey.adopt_vault_key(repo, user, master_password, password_key)
+    except rekey.UndecryptableItems as exc:
+        raise HTTPException(
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+            f"Vault not migrated: items {', '.join(exc.item_ids)} do not decrypt under this master password",
+        )
+    if vault_key is None:
+        raise HTTPException(status.HTTP_409_CONFLICT, "Vault changed while unlocking, retry")
+    return vault_key
+
+
+async def unlock(repo, user: dict, master_password: str) -> str | None:
+    """
+    The unlock operation behind both routes: open the vault, cache its
+    key.  Returns the session token, or None for a wrong master password.
+    """
+    vault_key = await open_vault(repo, user, master_password)
+    if vault_key is None:
+        return None
+    return cache.unlock(user["id"], vault_key)
@@ -0,0 +1,129 @@
+# app/core/rekey.py
+"""
+The per-user key hierarchy and its upkeep.
+
+Items are encrypted under a random 256-bit *vault key*; the user record
+keeps it wrapped (AES-GCM) under the Argon2id key derived from the master
+password.  A password change or a move to the current ``KDF_*`` settings
+therefore re-wraps 32 bytes instead of re-encrypting every item.
+
+Users from before the hierarchy (``vault_key`` unset) still have their
+items directly under the password-derived key.  Their first unlock
+creates the vault key and moves the items under it – the one O(items)
+step, done in a single repository call that writes nothing if the vault
+changed meanwhile.
+"""
+import asyncio
+import logging
+import os
+import secrets
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from app.core import encryption, kdf
+
+log = logging.getLogger("blockpass.kdf")
+
+
+class UndecryptableItems(Exception):
+    """Items that the password key cannot open – corrupt, or under another key."""
+
+    def __init__(self, user_id: str, item_ids: list[str]):
+        super().__init__(f"user {user_id}: {len(item_ids)} items do not decrypt: {', '.join(item_ids)}")
+        self.user_id = user_id
+        self.item_ids = item_ids
+
+
+def wrap(vault_key: bytes, password_key: bytes, user_id: str) -> bytes:
+    """nonce ‖ AES-GCM(vault key), bound to ``user_id``."""
+    nonce = secrets.token_bytes(12)
+    return nonce + AESGCM(password_key).encrypt(nonce, vault_key, _aad(user_id))
+
+
+def unwrap(user: dict, password_key: bytes) -> bytes | None:
+    """``user``'s vault key, or None when ``password_key`` is not the right one."""
+    wrapped = bytes.fromhex(user["vault_key"])
+    try:
+        return AESGCM(password_key).decrypt(wrapped[:12], wrapped[12:], _aad(user["id"]))
+    except InvalidTag:
+        return None
+
+
+def _aad(user_id: str) -> bytes:
+    return f"vault-key|{user_id}".encode()
+
+
+async def _new_password_key(master_password: str) -> tuple[dict, bytes]:
+    """Fresh salt + current parameters (the ``kdf_*`` fields) and the key they derive."""
+    params = kdf.current_params()
+    salt = kdf.generate_salt()
+    key = await kdf.derive_key_async(
+        master_password, salt,
+        mem_kib=params["kdf_mem"], time=params["kdf_time"], lanes=params["kdf_lanes"],
+    )
+    return {"kdf_salt": salt, **params}, key
+
+
+def _reencrypt(items: list, old_key: bytes, new_key: bytes) -> tuple[dict[str, bytes], list[str]]:
+    """(new blobs, ids of items that ``old_key`` does not open) – no blobs if any fail."""
+    workers = os.cpu_count() or 1
+    plaintexts = encryption.decrypt_many(
+        [item.data for item in items], old_key, workers=workers, return_exceptions=True
+    )
+    failed = [item.id for item, p in zip(items, plaintexts) if isinstance(p, Exception)]
+    if failed:
+        return {}, failed
+    blobs = encryption.encrypt_many(plaintexts, new_key, workers=workers)
+    return {item.id: blob for item, blob in zip(items, blobs)}, []
+
+
+async def adopt_vault_key(repo, user: dict, master_password: str, password_key: bytes) -> bytes | None:
+    """
+    Give a pre-hierarchy user a vault key: re-encrypt every item under it
+    and store it wrapped (under current KDF parameters).  None if the vault
+    changed meanwhile – the caller should retry; ``UndecryptableItems`` if
+    some items do not open under ``password_key`` and no other unlock
+    moved them.
+    """
+    if kdf.is_current(user):
+        params = {k: user[k] for k in ("kdf_mem", "kdf_time", "kdf_lanes")}
+        params["kdf_salt"] = bytes.fromhex(user["kdf_salt"])
+        new_password_key = password_key
+    else:
+        params, new_password_key = await _new_password_key(master_password)
+    vault_key = AESGCM.generate_key(bit_length=256)
+    items = [item async for item in repo.export_items(user["id"])]
+    # one AES-GCM round trip per item – off the event loop for big vaults
+    blobs, failed = await asyncio.to_thread(_reencrypt, items, password_key, vault_key)
+    if failed:
+        current = await repo.get_by_id(user["id"])
+        if current and current.get("vault_key"):    # another unlock moved them first
+            return None
+        exc = UndecryptableItems(user["id"], failed)
+        log.error("vault key not created – %s", exc)
+        raise exc
+    params["vault_key"] = wrap(vault_key, new_password_key, user["id"])
+    if not await repo.rekey_user(user["id"], params, blobs, expected=None):
+        log.info("vault key for user %s not stored: vault changed meanwhile", user["id"])
+        return None
+    log.info("user %s moved to a vault key (%d items)", user["id"], len(blobs))
+    return vault_key
+
+
+async def set_master_password(repo, user: dict, master_password: str, vault_key: bytes) -> bool:
+    """
+    Re-wrap ``vault_key`` under ``master_password`` with a fresh salt and
+    the current parameters.  False if the stored key changed meanwhile.
+    """
+    params, password_key = await _new_password_key(master_password)
+    params["vault_key"] = wrap(vault_key, password_key, user["id"])
+    return await repo.rewrap_user(user["id"], params, bytes.fromhex(user["vault_key"]))
+
+
+async def upgrade_if_outdated(repo, user: dict, master_password: str, vault_key: bytes) -> None:
+    """Move ``user`` to the current ``KDF_*`` settings – same password, re-wrapped key."""
+    if kdf.is_current(user):
+        return
+    if await set_master_password(repo, user, master_password, vault_key):
+        log.info("user %s re-wrapped under %s", user["id"], kdf.current_params())
@@ -0,0 +1,59 @@
+# app/core/repack.py
+"""
+Rewrite legacy JSON item blobs as binary envelopes (app.core.encryption):
+
+    python -m app.core.repack [--dry-run]
+
+No key is involved – nonce, ciphertext and tag only move into the new
+layout – so this can run at any time, next to the web app, and can be
+interrupted and rerun.  Items are swapped only while they still hold the
+blob that was read, so a concurrent re-key or delete is never undone.
+New items are written as envelopes anyway; without this job old ones
+simply stay in the JSON form, which ``decrypt`` keeps reading.
+"""
+import argparse
+import sys
+
+from app.core import encryption
+from app.repository import pick_repo
+from app.repository.bulk import batched
+
+
+def repack_user(repo, user_id: str, dry_run: bool = False) -> tuple[int, int]:
+    """(legacy items found, items rewritten) for one user."""
+    found = written = 0
+    for batch in batched(repo.export_items(user_id)):
+        swaps = {
+            item.id: (item.data, encryption.repack_legacy(item.data))
+            for item in batch if encryption.is_legacy(item.data)
+        }
+        found += len(swaps)
+        if swaps and not dry_run:
+            written += repo.swap_item_data(user_id, swaps)
+    return found, written
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        prog="python -m app.core.repack",
+        description="Convert legacy JSON vault blobs to the binary envelope format.",
+    )
+    ap.add_argument("--dry-run", action="store_true", help="only count legacy items")
+    args = ap.parse_args()
+
+    repo = pick_repo()
+    repo.startup()
+    try:
+        users = found = written = 0
+        for user_id in repo.user_ids():
+            f, w = repack_user(repo, user_id, args.dry_run)
+            users += bool(f)
+            found += f
+            written += w
+    finally:
+        repo.shutdown()
+    print(f"{found} legacy items in {users} vaults, {written} rewritten", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,8 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.core.config import get_settings
-from app.repository import pick_repo
+from app.core.hashpool import pool as hash_pool
+from app.repository import get_repo
 
 # password‑hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -32,6 +33,14 @@ def hash_password(plain: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
+# bcrypt is ~250 ms of CPU: async routes run it on the bounded hashing
+# pool (503 when saturated) so the event loop keeps serving other requests
+async def hash_password_async(plain: str) -> str:
+    return await hash_pool.run(hash_password, plain)
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await hash_pool.run(verify_password, plain, hashed)
+
 def create_access_token(data: Dict[str, str], expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -51,14 +60,14 @@ def decode_token(token: str) -> str:
     except JWTError:
         raise credentials_exception
 
-async def get_current_user(user_id: str = Depends(oauth2_scheme)):
+async def get_current_user(user_id: str = Depends(oauth2_scheme), repo=Depends(get_repo)):
     """
     Dependency to pull your user out of the token.
     `user_id` here is actually the JWT `sub` claim.
     """
     # decode_token will raise 401 if invalid
     sub = decode_token(user_id)
-    user = pick_repo().get_by_id(sub)
+    user = await repo.get_by_id(sub)
     if not user:
         raise credentials_exception
     return user
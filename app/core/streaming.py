@@ -0,0 +1,156 @@
+# app/core/streaming.py
+"""
+Chunked streaming AEAD for attachments – the STREAM construction (as in
+Tink's AES-GCM-HKDF streaming), so a file of any size is encrypted and
+decrypted segment by segment in constant memory:
+
+    header    version (1) ‖ alg 3 (1) ‖ key id (1) ‖ segment size (4) ‖ salt (16)
+    segment i AES-GCM(subkey, nonce_i, plaintext_i, header ‖ aad)
+
+``subkey`` = HKDF-SHA256(key, salt) – fresh per stream, so the nonces can
+simply count: ``nonce_i`` = i (11 bytes) ‖ final flag (1).  Reordering,
+dropping or duplicating segments breaks a tag, and so does cutting the
+stream at a segment boundary: the last segment must carry the final flag.
+Every segment holds ``segment size`` plaintext bytes except the last
+(0 … segment size).
+
+Decrypted bytes are released segment by segment, before the rest of the
+stream is authenticated – a consumer must treat output as provisional
+until ``finalize()`` returns (the download route sends a Content-Length,
+so a client sees a cut-off body as truncated).
+"""
+import secrets
+import struct
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from app.core.encryption import ALG_STREAM_AES256GCM, KEY_VAULT, TAG_LEN, VERSION
+
+SEGMENT = 64 * 1024
+MAX_SEGMENT = 1 << 24                   # caps what an unauthenticated header can make us buffer
+HEADER = struct.Struct(">BBBI16s")
+_INFO = b"blockpass stream v1"
+
+
+def _subkey(key: bytes, salt: bytes) -> AESGCM:
+    return AESGCM(HKDF(hashes.SHA256(), 32, salt, _INFO).derive(key))
+
+
+def _nonce(index: int, final: bool) -> bytes:
+    return index.to_bytes(11, "big") + (b"\x01" if final else b"\x00")
+
+
+def parse_header(data: bytes) -> tuple[int, int]:
+    """(key id, segment size) of a stream; ``ValueError`` if it is not one."""
+    if len(data) < HEADER.size:
+        raise ValueError("truncated stream header")
+    version, alg, key_id, segment, _salt = HEADER.unpack_from(data)
+    if version != VERSION or alg != ALG_STREAM_AES256GCM or not 0 < segment <= MAX_SEGMENT:
+        raise ValueError("not an encrypted stream")
+    return key_id, segment
+
+
+def plaintext_size(ciphertext_size: int, segment: int) -> int:
+    """Exact plaintext length of a complete stream of ``ciphertext_size`` bytes."""
+    body = ciphertext_size - HEADER.size
+    segments = max(1, -(-body // (segment + TAG_LEN)))
+    return body - segments * TAG_LEN
+
+
+class StreamEncryptor:
+    """``update()`` as data arrives, then ``finalize()`` once; each returns ciphertext to write."""
+
+    def __init__(self, key: bytes, aad: bytes = b"", segment: int = SEGMENT, key_id: int = KEY_VAULT):
+        if not 0 < segment <= MAX_SEGMENT:
+            raise ValueError(f"segment size must be 1..{MAX_SEGMENT}")
+        salt = secrets.token_bytes(16)
+        self.header = HEADER.pack(VERSION, ALG_STREAM_AES256GCM, key_id, segment, salt)
+        self._aead = _subkey(key, salt)
+        self._aad = self.header + aad
+        self._segment = segment
+        self._buf = bytearray()
+        self._index = 0
+        self._pending_header = True
+
+    def _seal(self, plaintext: bytes, final: bool) -> bytes:
+        ct = self._aead.encrypt(_nonce(self._index, final), plaintext, self._aad)
+        self._index += 1
+        return ct
+
+    def _take_header(self) -> list[bytes]:
+        if self._pending_header:
+            self._pending_header = False
+            return [self.header]
+        return []
+
+    def update(self, data: bytes) -> bytes:
+        out = self._take_header()
+        self._buf += data
+        seg = self._segment
+        # a full segment is sealed only once more data follows it: the
+        # last one, however long, must carry the final flag
+        pos = 0
+        while len(self._buf) - pos > seg:
+            out.append(self._seal(bytes(self._buf[pos:pos + seg]), final=False))
+            pos += seg
+        del self._buf[:pos]
+        return b"".join(out)
+
+    def finalize(self) -> bytes:
+        out = self._take_header()
+        out.append(self._seal(bytes(self._buf), final=True))
+        self._buf.clear()
+        return b"".join(out)
+
+
+class StreamDecryptor:
+    """
+    Mirror of ``StreamEncryptor``; raises ``cryptography.exceptions.InvalidTag``
+    on any tampering and ``ValueError`` if the stream is malformed.
+    """
+
+    def __init__(self, key: bytes, aad: bytes = b""):
+        self._key = key
+        self._extra_aad = aad
+        self._aead: AESGCM | None = None
+        self._buf = bytearray()
+        self._index = 0
+
+    def _start(self) -> bool:
+        if self._aead is None:
+            if len(self._buf) < HEADER.size:
+                return False
+            _key_id, self._segment = parse_header(self._buf)
+            header = bytes(self._buf[:HEADER.size])
+            self._aead = _subkey(self._key, header[-16:])
+            self._aad = header + self._extra_aad
+            del self._buf[:HEADER.size]
+        return True
+
+    def _open(self, ciphertext: bytes, final: bool) -> bytes:
+        pt = self._aead.decrypt(_nonce(self._index, final), ciphertext, self._aad)
+        self._index += 1
+        return pt
+
+    def update(self, data: bytes) -> bytes:
+        self._buf += data
+        if not self._start():
+            return b""
+        out = []
+        size = self._segment + TAG_LEN
+        pos = 0
+        while len(self._buf) - pos > size:
+            out.append(self._open(bytes(self._buf[pos:pos + size]), final=False))
+            pos += size
+        del self._buf[:pos]
+        return b"".join(out)
+
+    def finalize(self) -> bytes:
+        if not self._start() or len(self._buf) < TAG_LEN:
+            raise ValueError("truncated stream")
+        pt = self._open(bytes(self._buf), final=True)
+        self._buf.clear()
+        return pt
+
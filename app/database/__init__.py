@@ -1,26 +1,96 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import get_settings
 from app.database.base import Base
+from app.database.instrumentation import count_statements
+from app.database.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument
+from app.database.routing import RecentWrites, ReplicaSet
 
 settings = get_settings()
 
+
+def sqlite_pragmas(dbapi_conn, _record=None) -> None:
+    """Applied to every SQLite connection – the engine's and SqliteRepo's."""
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")           # readers never block the writer
+    cur.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cur.execute("PRAGMA foreign_keys=ON")            # ondelete=CASCADE
+    cur.execute("PRAGMA busy_timeout=5000")          # wait for the write lock, don't fail
+    cur.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_MB * 1024}")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA mmap_size=268435456")
+    cur.close()
+
+
+def _asyncpg(url: str) -> str:
+    return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+
+replica_engines: list = []
+async_replica_engines: list = []
+
 # Decide which storage engine to build
 if settings.DB_BACKEND == "postgres":
     URL = (
         f"postgresql://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}"
         f"@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
     )
-    engine = create_engine(URL, pool_pre_ping=True)
+    engine = create_engine(URL, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
+    # same database through asyncpg for the async routes (AsyncPostgresRepo)
+    async_engine = create_async_engine(
+        _asyncpg(URL), poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS
+    )
+    instrument("primary", engine)
+    instrument("primary-async", async_engine.sync_engine)
+    for _i, _url in enumerate(
+        filter(None, (u.strip() for u in settings.POSTGRES_REPLICA_URLS.split(",")))
+    ):
+        replica_engines.append(
+            create_engine(_url, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
+        )
+        async_replica_engines.append(
+            create_async_engine(_asyncpg(_url), poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS)
+        )
+        instrument(f"replica-{_i}", replica_engines[-1])
+        instrument(f"replica-{_i}-async", async_replica_engines[-1].sync_engine)
 elif settings.DB_BACKEND == "sqlite":
     URL = f"sqlite:///{settings.SQLITE_PATH}"
+    # migrations only – SqliteRepo talks to sqlite3 directly
     engine = create_engine(
         URL, connect_args={"check_same_thread": False}
     )
+    event.listen(engine, "connect", sqlite_pragmas)
+    async_engine = None
 else:                       # file backend ⇒ no SQL engine
     engine = None
+    async_engine = None
+
+for _e in (engine, async_engine and async_engine.sync_engine,
+           *replica_engines, *(e.sync_engine for e in async_replica_engines)):
+    if _e is not None:
+        count_statements(_e)            # X-DB-Statements header, see app.main
+
+# read routing for the Postgres repos, see app.database.routing
+replicas = ReplicaSet(replica_engines)
+async_replicas = ReplicaSet(async_replica_engines)
+recent_writes = RecentWrites(settings.READ_YOUR_WRITES_SECONDS)
 
 # Only create a Session factory if we actually have an engine
 SessionLocal = (
     sessionmaker(bind=engine, autocommit=False, autoflush=False) if engine else None
 )
+
+# expire_on_commit=False: an AsyncSession cannot lazy-load after commit
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, expire_on_commit=False) if async_engine else None
+)
@@ -0,0 +1,63 @@
+# app/database/instrumentation.py
+"""
+Per-request SQL statement counter (and time spent waiting for the pool).
+
+``count_statements(engine)`` hooks ``before_cursor_execute``; every statement
+sent while a ``statement_counter()`` block is active is added to that
+block's tally.  The tally lives in a ``ContextVar`` holding a mutable
+object, so it follows the request into asyncpg's greenlets and into
+``asyncio.to_thread`` workers alike.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class StatementCount:
+    __slots__ = ("value", "pool_wait_s")
+
+    def __init__(self) -> None:
+        self.value = 0
+        self.pool_wait_s = 0.0
+
+
+_current: ContextVar[StatementCount | None] = ContextVar("db_statements", default=None)
+
+
+def _on_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    count = _current.get()
+    if count is not None:
+        count.value += 1
+
+
+def record_statement() -> None:
+    """For code that bypasses SQLAlchemy (``SqliteRepo``)."""
+    count = _current.get()
+    if count is not None:
+        count.value += 1
+
+
+def record_pool_wait(seconds: float) -> None:
+    """Called by the instrumented pools (app.database.pool) after each checkout."""
+    count = _current.get()
+    if count is not None:
+        count.pool_wait_s += seconds
+
+
+def count_statements(engine: Engine) -> None:
+    """Attach the counter to ``engine`` (for an AsyncEngine pass ``.sync_engine``)."""
+    if not event.contains(engine, "before_cursor_execute", _on_execute):
+        event.listen(engine, "before_cursor_execute", _on_execute)
+
+
+@contextmanager
+def statement_counter() -> Iterator[StatementCount]:
+    count = StatementCount()
+    token = _current.set(count)
+    try:
+        yield count
+    finally:
+        _current.reset(token)
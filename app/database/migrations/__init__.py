@@ -0,0 +1,118 @@
+# app/database/migrations/__init__.py
+"""
+Versioned schema migrations for the SQL backends.
+
+Each migration is a module ``mNNNN_<name>.py`` in this package with
+
+    def upgrade(conn: Connection) -> None   # the DDL
+    transactional = True                    # False → run in AUTOCOMMIT
+                                            #   (CREATE INDEX CONCURRENTLY)
+
+Applied versions are recorded in ``schema_migrations``; ``upgrade()`` runs
+the missing ones in order.  On Postgres a session advisory lock serialises
+concurrent runners (several replicas starting with ``AUTO_MIGRATE``).
+
+    python -m app.database.migrations upgrade [--to N]
+    python -m app.database.migrations status
+"""
+import datetime
+import importlib
+import pkgutil
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Iterator
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select
+from sqlalchemy.engine import Connection, Engine
+
+_NAME = re.compile(r"^m(\d{4})_(\w+)$")
+_LOCK_KEY = 0x426C6B50          # "BlkP": pg_advisory_lock key for the runner
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _meta,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    module: ModuleType
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "transactional", True)
+
+    @property
+    def description(self) -> str:
+        doc = (self.module.__doc__ or "").strip()
+        return doc.splitlines()[0] if doc else ""
+
+
+def discover() -> list[Migration]:
+    found = []
+    for info in pkgutil.iter_modules(__path__):
+        m = _NAME.match(info.name)
+        if m:
+            module = importlib.import_module(f"{__name__}.{info.name}")
+            found.append(Migration(int(m.group(1)), m.group(2), module))
+    found.sort(key=lambda mig: mig.version)
+    versions = [mig.version for mig in found]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"duplicate migration versions: {versions}")
+    return found
+
+
+def applied(engine: Engine) -> set[int]:
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        return set(conn.scalars(select(schema_migrations.c.version)))
+
+
+@contextmanager
+def _runner_lock(engine: Engine) -> Iterator[None]:
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql(f"SELECT pg_advisory_lock({_LOCK_KEY})")
+        try:
+            yield
+        finally:
+            conn.exec_driver_sql(f"SELECT pg_advisory_unlock({_LOCK_KEY})")
+
+
+def _record(conn: Connection, mig: Migration) -> None:
+    conn.execute(schema_migrations.insert().values(
+        version=mig.version,
+        name=mig.name,
+        applied_at=datetime.datetime.now(datetime.timezone.utc),
+    ))
+
+
+def upgrade(engine: Engine, target: int | None = None) -> list[Migration]:
+    """Apply every pending migration up to ``target`` (default: latest)."""
+    done: list[Migration] = []
+    with _runner_lock(engine):
+        have = applied(engine)                  # re-read under the lock
+        for mig in discover():
+            if mig.version in have or (target is not None and mig.version > target):
+                continue
+            if mig.transactional:
+                with engine.begin() as conn:
+                    mig.module.upgrade(conn)
+                    _record(conn, mig)
+            else:
+                # must be idempotent: a crash between DDL and _record re-runs it
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    mig.module.upgrade(conn)
+                    _record(conn, mig)
+            done.append(mig)
+    return done
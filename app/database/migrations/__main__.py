@@ -0,0 +1,35 @@
+# app/database/migrations/__main__.py
+import argparse
+
+from app.database import engine
+from app.database.migrations import applied, discover, upgrade
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        prog="python -m app.database.migrations",
+        description="Apply or inspect the SQL schema migrations.",
+    )
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    up = sub.add_parser("upgrade", help="apply pending migrations")
+    up.add_argument("--to", type=int, default=None, help="stop after this version")
+    sub.add_parser("status", help="list migrations and whether they are applied")
+    args = ap.parse_args()
+
+    if engine is None:
+        raise SystemExit("DB_BACKEND has no SQL database – nothing to migrate")
+
+    if args.cmd == "upgrade":
+        done = upgrade(engine, args.to)
+        for mig in done:
+            print(f"applied {mig.version:04d} {mig.name}")
+        print("up to date" if not done else f"{len(done)} migration(s) applied")
+    else:
+        have = applied(engine)
+        for mig in discover():
+            mark = "x" if mig.version in have else " "
+            print(f"[{mark}] {mig.version:04d} {mig.name:<28} {mig.description}")
+
+
+if __name__ == "__main__":
+    main()
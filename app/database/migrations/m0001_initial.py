@@ -0,0 +1,48 @@
+# app/database/migrations/m0001_initial.py
+"""Create users and vault_items as the app first shipped them.
+
+The tables are frozen here rather than taken from ``app.models`` so that
+later model changes arrive through their own migrations.  ``checkfirst``
+makes this a no-op on databases the old import-time ``create_all`` built.
+"""
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    func,
+)
+from sqlalchemy.engine import Connection
+
+meta = MetaData()
+
+Table(
+    "users",
+    meta,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("username", String, unique=True, index=True, nullable=False),
+    Column("password", String, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("kdf_salt", LargeBinary(16), nullable=False),
+    Column("kdf_mem", Integer),
+    Column("kdf_time", Integer),
+    Column("kdf_lanes", Integer),
+)
+
+Table(
+    "vault_items",
+    meta,
+    Column("id", String(32), primary_key=True, unique=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("title", String, nullable=False),
+    Column("data", LargeBinary, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    meta.create_all(conn, checkfirst=True)
@@ -0,0 +1,29 @@
+# app/database/migrations/m0002_vault_listing_index.py
+"""Composite index for the per-user vault listing: (user_id, created_at, id).
+
+Serves ``WHERE user_id = ?`` (list, get, delete) and the keyset-paginated
+``ORDER BY created_at DESC, id DESC`` without a sort.  On Postgres it is
+built ``CONCURRENTLY`` so writes to ``vault_items`` keep flowing; that
+cannot run inside a transaction, hence ``transactional = False``.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+transactional = False
+
+INDEX = "ix_vault_items_user_created"
+COLUMNS = "vault_items (user_id, created_at, id)"
+
+
+def upgrade(conn: Connection) -> None:
+    if conn.dialect.name == "postgresql":
+        # an interrupted CONCURRENTLY build leaves an INVALID index behind,
+        # which IF NOT EXISTS would happily keep – drop it and start over
+        invalid = conn.scalar(text(
+            "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+        ), {"name": INDEX})
+        if invalid:
+            conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX}")
+        conn.exec_driver_sql(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX} ON {COLUMNS}")
+    else:
+        conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {INDEX} ON {COLUMNS}")
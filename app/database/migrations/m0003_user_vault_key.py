@@ -0,0 +1,16 @@
+# app/database/migrations/m0003_user_vault_key.py
+"""users.vault_key: the per-user vault key, wrapped by the password-derived key.
+
+NULL until the user's first unlock after this release, which creates the
+key and moves the existing items under it (app.core.rekey).
+"""
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+
+def upgrade(conn: Connection) -> None:
+    # idempotent: a database someone built with create_all() from the model has it
+    if "vault_key" in {c["name"] for c in inspect(conn).get_columns("users")}:
+        return
+    blob = "BYTEA" if conn.dialect.name == "postgresql" else "BLOB"
+    conn.exec_driver_sql(f"ALTER TABLE users ADD COLUMN vault_key {blob}")
@@ -0,0 +1,107 @@
+# app/database/pool.py
+"""
+Connection pools that keep score.
+
+``InstrumentedQueuePool`` (and its asyncio twin) time every checkout –
+waiting in the queue, opening a new connection, the optional pre-ping –
+and count the checkouts that found every connection in use.  A slow
+request whose checkout time is high was waiting for the pool, not for
+Postgres.  ``GET /metrics/pool`` (app.routes.metrics) shows the numbers;
+the per-request share goes out as ``X-DB-Pool-Wait-Ms``.
+"""
+import logging
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.database.instrumentation import record_pool_wait
+
+log = logging.getLogger("blockpass.db")
+
+
+class PoolStats:
+    """Cumulative since process start (they survive ``engine.dispose()``)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_s = 0.0
+        self.max_wait_s = 0.0
+        self.exhausted = 0          # checkouts that found no free connection
+        self.timeouts = 0           # … and gave up after pool_timeout
+
+    def record(self, waited: float, exhausted: bool, timed_out: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_s += waited
+            self.max_wait_s = max(self.max_wait_s, waited)
+            self.exhausted += exhausted
+            self.timeouts += timed_out
+
+
+class _Instrumented:
+    stats: PoolStats | None = None
+
+    def connect(self):
+        stats = self.stats
+        if stats is None:
+            return super().connect()
+        exhausted = 0 <= self._max_overflow and self.checkedout() >= self.size() + self._max_overflow
+        t0 = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            log.warning("connection pool exhausted: %s", self.status())
+            raise
+        finally:
+            waited = time.perf_counter() - t0
+            stats.record(waited, exhausted, timed_out)
+            record_pool_wait(waited)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool – keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def snapshot(self) -> dict:
+        s = self.stats or PoolStats()
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": s.checkouts,
+            "checkout_ms_avg": round(s.wait_s / s.checkouts * 1000, 3) if s.checkouts else 0.0,
+            "checkout_ms_max": round(s.max_wait_s * 1000, 3),
+            "exhausted": s.exhausted,
+            "timeouts": s.timeouts,
+        }
+
+
+class InstrumentedQueuePool(_Instrumented, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_Instrumented, AsyncAdaptedQueuePool):
+    pass
+
+
+_engines: dict[str, Engine] = {}
+
+
+def instrument(name: str, engine: Engine) -> None:
+    """Start counting on ``engine``'s pool (for an AsyncEngine pass ``.sync_engine``)."""
+    engine.pool.stats = PoolStats()
+    _engines[name] = engine
+
+
+def pool_metrics() -> dict[str, dict]:
+    # engine.pool, not a saved reference: dispose() replaces it
+    return {name: e.pool.snapshot() for name, e in _engines.items()}
@@ -0,0 +1,66 @@
+# app/database/routing.py
+"""
+Read-replica routing for the Postgres repositories.
+
+Reads made on behalf of a user go to a replica (round robin) unless that
+user wrote something within ``READ_YOUR_WRITES_SECONDS``: replication is
+asynchronous, so a list fetched right after a create could otherwise miss
+the new row.  Writes always go to the primary.
+
+The "wrote recently" marks are per process.  With several workers a read
+that lands on another worker than the write can still be stale for up to
+the replication lag; keep the window above that lag anyway so the common
+case – redirect after POST to the same worker – is covered.
+"""
+import itertools
+import threading
+import time
+from typing import Generic, Sequence, TypeVar
+
+E = TypeVar("E")
+
+
+class ReplicaSet(Generic[E]):
+    """Round robin over the replica engines (sync or async alike)."""
+
+    def __init__(self, engines: Sequence[E]):
+        self.engines = list(engines)
+        self._next = itertools.cycle(self.engines)
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def serves(self, key: str | None, recent: "RecentWrites") -> bool:
+        """Should a read on behalf of ``key`` go to a replica?"""
+        return bool(self.engines) and key is not None and not recent.sticky(key)
+
+    def pick(self) -> E:
+        with self._lock:
+            return next(self._next)
+
+
+class RecentWrites:
+    """``key → deadline``: reads for ``key`` stay on the primary until then."""
+
+    _PRUNE_AT = 10_000
+
+    def __init__(self, window_s: float):
+        self.window_s = window_s
+        self._until: dict[str, float] = {}
+
+    def mark(self, *keys: str) -> None:
+        if self.window_s <= 0:
+            return
+        deadline = time.monotonic() + self.window_s
+        for key in keys:
+            self._until[key] = deadline
+        if len(self._until) > self._PRUNE_AT:
+            now = time.monotonic()
+            for key, until in list(self._until.items()):
+                if until < now:
+                    self._until.pop(key, None)
+
+    def sticky(self, key: str) -> bool:
+        until = self._until.get(key)
+        return until is not None and until > time.monotonic()
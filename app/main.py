@@ -1,25 +1,60 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from app.routes import auth, vault
-from app.database.base import Base
+from app.routes import auth, metrics, vault
+from app.core.config import get_settings
 from app.database import engine
+from app.database.instrumentation import statement_counter
+from app.repository import pick_async_repo
 
 from app.routes.views import router as views_router
 from app.routes.vault import router as vault_router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if engine and get_settings().AUTO_MIGRATE:
+        from app.database import migrations
+        await asyncio.to_thread(migrations.upgrade, engine)
+    # one repository for the whole process: warm indexes / pool survive requests
+    repo = pick_async_repo()
+    await repo.startup()
+    app.state.repo = repo
+    try:
+        yield
+    finally:
+        await repo.shutdown()
+
+
 app = FastAPI(
     title="BlockPass Password Manager",
     version="0.1.0",
     docs_url=None,  # turn off Swagger UI if you like
+    lifespan=lifespan,
 )
 
+if engine:
+    log = logging.getLogger("blockpass.db")
+
+    @app.middleware("http")
+    async def count_db_statements(request: Request, call_next):
+        # round trips per request – check the unit-of-work savings under load
+        with statement_counter() as count:
+            response = await call_next(request)
+        response.headers["X-DB-Statements"] = str(count.value)
+        # time spent waiting for a pooled connection (Postgres only)
+        response.headers["X-DB-Pool-Wait-Ms"] = f"{count.pool_wait_s * 1000:.2f}"
+        log.debug("%s %s: %d statements, %.2f ms pool wait", request.method,
+                  request.url.path, count.value, count.pool_wait_s * 1000)
+        return response
+
 # serve /static (if you ever add local CSS/JS/images)
 # app.mount("/static", StaticFiles(directory="static"), name="static")
 
 app.include_router(auth.router)       # /auth
 app.include_router(views_router)      # /register, /login, /vault (HTML)
 app.include_router(vault_router)      # /vault (JSON) – now comes _after_ the HTML
-
-# create tables
-if engine:
-    Base.metadata.create_all(bind=engine)
+app.include_router(metrics.router)    # /metrics/pool
@@ -14,3 +14,4 @@ class User(Base):
     kdf_mem     = Column(Integer, default=19 * 1024)     # kibibytes → 19 MiB
     kdf_time    = Column(Integer, default=2)             # iterations
     kdf_lanes   = Column(Integer, default=1)             # parallelism
+    vault_key   = Column(LargeBinary, nullable=True)     # wrapped by the Argon2id key (m0003)
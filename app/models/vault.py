@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, LargeBinary, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, LargeBinary, ForeignKey, DateTime, Index
 from sqlalchemy.sql import func
 from app.database.base import Base
 import uuid
@@ -20,4 +20,9 @@ class VaultItem(Base):
         DateTime(timezone=True),
         server_default=func.now(),
         nullable=False
-    )
\ No newline at end of file
+    )
+
+    __table_args__ = (
+        # keyset-paginated listing: WHERE user_id = ? ORDER BY created_at, id
+        Index("ix_vault_items_user_created", "user_id", "created_at", "id"),
+    )
@@ -1,24 +1,78 @@
+import threading
+from typing import AsyncIterator
+
+from fastapi import Request
+
 from app.core.config import get_settings
+from app.repository.base import AsyncUserRepository, UserRepository
 from app.repository.file_repo import FileRepo
 
-def pick_repo():
+_repo: UserRepository | None = None
+_async_repo: AsyncUserRepository | None = None
+_repo_lock = threading.Lock()
+
+
+def build_repo() -> UserRepository:
     backend = get_settings().DB_BACKEND.lower()
     if backend == "file":
         return FileRepo()
+    elif backend == "journal":
+        from app.repository.journal_repo import JournalRepo
+        return JournalRepo()
+    elif backend == "sqlite":
+        from app.repository.sqlite_repo import SqliteRepo
+        return SqliteRepo()
     elif backend == "postgres":
         from app.repository.pg_repo import PostgresRepo
         return PostgresRepo()
     else:
         raise RuntimeError(f"Unsupported backend: {backend}")
-from app.core.config import get_settings
-from app.repository.file_repo import FileRepo
 
-def pick_repo():
+
+def build_async_repo() -> AsyncUserRepository:
     backend = get_settings().DB_BACKEND.lower()
-    if backend == "file":
-        return FileRepo()
+    if backend in ("file", "journal"):
+        from app.repository.async_file_repo import AsyncFileRepo
+        return AsyncFileRepo(pick_repo())     # shares the resident tables
+    elif backend == "sqlite":
+        from app.repository.sqlite_repo import AsyncSqliteRepo
+        return AsyncSqliteRepo(pick_repo())
     elif backend == "postgres":
-        from app.repository.pg_repo import PostgresRepo
-        return PostgresRepo()
+        from app.repository.async_pg_repo import AsyncPostgresRepo
+        return AsyncPostgresRepo()
     else:
-        raise RuntimeError(f"Unsupported backend: {backend}")
\ No newline at end of file
+        raise RuntimeError(f"Unsupported backend: {backend}")
+
+
+def pick_repo() -> UserRepository:
+    """The process-wide repository (built on first use) – for scripts and CLIs."""
+    global _repo
+    if _repo is None:
+        with _repo_lock:
+            if _repo is None:
+                _repo = build_repo()
+    return _repo
+
+
+def pick_async_repo() -> AsyncUserRepository:
+    """The process-wide async repository the web app serves from."""
+    global _async_repo
+    if _async_repo is None:
+        repo = build_async_repo()           # may call pick_repo(): build outside the lock
+        with _repo_lock:
+            if _async_repo is None:
+                _async_repo = repo
+    return _async_repo
+
+
+async def get_repo(request: Request) -> AsyncIterator[AsyncUserRepository]:
+    """
+    FastAPI dependency: a unit of work on the repository the lifespan put on
+    ``app.state``.  FastAPI resolves it once per request, so the auth
+    dependency and the route share one database session.
+    """
+    repo = getattr(request.app.state, "repo", None)
+    if repo is None:
+        repo = pick_async_repo()
+    async with repo.unit_of_work() as uow:
+        yield uow
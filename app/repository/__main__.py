@@ -0,0 +1,44 @@
+# app/repository/__main__.py
+import argparse
+import sys
+
+from app.repository import pick_repo
+from app.repository.bulk import parse_lines, to_ndjson
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        prog="python -m app.repository",
+        description="Export / import a user's encrypted vault items as NDJSON.",
+    )
+    ap.add_argument("command", choices=("export", "import"))
+    ap.add_argument("--username", required=True)
+    ap.add_argument("--file", default="-", help="NDJSON path (default: stdout / stdin)")
+    args = ap.parse_args()
+
+    repo = pick_repo()
+    repo.startup()
+    try:
+        user = repo.get_by_username(args.username)
+        if user is None:
+            raise SystemExit(f"no such user: {args.username}")
+
+        if args.command == "export":
+            out = sys.stdout.buffer if args.file == "-" else open(args.file, "wb")
+            with out:
+                n = 0
+                for item in repo.export_items(user["id"]):
+                    out.write(to_ndjson(item))
+                    n += 1
+            print(f"exported {n} items", file=sys.stderr)
+        else:
+            src = sys.stdin.buffer if args.file == "-" else open(args.file, "rb")
+            with src:
+                n = repo.import_items(user["id"], parse_lines(src))
+            print(f"imported {n} items", file=sys.stderr)
+    finally:
+        repo.shutdown()
+
+
+if __name__ == "__main__":
+    main()
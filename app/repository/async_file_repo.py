@@ -0,0 +1,116 @@
+# app/repository/async_file_repo.py
+"""
+Event-loop front end for the file / journal backends.
+
+Reads are answered inline when the resident tables are current – a
+``stat()`` plus a dict hit, cheaper than a hop to a thread – and move to a
+worker thread only when a file has to be (re)parsed.  Writes apply their
+change in memory on a worker thread (a flush may be holding the table lock)
+and then *await* the group-commit future, so no thread sits blocked while
+the batch is fsynced.
+"""
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Callable, List, Optional, TypeVar
+
+from app.repository.base import AsyncUserRepository
+from app.repository.bulk import abatched
+from app.repository.file_repo import FileRepo
+from app.repository.records import VaultMeta, VaultRecord
+
+T = TypeVar("T")
+
+
+class AsyncFileRepo(AsyncUserRepository):
+    def __init__(self, sync: FileRepo | None = None):
+        # the process-wide FileRepo / JournalRepo whose tables we serve from
+        self.sync = sync if sync is not None else FileRepo()
+
+    # ───────────────────────── lifecycle ────────────────────────────────
+    async def startup(self) -> None:
+        await asyncio.to_thread(self.sync.startup)
+
+    async def shutdown(self) -> None:
+        await asyncio.to_thread(self.sync.shutdown)
+
+    # ───────────────────────── private helpers ──────────────────────────
+    async def _read(self, user_id: str | None, fn: Callable[..., T], *args) -> T:
+        if self.sync._is_resident(user_id):
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    # ───────────────────────── AsyncUserRepository API ──────────────────
+    async def create_user(
+        self,
+        username: str,
+        hashed_pw: str,
+        *,
+        kdf_salt: bytes | None = None,
+        kdf_mem: int = 19 * 1024,  # KiB  ≈ 19 MiB
+        kdf_time: int = 2,
+        kdf_lanes: int = 1,
+    ) -> dict:
+        user, durable = await asyncio.to_thread(
+            self.sync._stage_user, username, hashed_pw, kdf_salt, kdf_mem, kdf_time, kdf_lanes
+        )
+        await asyncio.wrap_future(durable)
+        return user
+
+    async def get_by_username(self, username: str) -> Optional[dict]:
+        return await self._read(None, self.sync.get_by_username, username)
+
+    async def get_by_id(self, user_id: str) -> Optional[dict]:
+        return await self._read(None, self.sync.get_by_id, user_id)
+
+    async def rekey_user(
+        self, user_id: str, kdf_params: dict, blobs: dict[str, bytes], expected: bytes | None = None
+    ) -> bool:
+        staged = await asyncio.to_thread(self.sync._stage_rekey, user_id, kdf_params, blobs, expected)
+        for durable in staged or ():
+            await asyncio.wrap_future(durable)
+        return staged is not None
+
+    async def rewrap_user(self, user_id: str, kdf_params: dict, expected: bytes) -> bool:
+        durable = await asyncio.to_thread(self.sync._stage_rewrap, user_id, kdf_params, expected)
+        if durable is not None:
+            await asyncio.wrap_future(durable)
+        return durable is not None
+
+    # ───────────────────────── Vault methods ────────────────────────────
+    async def create_item(self, user_id: str, title: str, ciphertext: bytes) -> VaultRecord:
+        record, durable = await asyncio.to_thread(self.sync._stage_item, user_id, title, ciphertext)
+        await asyncio.wrap_future(durable)
+        return record
+
+    async def list_items(self, user_id: str) -> List[VaultRecord]:
+        return await self._read(user_id, self.sync.list_items, user_id)
+
+    async def list_item_meta(
+        self, user_id: str, limit: int = 50, after: str | None = None
+    ) -> tuple[List[VaultMeta], str | None]:
+        return await self._read(user_id, self.sync.list_item_meta, user_id, limit, after)
+
+    async def get_item(self, user_id: str, item_id: str) -> Optional[VaultRecord]:
+        return await self._read(user_id, self.sync.get_item, user_id, item_id)
+
+    async def get_items(self, user_id: str, item_ids: List[str]) -> List[VaultRecord]:
+        return await self._read(user_id, self.sync.get_items, user_id, item_ids)
+
+    async def delete_item(self, user_id: str, item_id: str) -> None:
+        durable = await asyncio.to_thread(self.sync._stage_delete, user_id, item_id)
+        await asyncio.wrap_future(durable)
+
+    # ───────────────────────── bulk transfer ────────────────────────────
+    async def export_items(self, user_id: str) -> AsyncIterator[VaultRecord]:
+        rows = await self._read(user_id, self.sync._export_rows, user_id)
+        for row in rows:
+            yield VaultRecord.from_row(row)
+
+    async def import_items(self, user_id: str, items: AsyncIterable[dict]) -> int:
+        pending = []
+        n = 0
+        async for batch in abatched(items):
+            pending.append(await asyncio.to_thread(self.sync._stage_import, user_id, batch))
+            n += len(batch)
+        for durable in pending:
+            await asyncio.wrap_future(durable)
+        return n
@@ -0,0 +1,227 @@
+# app/repository/async_pg_repo.py
+import datetime
+import uuid
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncIterable, AsyncIterator, List, Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal, async_engine, async_replicas, recent_writes
+from app.database.instrumentation import record_statement
+from app.repository.bulk import BATCH, abatched
+from app.repository.base import AsyncUserRepository
+from app.repository.pg_repo import (
+    import_row,
+    lock_user_key,
+    rekey_rows,
+    rewrap_stmt,
+    select_export,
+    select_item,
+    select_item_ids,
+    select_item_meta,
+    select_items_by_id,
+    select_items,
+    select_user_by_name,
+    share_user_row,
+    user_to_dict,
+)
+from app.models.user import User
+from app.models.vault import VaultItem as VaultModel
+from app.repository.records import VaultMeta, VaultRecord, make_page
+from app.core import kdf
+
+
+class AsyncPostgresRepo(AsyncUserRepository):
+    """``PostgresRepo`` on asyncpg – the same statements, awaited."""
+
+    def __init__(self, session: AsyncSession | None = None):
+        self._shared = session
+        self._replica: AsyncSession | None = None
+        self._users_seen: dict[str, dict | None] = {}
+
+    # ─────────────────── lifecycle ─────────────────────────────────────
+    async def startup(self) -> None:
+        async with async_engine.connect():
+            pass
+
+    async def shutdown(self) -> None:
+        for e in (async_engine, *async_replicas.engines):
+            await e.dispose()
+
+    @asynccontextmanager
+    async def unit_of_work(self) -> AsyncIterator["AsyncPostgresRepo"]:
+        async with AsyncSessionLocal() as db:
+            uow = type(self)(session=db)
+            try:
+                yield uow
+            finally:
+                if uow._replica is not None:
+                    await uow._replica.close()
+
+    # ─────────────────── internal ──────────────────────────────────────
+    @asynccontextmanager
+    async def _session(self, read_for: str | None = None) -> AsyncIterator[AsyncSession]:
+        """See ``PostgresRepo._session``."""
+        if not async_replicas.serves(read_for, recent_writes):
+            if self._shared is not None:
+                yield self._shared
+            else:
+                async with AsyncSessionLocal() as db:
+                    yield db
+        elif self._shared is not None:
+            if self._replica is None:
+                self._replica = AsyncSessionLocal(bind=async_replicas.pick())
+            yield self._replica
+        else:
+            async with AsyncSessionLocal(bind=async_replicas.pick()) as db:
+                yield db
+
+    # ─────────────────── user section ──────────────────────────────────
+    async def create_user(
+        self,
+        username: str,
+        hashed_pw: str,
+        *,
+        kdf_salt: bytes | None = None,
+        kdf_mem: int = 19 * 1024,  # KiB ≈ 19 MiB
+        kdf_time: int = 2,
+        kdf_lanes: int = 1,
+    ) -> dict:
+        if kdf_salt is None:
+            kdf_salt = kdf.generate_salt()
+
+        async with self._session() as db:
+            if (await db.scalars(select_user_by_name(username))).first():
+                raise ValueError("exists")
+
+            user = User(
+                username=username,
+                password=hashed_pw,
+                kdf_salt=kdf_salt,
+                kdf_mem=kdf_mem,
+                kdf_time=kdf_time,
+                kdf_lanes=kdf_lanes,
+            )
+            db.add(user)
+            await db.commit()             # INSERT … RETURNING fills user.id
+            recent_writes.mark(str(user.id), username)
+            return {"id": str(user.id), "username": user.username}
+
+    async def get_by_username(self, username: str) -> Optional[dict]:
+        async with self._session(read_for=username) as db:
+            rec = (await db.scalars(select_user_by_name(username))).first()
+            return user_to_dict(rec) if rec else None
+
+    async def get_by_id(self, user_id: str) -> Optional[dict]:
+        if user_id in self._users_seen:           # auth already loaded it
+            return self._users_seen[user_id]
+        async with self._session(read_for=user_id) as db:
+            rec = await db.get(User, int(user_id))
+            user = user_to_dict(rec) if rec else None
+        if self._shared is not None:
+            self._users_seen[user_id] = user
+        return user
+
+    async def rekey_user(
+        self, user_id: str, kdf_params: dict, blobs: dict[str, bytes], expected: bytes | None = None
+    ) -> bool:
+        async with self._session() as db:
+            stored = await db.scalar(lock_user_key(user_id))
+            if stored != expected or set(await db.scalars(select_item_ids(user_id))) != blobs.keys():
+                await db.rollback()
+                return False
+            if blobs:
+                await db.execute(update(VaultModel), rekey_rows(blobs))
+            await db.execute(update(User).where(User.id == int(user_id)).values(**kdf_params))
+            await db.commit()
+        self._users_seen.pop(user_id, None)
+        recent_writes.mark(str(user_id))
+        return True
+
+    async def rewrap_user(self, user_id: str, kdf_params: dict, expected: bytes) -> bool:
+        async with self._session() as db:
+            done = (await db.execute(rewrap_stmt(user_id, kdf_params, expected))).rowcount == 1
+            await db.commit()
+        self._users_seen.pop(user_id, None)
+        recent_writes.mark(str(user_id))
+        return done
+
+    # ─────────────────── vault‑item section ────────────────────────────
+    async def create_item(self, user_id: str, title: str, ciphertext: bytes) -> VaultModel:
+        async with self._session() as db:
+            await db.execute(share_user_row(user_id))
+            new = VaultModel(
+                id=uuid.uuid4().hex,
+                user_id=int(user_id),
+                title=title,
+                data=ciphertext,
+                created_at=datetime.datetime.utcnow(),
+            )
+            db.add(new)
+            await db.commit()
+            recent_writes.mark(str(user_id))
+            return new
+
+    async def list_items(self, user_id: str) -> List[VaultModel]:
+        async with self._session(read_for=user_id) as db:
+            return list((await db.scalars(select_items(user_id))).all())
+
+    async def list_item_meta(
+        self, user_id: str, limit: int = 50, after: str | None = None
+    ) -> tuple[List[VaultMeta], str | None]:
+        async with self._session(read_for=user_id) as db:
+            rows = (await db.execute(select_item_meta(user_id, limit, after))).all()
+        return make_page([VaultMeta(*r) for r in rows], limit)
+
+    async def get_item(self, user_id: str, item_id: str) -> Optional[VaultModel]:
+        async with self._session(read_for=user_id) as db:
+            return (await db.scalars(select_item(user_id, item_id))).first()
+
+    async def get_items(self, user_id: str, item_ids: List[str]) -> List[VaultModel]:
+        async with self._session(read_for=user_id) as db:
+            return list((await db.scalars(select_items_by_id(user_id, item_ids))).all())
+
+    async def delete_item(self, user_id: str, item_id: str) -> None:
+        async with self._session() as db:
+            await db.execute(
+                delete(VaultModel).where(
+                    VaultModel.user_id == int(user_id), VaultModel.id == item_id
+                )
+            )
+            await db.commit()
+            recent_writes.mark(str(user_id))
+
+    # ─────────────────── bulk transfer ─────────────────────────────────
+    async def export_items(self, user_id: str) -> AsyncIterator[VaultRecord]:
+        # the response body streams after the request's unit of work has
+        # closed, so this opens its own session; stream() = server-side cursor
+        on_replica = async_replicas.serves(user_id, recent_writes)
+        bind = async_replicas.pick() if on_replica else async_engine
+        async with AsyncSessionLocal(bind=bind) as db:
+            result = await db.stream(select_export(user_id).execution_options(yield_per=BATCH))
+            async for row in result:
+                yield VaultRecord(row.id, str(row.user_id), row.title, row.data, row.created_at)
+
+    async def import_items(self, user_id: str, items: AsyncIterable[dict]) -> int:
+        """COPY … FROM STDIN per batch, all inside one transaction."""
+        columns = ("id", "user_id", "title", "data", "created_at")
+        n = 0
+        async with self._session() as db:
+            await db.execute(share_user_row(user_id))
+            conn = await db.connection()
+            driver = (await conn.get_raw_connection()).driver_connection   # asyncpg
+            tx = nullcontext() if driver.is_in_transaction() else driver.transaction()
+            async with tx:
+                async for batch in abatched(items):
+                    rows = [import_row(user_id, i) for i in batch]
+                    record_statement()
+                    await driver.copy_records_to_table(
+                        "vault_items",
+                        records=[tuple(r[c] for c in columns) for r in rows],
+                        columns=columns,
+                    )
+                    n += len(rows)
+            await db.commit()
+        recent_writes.mark(str(user_id))
+        return n
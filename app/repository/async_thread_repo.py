@@ -0,0 +1,74 @@
+# app/repository/async_thread_repo.py
+"""
+Async front end for a synchronous repository: every call runs on a worker
+thread.  Used for SQLite, whose driver has no asyncio interface and whose
+calls are short enough that one thread hop per call is the whole cost.
+"""
+import asyncio
+import itertools
+from typing import AsyncIterable, AsyncIterator, List, Optional
+
+from app.repository.base import AsyncUserRepository, UserRepository
+from app.repository.bulk import BATCH, abatched
+
+
+class ThreadedAsyncRepo(AsyncUserRepository):
+    def __init__(self, sync: UserRepository):
+        self.sync = sync
+
+    # ───────────────────────── lifecycle ────────────────────────────────
+    async def startup(self) -> None:
+        await asyncio.to_thread(self.sync.startup)
+
+    async def shutdown(self) -> None:
+        await asyncio.to_thread(self.sync.shutdown)
+
+    # ───────────────────────── AsyncUserRepository API ──────────────────
+    async def create_user(self, username: str, hashed_pw: str, **kdf_params) -> dict:
+        return await asyncio.to_thread(self.sync.create_user, username, hashed_pw, **kdf_params)
+
+    async def get_by_username(self, username: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.sync.get_by_username, username)
+
+    async def get_by_id(self, user_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.sync.get_by_id, user_id)
+
+    async def rekey_user(
+        self, user_id: str, kdf_params: dict, blobs: dict[str, bytes], expected: bytes | None = None
+    ) -> bool:
+        return await asyncio.to_thread(self.sync.rekey_user, user_id, kdf_params, blobs, expected)
+
+    async def rewrap_user(self, user_id: str, kdf_params: dict, expected: bytes) -> bool:
+        return await asyncio.to_thread(self.sync.rewrap_user, user_id, kdf_params, expected)
+
+    # ───────────────────────── Vault methods ────────────────────────────
+    async def create_item(self, user_id: str, title: str, ciphertext: bytes):
+        return await asyncio.to_thread(self.sync.create_item, user_id, title, ciphertext)
+
+    async def list_items(self, user_id: str) -> List:
+        return await asyncio.to_thread(self.sync.list_items, user_id)
+
+    async def list_item_meta(self, user_id: str, limit: int = 50, after: str | None = None):
+        return await asyncio.to_thread(self.sync.list_item_meta, user_id, limit, after)
+
+    async def get_item(self, user_id: str, item_id: str):
+        return await asyncio.to_thread(self.sync.get_item, user_id, item_id)
+
+    async def get_items(self, user_id: str, item_ids: List[str]) -> List:
+        return await asyncio.to_thread(self.sync.get_items, user_id, item_ids)
+
+    async def delete_item(self, user_id: str, item_id: str) -> None:
+        await asyncio.to_thread(self.sync.delete_item, user_id, item_id)
+
+    # ───────────────────────── bulk transfer ────────────────────────────
+    async def export_items(self, user_id: str) -> AsyncIterator:
+        rows = iter(self.sync.export_items(user_id))
+        while chunk := await asyncio.to_thread(lambda: list(itertools.islice(rows, BATCH))):
+            for record in chunk:
+                yield record
+
+    async def import_items(self, user_id: str, items: AsyncIterable[dict]) -> int:
+        n = 0
+        async for batch in abatched(items):
+            n += await asyncio.to_thread(self.sync.import_items, user_id, batch)
+        return n
@@ -0,0 +1,79 @@
+# app/repository/attachments.py
+"""
+Blob storage for vault item attachments – one encrypted file per item
+under ``ATTACHMENT_DIR``, whatever ``DB_BACKEND`` holds the items:
+
+    <ATTACHMENT_DIR>/<2 hex>/<user id>/<item id>
+
+Files only ever hold ciphertext (app.core.streaming).  An upload goes to
+a temporary file that replaces the old one once complete, so a reader
+never sees half an upload and a failed one leaves the previous file intact.
+"""
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import BinaryIO
+
+from app.core.config import get_settings
+
+
+def _checked(value: str) -> str:
+    value = str(value)
+    if not value.replace("-", "").isalnum():
+        raise ValueError(f"invalid id: {value!r}")
+    return value
+
+
+class Upload:
+    """A temporary file beside the target – blocking calls, run them off the event loop."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        self._fh: BinaryIO = open(self.tmp, "wb")
+
+    def write(self, data: bytes) -> None:
+        self._fh.write(data)
+
+    def commit(self, data: bytes = b"") -> None:
+        self._fh.write(data)
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._fh.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self) -> None:
+        self._fh.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+class AttachmentStore:
+    def __init__(self, root: str | None = None):
+        self.root = Path(root or get_settings().ATTACHMENT_DIR)
+
+    def path(self, user_id: str, item_id: str) -> Path:
+        user_id = _checked(user_id)
+        bucket = hashlib.sha1(user_id.encode()).hexdigest()[:2]
+        return self.root / bucket / user_id / _checked(item_id)
+
+    def begin(self, user_id: str, item_id: str) -> Upload:
+        """Start writing a new attachment; it replaces the old one on ``commit()``."""
+        return Upload(self.path(user_id, item_id))
+
+    def open(self, user_id: str, item_id: str) -> BinaryIO | None:
+        try:
+            return open(self.path(user_id, item_id), "rb")
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def delete(self, user_id: str, item_id: str) -> bool:
+        try:
+            self.path(user_id, item_id).unlink()
+        except (FileNotFoundError, ValueError):
+            return False
+        return True
+
+
+store = AttachmentStore()
@@ -1,6 +1,23 @@
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
 
 class UserRepository(ABC):
+    # ── lifecycle: one long-lived repo per process (see app.main lifespan) ──
+    def startup(self) -> None:
+        """Warm caches / open connections before the first request."""
+
+    def shutdown(self) -> None:
+        """Flush pending writes and release resources."""
+
+    @contextmanager
+    def unit_of_work(self) -> Iterator["UserRepository"]:
+        """
+        Handle whose calls share one session / transaction scope (e.g. one
+        request).  Backends without sessions hand out ``self``.
+        """
+        yield self
+
     @abstractmethod
     def create_user(self, username: str, hashed_pw: str) -> dict:
         ...
@@ -12,3 +29,34 @@ class UserRepository(ABC):
     @abstractmethod
     def get_by_id(self, user_id: str) -> dict | None:
         ...
+
+
+class AsyncUserRepository(ABC):
+    """
+    Coroutine twin of ``UserRepository`` for the ``async def`` routes: a
+    request waiting on the database or the disk hands the event loop back
+    instead of pinning one of Starlette's worker threads.
+    """
+
+    async def startup(self) -> None:
+        """Warm caches / open connections before the first request."""
+
+    async def shutdown(self) -> None:
+        """Flush pending writes and release resources."""
+
+    @asynccontextmanager
+    async def unit_of_work(self) -> AsyncIterator["AsyncUserRepository"]:
+        """Async counterpart of ``UserRepository.unit_of_work``."""
+        yield self
+
+    @abstractmethod
+    async def create_user(self, username: str, hashed_pw: str) -> dict:
+        ...
+
+    @abstractmethod
+    async def get_by_username(self, username: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    async def get_by_id(self, user_id: str) -> dict | None:
+        ...
@@ -0,0 +1,58 @@
+# app/repository/file_lock.py
+"""
+Cross-process reader/writer lock for the file backends.
+
+Several uvicorn workers share the same JSON files, so every table has an
+advisory lock on ``<file>.lock``: readers hold it *shared* while they (re)load
+the file, writers hold it *exclusive* while they merge and persist.  The
+descriptor is opened per acquisition, which makes the lock safe to take from
+several threads of one process at once.
+
+Windows has no shared ``flock``; there both modes fall back to an exclusive
+``msvcrt`` byte-range lock.
+"""
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:                                   # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    def __init__(self, path: Path):
+        self.path = path.with_name(path.name + ".lock")
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        with self._hold(exclusive=False):
+            yield
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        with self._hold(exclusive=True):
+            yield
+
+    @contextmanager
+    def _hold(self, exclusive: bool) -> Iterator[None]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
@@ -1,32 +1,300 @@
 # app/repository/file_repo.py
-import json
+import hashlib
+import heapq
+import os
 import threading
 import uuid
 import datetime
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Optional, List
+from typing import Iterable, Iterator, Optional, List
 
 from app.repository.base import UserRepository
-from app.models.vault import VaultItem as VaultModel
-from app.core import kdf                              # ← NEW
+from app.repository.bulk import batched
+from app.repository.file_lock import FileLock
+from app.repository.serializers import get_serializer, load_rows
+from app.repository.write_coordinator import WriteCoordinator
+from app.repository.records import VaultMeta, VaultRecord, decode_cursor, make_page, naive_utc
+from app.core import kdf
 from app.core.config import get_settings
 
 settings = get_settings()
 
 
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Replace ``path`` with ``data``: temp file, fsync, rename, fsync the directory."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    if hasattr(os, "O_DIRECTORY"):                # POSIX: make the rename durable too
+        fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class _JsonTable:
+    """
+    Resident, indexed copy of one JSON array file.
+
+    Rows are keyed by their ``id``; every field listed in ``index_by`` gets a
+    secondary index ``value → {id: row}``.  The file is only re-parsed when
+    its (inode, mtime, size) signature changes, so a lookup costs one
+    ``stat()`` plus a dict hit instead of a full parse.  The on-disk format
+    follows ``FILE_FORMAT`` on write and is auto-detected on read.
+
+    Mutations are applied in memory under ``lock`` and handed to a
+    ``WriteCoordinator``; ``commit()`` returns a future that resolves once
+    they are durable on disk.  Other worker processes may write the same
+    file: reloads hold the shared ``flock``, flushes the exclusive one, and a
+    flush that finds the file changed underneath it merges first.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        index_by: tuple[str, ...] = (),
+        unique: tuple[str, ...] = (),
+    ):
+        self.path = path
+        self.index_by = index_by
+        self.unique = unique
+        self.lock = threading.RLock()
+        self.flock = FileLock(path)
+        self.rows: dict[str, dict] = {}
+        self.index: dict[str, dict[str, dict[str, dict]]] = {f: {} for f in index_by}
+        self._sig = None
+        self._pending: list[dict] = []            # ops not yet handed to the writer
+        self._unflushed: list[list[dict]] = []    # committed groups not yet durable
+        self.writer = WriteCoordinator(
+            self._flush, settings.FILE_COMMIT_WINDOW_MS / 1000, path.name
+        )
+
+    # ── disk ↔ memory ──────────────────────────────────────────────────
+    def _signature(self):
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def fresh(self) -> bool:
+        """True while memory matches the file, i.e. a read needs no parse."""
+        return self._signature() == self._sig
+
+    def refresh(self) -> "_JsonTable":
+        """Re-read the file only if someone else changed it since our last look."""
+        if self._signature() == self._sig:
+            return self
+        with self.lock:
+            if self._signature() != self._sig:
+                with self.flock.shared():
+                    self._reload()
+        return self
+
+    def _reload(self, full: bool = False, skip: tuple[list[dict], ...] = ()) -> None:
+        """
+        Bring memory in line with disk, then re-apply our own committed but
+        not yet durable ops (minus ``skip``) on top.  Caller holds ``lock``
+        and a ``flock``.
+        """
+        sig = self._signature()
+        if full:
+            self._sig = None
+        self._load(sig)
+        self._sig = sig
+        for group in self._unflushed:
+            if not any(group is g for g in skip):
+                for op in group:
+                    self._apply(op)
+
+    def _load(self, sig) -> None:
+        self._reset(load_rows(self.path.read_bytes()) if sig else [])
+
+    def _reset(self, rows: list[dict]) -> None:
+        self.rows = {}
+        self.index = {f: {} for f in self.index_by}
+        for row in rows:
+            self._link(row)
+
+    def commit(self) -> Future:
+        """
+        Queue every mutation made since the last commit for the next group
+        write.  Call with ``lock`` held; wait on the result *after* releasing it.
+        """
+        ops, self._pending = self._pending, []
+        if not ops:
+            done: Future = Future()
+            done.set_result(0)
+            return done
+        self._unflushed.append(ops)
+        return self.writer.submit(ops)
+
+    def _flush(self, groups: list[list[dict]]) -> list[BaseException | None]:
+        with self.lock, self.flock.exclusive():
+            errors: list[BaseException | None] = [None] * len(groups)
+            try:
+                if self._signature() != self._sig:   # another worker wrote meanwhile
+                    errors = self._merge(groups)
+                self._persist([
+                    op for group, err in zip(groups, errors) if err is None for op in group
+                ])
+            except BaseException:
+                self._sig = None              # memory is ahead of disk: reload next time
+                raise
+            finally:
+                del self._unflushed[:len(groups)]
+            return errors
+
+    def _merge(self, groups: list[list[dict]]) -> list[BaseException | None]:
+        """
+        Rebase this batch onto what is on disk now.  Groups that would break a
+        ``unique`` field (e.g. a username registered by another worker) are
+        rejected individually; the rest of the batch still commits.
+        """
+        self._reload(full=True)
+        errors: list[BaseException | None] = []
+        for group in groups:
+            clash = any(
+                rid != op["row"]["id"]
+                for op in group if op["op"] == "put"
+                for f in self.unique
+                for rid in self.lookup(f, op["row"][f])
+            )
+            errors.append(ValueError("exists") if clash else None)
+        rejected = tuple(g for g, e in zip(groups, errors) if e is not None)
+        if rejected:
+            self._reload(full=True, skip=rejected)
+        return errors
+
+    def _persist(self, ops: list[dict]) -> None:
+        _atomic_write(self.path, get_serializer(settings.FILE_FORMAT).dumps(list(self.rows.values())))
+        self._sig = self._signature()
+
+    # ── row maintenance (caller holds self.lock) ───────────────────────
+    def _link(self, row: dict) -> None:
+        self.rows[row["id"]] = row
+        for f in self.index_by:
+            self.index[f].setdefault(row[f], {})[row["id"]] = row
+
+    def _unlink(self, row_id: str) -> dict | None:
+        row = self.rows.pop(row_id, None)
+        if row is not None:
+            for f in self.index_by:
+                bucket = self.index[f].get(row[f])
+                if bucket is not None:
+                    bucket.pop(row_id, None)
+                    if not bucket:
+                        del self.index[f][row[f]]
+        return row
+
+    def _apply(self, op: dict) -> None:
+        """Replay one journal operation (``put`` a row / ``del`` an id)."""
+        if op["op"] == "put":
+            self._unlink(op["row"]["id"])
+            self._link(op["row"])
+        elif op["op"] == "del":
+            self._unlink(op["id"])
+
+    def put(self, row: dict) -> None:
+        op = {"op": "put", "row": row}
+        self._apply(op)
+        self._pending.append(op)
+
+    def drop(self, row_id: str) -> dict | None:
+        row = self.rows.get(row_id)
+        if row is not None:
+            op = {"op": "del", "id": row_id}
+            self._apply(op)
+            self._pending.append(op)
+        return row
+
+    # ── lookups ────────────────────────────────────────────────────────
+    def get(self, row_id: str) -> dict | None:
+        return self.rows.get(row_id)
+
+    def lookup(self, field: str, value) -> dict[str, dict]:
+        return self.index[field].get(value, {})
+
+
+# One table per file for the whole process: FileRepo instances are cheap
+# handles, the parsed data and its indexes are shared between them.
+_tables: dict[Path, _JsonTable] = {}
+_tables_lock = threading.Lock()
+
+
+def _table(
+    cls: type[_JsonTable],
+    path: Path,
+    index_by: tuple[str, ...],
+    unique: tuple[str, ...] = (),
+) -> _JsonTable:
+    key = path.resolve()
+    with _tables_lock:
+        table = _tables.get(key)
+        if table is None:
+            table = _tables[key] = cls(path, index_by, unique)
+    return table.refresh()
+
+
+def _hex_fields(kdf_params: dict) -> dict:
+    # user rows keep key material as hex, like kdf_salt always was
+    return {k: v.hex() if isinstance(v, bytes) else v for k, v in kdf_params.items()}
+
+
 class FileRepo(UserRepository):
+    # storage engine for each JSON file (JournalRepo swaps in a log-structured one)
+    table_cls: type[_JsonTable] = _JsonTable
+
     def __init__(self, path: str | None = None):
-        self.path = Path(path or "./blockpass_users.json")
-        self._lock = threading.Lock()
+        self.path = Path(path or settings.FILE_PATH)
         if not self.path.exists():
             self.path.write_text("[]", encoding="utf-8")
 
+    # ───────────────────────── lifecycle ────────────────────────────────
+    def startup(self) -> None:
+        """Parse the files and build the indexes before the first request."""
+        self._users()
+        if settings.FILE_VAULT_LAYOUT != "sharded":   # shards load on first touch
+            _table(self.table_cls, self._load_items_path(), ("user_id",))
+
+    def shutdown(self) -> None:
+        """Wait for every queued group commit to reach the disk."""
+        with _tables_lock:
+            tables = list(_tables.values())
+        for table in tables:
+            table.writer.drain()
+
     # ───────────────────────── private helpers ──────────────────────────
-    def _load(self):
-        return json.loads(self.path.read_text(encoding="utf-8"))
+    def _users(self) -> _JsonTable:
+        return _table(self.table_cls, self.path, ("username",), unique=("username",))
+
+    def _items(self, user_id: str) -> _JsonTable:
+        return _table(self.table_cls, self._items_path(user_id), ("user_id",))
 
-    def _save(self, data):
-        self.path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    def _items_path(self, user_id: str) -> Path:
+        if settings.FILE_VAULT_LAYOUT == "sharded":
+            return self._shard_path(user_id)
+        return self._load_items_path()
+
+    def _is_resident(self, user_id: str | None = None) -> bool:
+        """
+        True when the users table (and ``user_id``'s vault table) is loaded
+        and unchanged on disk, so a read is a ``stat()`` plus a dict hit.
+        """
+        paths = [self.path]
+        if user_id is not None:
+            paths.append(self._items_path(user_id))
+        for path in paths:
+            table = _tables.get(path.resolve())
+            if table is None or not table.fresh():
+                return False
+        return True
 
     # ───────────────────────── UserRepository API ───────────────────────
     def create_user(
@@ -35,7 +303,7 @@ class FileRepo(UserRepository):
         hashed_pw: str,
         *,
         kdf_salt: bytes | None = None,
-        kdf_mem: int = 19 * 1024,  # KiB  ≈ 19 MiB
+        kdf_mem: int = 19 * 1024,  # KiB  ≈ 19 MiB
         kdf_time: int = 2,
         kdf_lanes: int = 1,
     ) -> dict:
@@ -43,9 +311,26 @@ class FileRepo(UserRepository):
         Create a user record with unique Argon2id parameters.
         The salt is stored as hex to keep JSON human‑readable.
         """
-        with self._lock:
-            data = self._load()
-            if any(u["username"] == username for u in data):
+        user, durable = self._stage_user(
+            username, hashed_pw, kdf_salt, kdf_mem, kdf_time, kdf_lanes
+        )
+        durable.result()
+        return user
+
+    def _stage_user(
+        self,
+        username: str,
+        hashed_pw: str,
+        kdf_salt: bytes | None,
+        kdf_mem: int,
+        kdf_time: int,
+        kdf_lanes: int,
+    ) -> tuple[dict, Future]:
+        """Apply the insert in memory; the future resolves once it is on disk."""
+        users = self._users()
+        with users.lock:
+            users.refresh()
+            if users.lookup("username", username):
                 raise ValueError("exists")
 
             if kdf_salt is None:
@@ -60,59 +345,213 @@ class FileRepo(UserRepository):
                 "kdf_mem": kdf_mem,
                 "kdf_time": kdf_time,
                 "kdf_lanes": kdf_lanes,
+                "vault_key": None,               # set on first unlock (app.core.rekey)
                 "created_at": datetime.datetime.utcnow().isoformat()
             }
-            data.append(user)
-            self._save(data)
-            # never return hashed pw or KDF salt to the caller
-            return {"id": user["id"], "username": user["username"]}
+            users.put(user)
+            durable = users.commit()
+        # never return hashed pw or KDF salt to the caller
+        return {"id": user["id"], "username": user["username"]}, durable
 
     def get_by_username(self, username: str) -> Optional[dict]:
-        return next((u for u in self._load() if u["username"] == username), None)
+        return next(iter(self._users().lookup("username", username).values()), None)
 
     def get_by_id(self, user_id: str) -> Optional[dict]:
-        return next((u for u in self._load() if u["id"] == user_id), None)
+        return self._users().get(user_id)
+
+    def rekey_user(
+        self, user_id: str, kdf_params: dict, blobs: dict[str, bytes], expected: bytes | None = None
+    ) -> bool:
+        """
+        New key material for ``user_id`` (Argon2id parameters and wrapped
+        ``vault_key``) plus every item re-encrypted under the new key
+        (``blobs``: item id → ciphertext).  False, and nothing written, if
+        the vault no longer holds exactly those items or the stored wrapped
+        key is no longer ``expected``.
+        Both files go out in the same group-commit round, but not
+        atomically: a crash between the two writes leaves them out of step.
+        """
+        staged = self._stage_rekey(user_id, kdf_params, blobs, expected)
+        for durable in staged or ():
+            durable.result()
+        return staged is not None
+
+    def _stage_rekey(
+        self, user_id: str, kdf_params: dict, blobs: dict[str, bytes], expected: bytes | None = None
+    ) -> tuple[Future, Future] | None:
+        items, users = self._items(user_id), self._users()
+        with items.lock, users.lock:
+            items.refresh()
+            users.refresh()
+            rows = list(items.lookup("user_id", user_id).values())
+            user = users.get(user_id)
+            if user is None or {r["id"] for r in rows} != blobs.keys():
+                return None
+            if user.get("vault_key") != (expected.hex() if expected else None):
+                return None
+            for row in rows:
+                items.put({**row, "data": blobs[row["id"]]})
+            users.put({**user, **_hex_fields(kdf_params)})
+            return items.commit(), users.commit()
+
+    def rewrap_user(self, user_id: str, kdf_params: dict, expected: bytes) -> bool:
+        """
+        New Argon2id parameters and the vault key wrapped under the new
+        password-derived key – a password change or KDF upgrade, no item
+        touched.  False if the stored wrapped key is no longer ``expected``
+        (a concurrent change won).
+        """
+        durable = self._stage_rewrap(user_id, kdf_params, expected)
+        if durable is not None:
+            durable.result()
+        return durable is not None
+
+    def _stage_rewrap(self, user_id: str, kdf_params: dict, expected: bytes) -> Future | None:
+        users = self._users()
+        with users.lock:
+            users.refresh()
+            user = users.get(user_id)
+            if user is None or user.get("vault_key") != expected.hex():
+                return None
+            users.put({**user, **_hex_fields(kdf_params)})
+            return users.commit()
 
     # ───────────────────────── Vault methods ────────────────────────────
     def _load_items_path(self) -> Path:
         # items live in a separate file beside the user DB
         return self.path.with_name("blockpass_vault.json")
 
-    def _load_items(self) -> list:
-        p = self._load_items_path()
-        if not p.exists():
-            p.write_text("[]", encoding="utf-8")
-        return [VaultModel(**i) for i in json.loads(p.read_text())]
-
-    def _save_items(self, items: list):
-        p = self._load_items_path()
-        p.write_text(json.dumps([i.dict() for i in items], indent=2))
-
-    def create_item(self, user_id: str, title: str, ciphertext: str) -> VaultModel:
-        """ciphertext is the JSON blob returned by app.core.encryption.encrypt()"""
-        items = self._load_items()
-        new = VaultModel(
-            id=uuid.uuid4().hex,
-            user_id=user_id,
-            title=title,
-            data=ciphertext,
-            created_at=datetime.datetime.utcnow()
-        )
-        items.append(new)
-        self._save_items(items)
-        return new
+    def _shard_path(self, user_id: str) -> Path:
+        """
+        Sharded layout: one file per user, spread over 256 hash buckets
+        (``vault/<2 hex>/<user_id>.json``) so no directory gets huge.
+        """
+        user_id = str(user_id)
+        if not user_id.replace("-", "").isalnum():
+            raise ValueError(f"invalid user id: {user_id!r}")
+        bucket = hashlib.sha1(user_id.encode()).hexdigest()[:2]
+        return self.path.parent / "vault" / bucket / f"{user_id}.json"
 
-    def list_items(self, user_id: str) -> List[VaultModel]:
-        return [i for i in self._load_items() if i.user_id == user_id]
+    def create_item(self, user_id: str, title: str, ciphertext: bytes) -> VaultRecord:
+        """ciphertext is the envelope returned by app.core.encryption.encrypt()"""
+        record, durable = self._stage_item(user_id, title, ciphertext)
+        durable.result()
+        return record
+
+    def _stage_item(self, user_id: str, title: str, ciphertext: bytes) -> tuple[VaultRecord, Future]:
+        row = {
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "title": title,
+            "data": ciphertext,
+            "created_at": datetime.datetime.utcnow().isoformat(),
+        }
+        items = self._items(user_id)
+        with items.lock:
+            items.refresh()
+            items.put(row)
+            durable = items.commit()
+        return VaultRecord.from_row(row), durable
+
+    def list_items(self, user_id: str) -> List[VaultRecord]:
+        items = self._items(user_id).lookup("user_id", user_id)
+        return [VaultRecord.from_row(r) for r in items.values()]
+
+    def list_item_meta(
+        self, user_id: str, limit: int = 50, after: str | None = None
+    ) -> tuple[List[VaultMeta], str | None]:
+        """Same contract as ``PostgresRepo.list_item_meta``: newest first, keyset cursor."""
+        rows = self._items(user_id).lookup("user_id", user_id).values()
+        if after is not None:
+            created, item_id = decode_cursor(after)
+            mark = (created.isoformat(), item_id)
+            rows = [r for r in rows if (r["created_at"], r["id"]) < mark]
+        top = heapq.nlargest(limit + 1, rows, key=lambda r: (r["created_at"], r["id"]))
+        return make_page([VaultMeta.from_row(r) for r in top], limit)
+
+    def get_item(self, user_id: str, item_id: str) -> Optional[VaultRecord]:
+        row = self._items(user_id).get(item_id)
+        if row is None or row["user_id"] != user_id:
+            return None
+        return VaultRecord.from_row(row)
+
+    def get_items(self, user_id: str, item_ids: List[str]) -> List[VaultRecord]:
+        """The given items that exist and belong to ``user_id``, in any order."""
+        table = self._items(user_id)
+        rows = (table.get(i) for i in item_ids)
+        return [VaultRecord.from_row(r) for r in rows if r is not None and r["user_id"] == user_id]
 
-    def get_item(self, user_id: str, item_id: str) -> Optional[VaultModel]:
-        return next(
-            (i for i in self._load_items() if i.user_id == user_id and i.id == item_id),
-            None
-        )
-    
     def delete_item(self, user_id: str, item_id: str) -> None:
-        items = self._load_items()
-        filtered = [i for i in items if not (i.user_id == user_id and i.id == item_id)]
-        self._save_items(filtered)
+        self._stage_delete(user_id, item_id).result()
+
+    def _stage_delete(self, user_id: str, item_id: str) -> Future:
+        items = self._items(user_id)
+        with items.lock:
+            items.refresh()
+            row = items.get(item_id)
+            if row is not None and row["user_id"] == user_id:
+                items.drop(item_id)
+            return items.commit()             # nothing staged → already resolved
+
+    # ───────────────────────── bulk transfer (app.repository.bulk) ──────
+    def export_items(self, user_id: str) -> Iterator[VaultRecord]:
+        for row in self._export_rows(user_id):
+            yield VaultRecord.from_row(row)
 
+    def _export_rows(self, user_id: str) -> list[dict]:
+        """Oldest first.  Rows are already resident; only references are copied."""
+        return sorted(
+            self._items(user_id).lookup("user_id", user_id).values(),
+            key=lambda r: (r["created_at"], r["id"]),
+        )
+
+    def import_items(self, user_id: str, items: Iterable[dict]) -> int:
+        """
+        Stage every batch, then wait once: the write coordinator folds the
+        queued batches into as few file writes as it can.
+        """
+        pending: list[Future] = []
+        n = 0
+        for batch in batched(items):
+            pending.append(self._stage_import(user_id, batch))
+            n += len(batch)
+        for durable in pending:
+            durable.result()
+        return n
+
+    def _stage_import(self, user_id: str, batch: list[dict]) -> Future:
+        items = self._items(user_id)
+        with items.lock:
+            items.refresh()
+            for item in batch:
+                items.put({
+                    "id": uuid.uuid4().hex,
+                    "user_id": user_id,
+                    "title": item["title"],
+                    "data": item["data"],
+                    "created_at": naive_utc(item["created_at"]).isoformat(),
+                })
+            return items.commit()
+
+    # ───────────────────────── maintenance (app.core.repack) ────────────
+    def user_ids(self) -> Iterator[str]:
+        return iter(list(self._users().rows))
+
+    def swap_item_data(self, user_id: str, swaps: dict[str, tuple]) -> int:
+        """
+        ``swaps``: item id → (expected data, new data).  Only items that
+        still hold the expected value are written, so a concurrent re-key
+        or delete wins.  Returns how many were written.
+        """
+        items = self._items(user_id)
+        with items.lock:
+            items.refresh()
+            n = 0
+            for item_id, (old, new) in swaps.items():
+                row = items.get(item_id)
+                if row is not None and row["user_id"] == user_id and row["data"] == old:
+                    items.put({**row, "data": new})
+                    n += 1
+            durable = items.commit()
+        durable.result()
+        return n
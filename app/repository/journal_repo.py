@@ -0,0 +1,142 @@
+# app/repository/journal_repo.py
+"""
+Log-structured variant of the file backend (DB_BACKEND=journal).
+
+Each JSON file (``blockpass_users.json`` / ``blockpass_vault.json``) becomes
+a *snapshot*; mutations are appended as JSON lines to ``<file>.log`` next to
+it, so a write costs O(size of the change) instead of O(size of the vault).
+Reads replay snapshot + log once and then only tail new log lines.  When the
+log grows past ``Settings.JOURNAL_COMPACT_BYTES`` a background thread folds
+it into a fresh snapshot.
+
+Journal ops are idempotent (``put`` a whole row / ``del`` an id), so a crash
+between "snapshot replaced" and "log truncated" only replays ops twice.
+Appends and compaction hold the table's exclusive ``flock``, so several
+worker processes can share one journal.
+"""
+import os
+import threading
+from pathlib import Path
+
+from app.core.config import get_settings
+from app.repository.file_repo import FileRepo, _JsonTable, _atomic_write
+from app.repository.serializers import get_serializer, json_dumps, json_loads, load_rows
+
+settings = get_settings()
+
+
+def _fold(snapshot: Path, log: Path) -> list[dict]:
+    """Snapshot + every complete log line, straight from disk."""
+    rows = {r["id"]: r for r in (load_rows(snapshot.read_bytes()) if snapshot.exists() else [])}
+    data = log.read_bytes() if log.exists() else b""
+    for line in data[: data.rfind(b"\n") + 1].splitlines():
+        if not line.strip():
+            continue
+        op = json_loads(line)
+        if op["op"] == "put":
+            rows[op["row"]["id"]] = op["row"]
+        elif op["op"] == "del":
+            rows.pop(op["id"], None)
+    return list(rows.values())
+
+
+class _JournalTable(_JsonTable):
+    def __init__(self, path: Path, index_by: tuple[str, ...] = (), unique: tuple[str, ...] = ()):
+        super().__init__(path, index_by, unique)
+        self.log_path = path.with_name(path.name + ".log")
+        self._log_offset = 0              # bytes of the log already applied
+        self._compacting = False
+        if not self.log_path.exists():
+            self._migrate()
+
+    @staticmethod
+    def _snapshot_format():
+        # snapshots are never hand-edited, so "json" means compact orjson here
+        fmt = settings.FILE_FORMAT
+        return get_serializer("orjson" if fmt == "json" else fmt)
+
+    def _migrate(self) -> None:
+        """First start on a plain JSON file: rewrite it compactly as snapshot #0."""
+        with self.flock.exclusive():
+            if self.log_path.exists():            # another worker got here first
+                return
+            rows = load_rows(self.path.read_bytes()) if self.path.exists() else []
+            _atomic_write(self.path, self._snapshot_format().dumps(rows))
+            self.log_path.touch()
+
+    # ── disk ↔ memory ──────────────────────────────────────────────────
+    def _signature(self):
+        def stat(p: Path):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                return None
+            return st.st_ino, st.st_mtime_ns, st.st_size
+        return stat(self.path), stat(self.log_path)
+
+    def _load(self, sig) -> None:
+        snap_sig, log_sig = sig
+        old = self._sig or (None, None)
+        # same snapshot and the same log file that only grew → just tail it
+        tail_only = (
+            self._sig is not None
+            and snap_sig == old[0]
+            and log_sig is not None and old[1] is not None
+            and log_sig[0] == old[1][0]
+            and log_sig[2] >= self._log_offset
+        )
+        if not tail_only:
+            super()._load(snap_sig)
+            self._log_offset = 0
+        self._replay()
+
+    def _replay(self) -> None:
+        try:
+            with open(self.log_path, "rb") as fh:
+                fh.seek(self._log_offset)
+                chunk = fh.read()
+        except FileNotFoundError:
+            return
+        # a torn final line (crash mid-append) is ignored; the next append cuts it off
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                self._apply(json_loads(line))
+        self._log_offset += end
+
+    def _persist(self, ops: list[dict]) -> None:
+        if not ops:
+            return
+        payload = b"".join(json_dumps(op) + b"\n" for op in ops)
+        with open(self.log_path, "ab") as fh:
+            if fh.tell() > self._log_offset:      # torn tail from a crashed append
+                fh.truncate(self._log_offset)
+            fh.write(payload)
+            fh.flush()
+            os.fsync(fh.fileno())
+        self._log_offset += len(payload)
+        self._sig = self._signature()
+        if self._log_offset >= settings.JOURNAL_COMPACT_BYTES and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    # ── compaction ─────────────────────────────────────────────────────
+    def compact(self) -> None:
+        """
+        Fold the log into a new snapshot.  Works from the files rather than
+        from memory (which may hold ops that are not durable yet) under the
+        exclusive flock, so it is safe with several workers; readers keep
+        serving from their resident copy meanwhile.
+        """
+        try:
+            with self.flock.exclusive():
+                rows = _fold(self.path, self.log_path)
+                _atomic_write(self.path, self._snapshot_format().dumps(rows))
+                _atomic_write(self.log_path, b"")
+        finally:
+            self._compacting = False
+
+
+class JournalRepo(FileRepo):
+    """FileRepo whose files are append-only journals over a compacted snapshot."""
+    table_cls = _JournalTable
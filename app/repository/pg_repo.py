@@ -1,22 +1,192 @@
 # app/repository/pg_repo.py
+import csv
 import datetime
+import io
 import uuid
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional
 
+from sqlalchemy import Select, Update, select, tuple_, update
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
+from app.database import SessionLocal, engine, recent_writes, replicas
+from app.database.instrumentation import record_statement
 from app.repository.base import UserRepository
 from app.models.user import User
 from app.models.vault import VaultItem as VaultModel
-from app.core import kdf                                 # ← NEW
+from app.repository.bulk import BATCH, batched
+from app.repository.records import VaultMeta, VaultRecord, decode_cursor, make_page
+from app.core import encryption, kdf
+
+
+# ─────────── statements shared with AsyncPostgresRepo (2.0 style) ───────────
+def select_user_by_name(username: str) -> Select:
+    return select(User).where(User.username == username)
+
+
+def select_items(user_id: str) -> Select:
+    return (
+        select(VaultModel)
+        .where(VaultModel.user_id == int(user_id))
+        .order_by(VaultModel.created_at.desc())
+    )
+
+
+def select_item(user_id: str, item_id: str) -> Select:
+    return select(VaultModel).where(
+        VaultModel.user_id == int(user_id), VaultModel.id == item_id
+    )
+
+
+def select_items_by_id(user_id: str, item_ids: List[str]) -> Select:
+    return select(VaultModel).where(
+        VaultModel.user_id == int(user_id), VaultModel.id.in_(item_ids)
+    )
+
+
+def select_item_meta(user_id: str, limit: int, after: str | None = None) -> Select:
+    """
+    One page of listing columns – never ``data`` – newest first.  Keyset
+    pagination on ``(created_at, id)`` walks ``ix_vault_items_user_created``
+    backwards, so page N costs the same as page 1.
+    """
+    stmt = (
+        select(VaultModel.id, VaultModel.title, VaultModel.created_at)
+        .where(VaultModel.user_id == int(user_id))
+        .order_by(VaultModel.created_at.desc(), VaultModel.id.desc())
+        .limit(limit + 1)                          # +1: is there a next page?
+    )
+    if after is not None:
+        created, item_id = decode_cursor(after)
+        stmt = stmt.where(
+            tuple_(VaultModel.created_at, VaultModel.id) < tuple_(created, item_id)
+        )
+    return stmt
+
+
+def select_export(user_id: str) -> Select:
+    return (
+        select(VaultModel.id, VaultModel.user_id, VaultModel.title,
+               VaultModel.data, VaultModel.created_at)
+        .where(VaultModel.user_id == int(user_id))
+        .order_by(VaultModel.created_at, VaultModel.id)
+    )
+
+
+def import_row(user_id: str, item: dict) -> dict:
+    """One ``vault_items`` row from a parsed NDJSON line (fresh id)."""
+    return {
+        "id": uuid.uuid4().hex,
+        "user_id": int(user_id),
+        "title": item["title"],
+        "data": encryption.to_bytes(item["data"]),
+        "created_at": item["created_at"],
+    }
+
+
+COPY_ITEMS = (
+    "COPY vault_items (id, user_id, title, data, created_at) FROM STDIN WITH (FORMAT csv)"
+)
+
+
+def select_item_ids(user_id: str) -> Select:
+    return select(VaultModel.id).where(VaultModel.user_id == int(user_id))
+
+
+def rekey_rows(blobs: dict[str, bytes]) -> list[dict]:
+    """Parameters for an ORM bulk UPDATE by primary key."""
+    return [{"id": item_id, "data": blob} for item_id, blob in blobs.items()]
+
+
+def lock_user_key(user_id: str) -> Select:
+    return select(User.vault_key).where(User.id == int(user_id)).with_for_update()
+
+
+def share_user_row(user_id: str) -> Select:
+    """
+    FOR SHARE on the owner's row before adding items: concurrent inserts
+    go ahead together, but none lands inside a ``rekey_user`` transaction
+    (which holds FOR UPDATE) after it has listed the vault's items.
+    """
+    return select(User.id).where(User.id == int(user_id)).with_for_update(read=True)
+
+
+def rewrap_stmt(user_id: str, kdf_params: dict, expected: bytes) -> Update:
+    return (
+        update(User)
+        .where(User.id == int(user_id), User.vault_key == expected)
+        .values(**kdf_params)
+    )
+
+
+def user_to_dict(rec: User) -> dict:
+    return {
+        "id":         str(rec.id),
+        "username":   rec.username,
+        "password":   rec.password,
+        "kdf_salt":   rec.kdf_salt.hex(),
+        "kdf_mem":    rec.kdf_mem,
+        "kdf_time":   rec.kdf_time,
+        "kdf_lanes":  rec.kdf_lanes,
+        "vault_key":  rec.vault_key.hex() if rec.vault_key else None,
+    }
 
 
 class PostgresRepo(UserRepository):
+    def __init__(self, session: Session | None = None):
+        # set on the handles unit_of_work() hands out; None = session per call
+        self._shared = session
+        # the unit of work's replica session, opened on its first routed read
+        self._replica: Session | None = None
+        # users loaded in this unit of work (the session's identity map is
+        # weak, so a second get_by_id would otherwise query again)
+        self._users_seen: dict[str, dict | None] = {}
+
+    # ─────────────────── lifecycle ─────────────────────────────────────
+    def startup(self) -> None:
+        """Open the pool's first connection so the first request doesn't pay for it."""
+        with engine.connect():
+            pass
+
+    def shutdown(self) -> None:
+        for e in (engine, *replicas.engines):
+            e.dispose()
+
+    @contextmanager
+    def unit_of_work(self) -> Iterator["PostgresRepo"]:
+        """
+        One session – one connection checkout, one identity map – shared by
+        every call made through the yielded handle.
+        """
+        with SessionLocal() as db:
+            uow = type(self)(session=db)
+            try:
+                yield uow
+            finally:
+                if uow._replica is not None:
+                    uow._replica.close()
+
     # ─────────────────── internal ──────────────────────────────────────
-    def _session(self) -> Session:
-        """Return a new SQLAlchemy session."""
-        return SessionLocal()
+    @contextmanager
+    def _session(self, read_for: str | None = None) -> Iterator[Session]:
+        """
+        The unit of work's session, else a new one closed on exit.  A read
+        passes ``read_for`` (user id or username) and is served by a
+        replica unless that user wrote within the read-your-writes window.
+        """
+        if not replicas.serves(read_for, recent_writes):
+            if self._shared is not None:
+                yield self._shared
+            else:
+                with SessionLocal() as db:
+                    yield db
+        elif self._shared is not None:
+            if self._replica is None:
+                self._replica = SessionLocal(bind=replicas.pick())
+            yield self._replica
+        else:
+            with SessionLocal(bind=replicas.pick()) as db:
+                yield db
 
     # ─────────────────── user section ──────────────────────────────────
     def create_user(
@@ -37,7 +207,7 @@ class PostgresRepo(UserRepository):
             kdf_salt = kdf.generate_salt()
 
         with self._session() as db:
-            if db.query(User).filter_by(username=username).first():
+            if db.scalars(select_user_by_name(username)).first():
                 raise ValueError("exists")
 
             user = User(
@@ -51,91 +221,158 @@ class PostgresRepo(UserRepository):
             db.add(user)
             db.commit()
             db.refresh(user)
+            recent_writes.mark(str(user.id), username)
 
             return {"id": str(user.id), "username": user.username}
 
     def get_by_username(self, username: str) -> Optional[dict]:
-        with self._session() as db:
-            rec: User | None = db.query(User).filter_by(username=username).first()
-            if not rec:
-                return None
-            return {
-                "id":         str(rec.id),
-                "username":   rec.username,
-                "password":   rec.password,
-                "kdf_salt":   rec.kdf_salt.hex(),
-                "kdf_mem":    rec.kdf_mem,
-                "kdf_time":   rec.kdf_time,
-                "kdf_lanes":  rec.kdf_lanes,
-            }
+        with self._session(read_for=username) as db:
+            rec: User | None = db.scalars(select_user_by_name(username)).first()
+            return user_to_dict(rec) if rec else None
 
     def get_by_id(self, user_id: str) -> Optional[dict]:
-        with self._session() as db:
+        if user_id in self._users_seen:
+            return self._users_seen[user_id]
+        with self._session(read_for=user_id) as db:
             rec: User | None = db.get(User, int(user_id))
-            if not rec:
-                return None
-            return {
-                "id":         str(rec.id),
-                "username":   rec.username,
-                "password":   rec.password,
-                "kdf_salt":   rec.kdf_salt.hex(),
-                "kdf_mem":    rec.kdf_mem,
-                "kdf_time":   rec.kdf_time,
-                "kdf_lanes":  rec.kdf_lanes,
-            }
+            user = user_to_dict(rec) if rec else None
+        if self._shared is not None:
+            self._users_seen[user_id] = user
+        return user
+
+    def rekey_user(
+        self, user_id: str, kdf_params: dict, blobs: dict[str, bytes], expected: bytes | None = None
+    ) -> bool:
+        """See ``FileRepo.rekey_user`` – here one transaction, user row locked."""
+        with self._session() as db:
+            stored = db.scalar(lock_user_key(user_id))
+            if stored != expected or set(db.scalars(select_item_ids(user_id))) != blobs.keys():
+                db.rollback()
+                return False
+            if blobs:
+                db.execute(update(VaultModel), rekey_rows(blobs))
+            db.execute(update(User).where(User.id == int(user_id)).values(**kdf_params))
+            db.commit()
+        self._users_seen.pop(user_id, None)
+        recent_writes.mark(str(user_id))
+        return True
+
+    def rewrap_user(self, user_id: str, kdf_params: dict, expected: bytes) -> bool:
+        """See ``FileRepo.rewrap_user`` – a single conditional UPDATE."""
+        with self._session() as db:
+            done = db.execute(rewrap_stmt(user_id, kdf_params, expected)).rowcount == 1
+            db.commit()
+        self._users_seen.pop(user_id, None)
+        recent_writes.mark(str(user_id))
+        return done
 
     # ─────────────────── vault‑item section ────────────────────────────
     def create_item(
         self,
         user_id: str,
         title: str,
-        ciphertext: str,          # AES‑GCM blob as JSON string
+        ciphertext: bytes,        # AES‑GCM envelope (app.core.encryption)
     ) -> VaultModel:
         with self._session() as db:
+            db.execute(share_user_row(user_id))
             new = VaultModel(
             id=uuid.uuid4().hex,
             user_id=int(user_id),
             title=title,
-            # JSON string → UTF-8 bytes for LargeBinary column
-            data=ciphertext.encode("utf-8"),
+            data=ciphertext,
             created_at=datetime.datetime.utcnow(),
         )
             db.add(new)
             db.commit()
             db.refresh(new)
+            recent_writes.mark(str(user_id))
             return new
 
     def list_items(self, user_id: str) -> List[VaultModel]:
-        with self._session() as db:
-            return (
-                db.query(VaultModel)
-                .filter_by(user_id=int(user_id))
-                .order_by(VaultModel.created_at.desc())
-                .all()
-            )
+        with self._session(read_for=user_id) as db:
+            return db.scalars(select_items(user_id)).all()
+
+    def list_item_meta(
+        self, user_id: str, limit: int = 50, after: str | None = None
+    ) -> tuple[List[VaultMeta], str | None]:
+        """(page, cursor of the next page or None)"""
+        with self._session(read_for=user_id) as db:
+            rows = db.execute(select_item_meta(user_id, limit, after)).all()
+        return make_page([VaultMeta(*r) for r in rows], limit)
 
     def get_item(self, user_id: str, item_id: str) -> Optional[VaultModel]:
-        with self._session() as db:
-            return (
-                db.query(VaultModel)
-                .filter_by(user_id=int(user_id), id=item_id)
-                .first()
-            )
+        with self._session(read_for=user_id) as db:
+            return db.scalars(select_item(user_id, item_id)).first()
         
 
+    def get_items(self, user_id: str, item_ids: List[str]) -> List[VaultModel]:
+        """The given items that exist and belong to ``user_id`` – one query."""
+        with self._session(read_for=user_id) as db:
+            return db.scalars(select_items_by_id(user_id, item_ids)).all()
+
         # ─────────────────── vault-item deletion ─────────────────────────────
     def delete_item(self, user_id: str, item_id: str) -> None:
         """
         Delete the vault item with that id for the given user.
         """
         with self._session() as db:
-            obj = (
-                db.query(VaultModel)
-                  .filter_by(user_id=int(user_id), id=item_id)
-                  .first()
-            )
+            obj = db.scalars(select_item(user_id, item_id)).first()
             if not obj:
                 return  # or raise ValueError("Not found")
             db.delete(obj)
             db.commit()
+            recent_writes.mark(str(user_id))
+
+    # ─────────────────── bulk transfer (app.repository.bulk) ───────────
+    def export_items(self, user_id: str) -> Iterator[VaultRecord]:
+        """Oldest first, through a server-side cursor: BATCH rows in memory at a time."""
+        bind = replicas.pick() if replicas.serves(user_id, recent_writes) else engine
+        with SessionLocal(bind=bind) as db:
+            result = db.execute(select_export(user_id).execution_options(yield_per=BATCH))
+            for row in result:
+                yield VaultRecord(row.id, str(row.user_id), row.title, row.data, row.created_at)
 
+    def import_items(self, user_id: str, items: Iterable[dict]) -> int:
+        """
+        COPY … FROM STDIN per batch through psycopg2's ``copy_expert``, in
+        one transaction: all or nothing.  CSV with every field quoted (an
+        unquoted empty title would read as NULL), ``data`` in bytea hex form.
+        """
+        n = 0
+        with self._session() as db:
+            db.execute(share_user_row(user_id))
+            cursor = db.connection().connection.dbapi_connection.cursor()    # psycopg2
+            for batch in batched(items):
+                buf = io.StringIO()
+                writer = csv.writer(buf, quoting=csv.QUOTE_ALL, lineterminator="\n")
+                for row in (import_row(user_id, i) for i in batch):
+                    writer.writerow((row["id"], row["user_id"], row["title"],
+                                     "\\x" + row["data"].hex(), row["created_at"].isoformat()))
+                buf.seek(0)
+                record_statement()
+                cursor.copy_expert(COPY_ITEMS, buf)
+                n += len(batch)
+            db.commit()
+        recent_writes.mark(str(user_id))
+        return n
+
+    # ─────────────────── maintenance (app.core.repack) ─────────────────
+    def user_ids(self) -> Iterator[str]:
+        with self._session() as db:
+            ids = db.scalars(select(User.id).order_by(User.id)).all()
+        return (str(i) for i in ids)
+
+    def swap_item_data(self, user_id: str, swaps: dict[str, tuple]) -> int:
+        """See ``FileRepo.swap_item_data`` – one transaction."""
+        n = 0
+        with self._session() as db:
+            for item_id, (old, new) in swaps.items():
+                n += db.execute(
+                    update(VaultModel)
+                    .where(VaultModel.id == item_id, VaultModel.user_id == int(user_id),
+                           VaultModel.data == old)
+                    .values(data=new)
+                ).rowcount
+            db.commit()
+        recent_writes.mark(str(user_id))
+        return n
@@ -0,0 +1,134 @@
+# app/repository/records.py
+"""
+Plain value types the file backend hands out instead of ORM instances.
+
+A SQLAlchemy ``VaultItem`` carries instrumentation and an ``InstanceState``
+per object, which is pure overhead when the row never goes near a session.
+``VaultRecord`` exposes the same attributes (``id``, ``user_id``, ``title``,
+``data``, ``created_at``) so routes, schemas (``from_attributes``) and
+templates treat both alike.  ``VaultMeta`` is the listing row: no ciphertext.
+"""
+import base64
+import datetime
+
+
+class VaultRecord:
+    """Immutable, slotted vault row."""
+
+    __slots__ = ("id", "user_id", "title", "data", "created_at")
+
+    def __init__(self, id: str, user_id: str, title: str, data, created_at: datetime.datetime):
+        _set = object.__setattr__
+        _set(self, "id", id)
+        _set(self, "user_id", user_id)
+        _set(self, "title", title)
+        _set(self, "data", data)
+        _set(self, "created_at", created_at)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("VaultRecord is immutable")
+
+    __delattr__ = __setattr__
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, VaultRecord):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __repr__(self) -> str:
+        return f"VaultRecord(id={self.id!r}, user_id={self.user_id!r}, title={self.title!r})"
+
+    # ── conversions ────────────────────────────────────────────────────
+    @classmethod
+    def from_row(cls, row: dict) -> "VaultRecord":
+        created = row["created_at"]
+        if isinstance(created, str):
+            created = datetime.datetime.fromisoformat(created)
+        return cls(row["id"], row["user_id"], row["title"], row["data"], created)
+
+    def to_row(self) -> dict:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "title": self.title,
+            "data": self.data,
+            "created_at": self.created_at.isoformat(),
+        }
+
+    def to_model(self):
+        """Build the SQLAlchemy ``VaultItem`` – only for code that hands it to a session."""
+        from app.models.vault import VaultItem
+
+        return VaultItem(
+            id=self.id,
+            user_id=self.user_id,
+            title=self.title,
+            data=self.data,
+            created_at=self.created_at,
+        )
+
+
+class VaultMeta:
+    """What a listing shows – ``id``, ``title``, ``created_at`` – and nothing else."""
+
+    __slots__ = ("id", "title", "created_at")
+
+    def __init__(self, id: str, title: str, created_at: datetime.datetime):
+        _set = object.__setattr__
+        _set(self, "id", id)
+        _set(self, "title", title)
+        _set(self, "created_at", created_at)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("VaultMeta is immutable")
+
+    __delattr__ = __setattr__
+
+    def __repr__(self) -> str:
+        return f"VaultMeta(id={self.id!r}, title={self.title!r})"
+
+    @classmethod
+    def from_row(cls, row: dict) -> "VaultMeta":
+        created = row["created_at"]
+        if isinstance(created, str):
+            created = datetime.datetime.fromisoformat(created)
+        return cls(row["id"], row["title"], created)
+
+
+# ── keyset pagination: newest first, ordered by (created_at, id) ──────
+def naive_utc(value: datetime.datetime) -> datetime.datetime:
+    """
+    ``created_at`` as the file and SQLite backends store it: naive UTC,
+    like ``utcnow()``.  Their ordering compares the text form, so an
+    imported ``…+02:00`` value must not be stored as it is.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def encode_cursor(item: VaultMeta) -> str:
+    """Opaque "continue after this item" token."""
+    raw = f"{item.created_at.isoformat()}|{item.id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, str]:
+    """Inverse of ``encode_cursor``; ``ValueError`` if it was tampered with."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created, item_id = raw.split("|", 1)
+        return datetime.datetime.fromisoformat(created), item_id
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def make_page(items: list[VaultMeta], limit: int) -> tuple[list[VaultMeta], str | None]:
+    """``items`` holds up to ``limit + 1`` rows; the extra one only signals a next page."""
+    if len(items) > limit:
+        items = items[:limit]
+        return items, encode_cursor(items[-1])
+    return items, None
@@ -0,0 +1,262 @@
+# app/repository/serializers.py
+"""
+On-disk formats for the file backends.
+
+  json    – stdlib ``json`` with ``indent=2``; human-readable (the default)
+  orjson  – compact JSON through ``orjson``; same format, several times faster
+  binary  – ``BPK1`` magic, u32 record count, then u32-length-prefixed
+            blocks, each a msgpack array of up to ``BLOCK`` row maps;
+            smallest on disk, keeps ``bytes`` raw, and a block is decoded in
+            one C call instead of a Python loop per row
+
+The JSON formats write ``bytes`` values (encrypted vault items) as base64
+text; ``app.core.encryption`` reads either form.
+
+Readers never need to be told the format: ``detect()`` looks at the first
+bytes, so ``FILE_FORMAT`` can be changed at any time and files are converted
+the next time they are written.  ``msgpack``/``orjson`` are used when
+installed; otherwise a pure-Python fallback produces the identical bytes.
+"""
+import base64
+import json
+import struct
+from typing import Any
+
+try:
+    import orjson
+except ImportError:                                   # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:                                   # pragma: no cover
+    msgpack = None
+
+
+def _text(obj: Any) -> str:
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return base64.b64encode(obj).decode("ascii")
+    raise TypeError(f"cannot serialise {type(obj).__name__}")
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Compact JSON bytes (orjson when available) – also used for journal lines."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_text)
+    return json.dumps(obj, separators=(",", ":"), default=_text).encode("utf-8")
+
+
+def json_loads(data: bytes | str) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class Serializer:
+    name = ""
+
+    def dumps(self, rows: list[dict]) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> list[dict]:
+        raise NotImplementedError
+
+
+class JsonSerializer(Serializer):
+    name = "json"
+
+    def dumps(self, rows: list[dict]) -> bytes:
+        return json.dumps(rows, indent=2, default=_text).encode("utf-8")
+
+    def loads(self, data: bytes) -> list[dict]:
+        return json_loads(data)
+
+
+class OrjsonSerializer(JsonSerializer):
+    name = "orjson"
+
+    def dumps(self, rows: list[dict]) -> bytes:
+        return json_dumps(rows)
+
+
+class BinarySerializer(Serializer):
+    name = "binary"
+    MAGIC = b"BPK1"
+    BLOCK = 4096
+
+    def dumps(self, rows: list[dict]) -> bytes:
+        pack = msgpack.packb if msgpack is not None else _pack
+        out = [self.MAGIC, struct.pack(">I", len(rows))]
+        for start in range(0, len(rows), self.BLOCK):
+            block = pack(rows[start:start + self.BLOCK])
+            out.append(struct.pack(">I", len(block)))
+            out.append(block)
+        return b"".join(out)
+
+    def loads(self, data: bytes) -> list[dict]:
+        if data[:4] != self.MAGIC:
+            raise ValueError("not a BPK1 file")
+        (count,) = struct.unpack_from(">I", data, 4)
+        rows: list[dict] = []
+        pos = 8
+        while len(rows) < count:
+            (size,) = struct.unpack_from(">I", data, pos)
+            pos += 4
+            block = data[pos:pos + size]
+            if msgpack is not None:
+                rows.extend(msgpack.unpackb(block, raw=False))
+            else:
+                rows.extend(_Unpacker(block).read())
+            pos += size
+        return rows
+
+
+_SERIALIZERS: dict[str, Serializer] = {
+    s.name: s for s in (JsonSerializer(), OrjsonSerializer(), BinarySerializer())
+}
+
+
+def get_serializer(name: str) -> Serializer:
+    try:
+        return _SERIALIZERS[name.lower()]
+    except KeyError:
+        raise RuntimeError(f"Unsupported FILE_FORMAT: {name}") from None
+
+
+def detect(data: bytes) -> Serializer:
+    """Pick the reader for ``data`` from its leading bytes."""
+    if data[:4] == BinarySerializer.MAGIC:
+        return _SERIALIZERS["binary"]
+    return _SERIALIZERS["json"]
+
+
+def load_rows(data: bytes) -> list[dict]:
+    return detect(data).loads(data) if data.strip() else []
+
+
+# ── pure-Python msgpack subset (fallback when the C extension is missing) ──
+def _pack(obj: Any) -> bytes:
+    out = bytearray()
+    _pack_into(obj, out)
+    return bytes(out)
+
+
+def _pack_into(obj: Any, out: bytearray) -> None:
+    if obj is None:
+        out.append(0xC0)
+    elif obj is True:
+        out.append(0xC3)
+    elif obj is False:
+        out.append(0xC2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xFF)
+        elif obj >= 0:
+            for tag, fmt, limit in ((0xCC, ">B", 8), (0xCD, ">H", 16), (0xCE, ">I", 32), (0xCF, ">Q", 64)):
+                if obj < 1 << limit:
+                    out += bytes((tag,)) + struct.pack(fmt, obj)
+                    break
+        else:
+            for tag, fmt, limit in ((0xD0, ">b", 7), (0xD1, ">h", 15), (0xD2, ">i", 31), (0xD3, ">q", 63)):
+                if obj >= -(1 << limit):
+                    out += bytes((tag,)) + struct.pack(fmt, obj)
+                    break
+    elif isinstance(obj, float):
+        out += b"\xcb" + struct.pack(">d", obj)
+    elif isinstance(obj, str):
+        raw = obj.encode("utf-8")
+        n = len(raw)
+        if n < 32:
+            out.append(0xA0 | n)
+        elif n < 0x100:
+            out += b"\xd9" + struct.pack(">B", n)
+        elif n < 0x10000:
+            out += b"\xda" + struct.pack(">H", n)
+        else:
+            out += b"\xdb" + struct.pack(">I", n)
+        out += raw
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        raw = bytes(obj)
+        n = len(raw)
+        if n < 0x100:
+            out += b"\xc4" + struct.pack(">B", n)
+        elif n < 0x10000:
+            out += b"\xc5" + struct.pack(">H", n)
+        else:
+            out += b"\xc6" + struct.pack(">I", n)
+        out += raw
+    elif isinstance(obj, (list, tuple)):
+        n = len(obj)
+        if n < 16:
+            out.append(0x90 | n)
+        elif n < 0x10000:
+            out += b"\xdc" + struct.pack(">H", n)
+        else:
+            out += b"\xdd" + struct.pack(">I", n)
+        for item in obj:
+            _pack_into(item, out)
+    elif isinstance(obj, dict):
+        n = len(obj)
+        if n < 16:
+            out.append(0x80 | n)
+        elif n < 0x10000:
+            out += b"\xde" + struct.pack(">H", n)
+        else:
+            out += b"\xdf" + struct.pack(">I", n)
+        for k, v in obj.items():
+            _pack_into(k, out)
+            _pack_into(v, out)
+    else:
+        raise TypeError(f"cannot serialise {type(obj).__name__}")
+
+
+class _Unpacker:
+    _FIXED = {
+        0xCC: ">B", 0xCD: ">H", 0xCE: ">I", 0xCF: ">Q",
+        0xD0: ">b", 0xD1: ">h", 0xD2: ">i", 0xD3: ">q",
+        0xCA: ">f", 0xCB: ">d",
+    }
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def _take(self, n: int) -> bytes:
+        chunk = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return chunk
+
+    def _num(self, fmt: str):
+        (v,) = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return v
+
+    def read(self) -> Any:
+        b = self.data[self.pos]
+        self.pos += 1
+        if b < 0x80:
+            return b
+        if b >= 0xE0:
+            return b - 0x100
+        if 0xA0 <= b <= 0xBF:
+            return self._take(b & 0x1F).decode("utf-8")
+        if 0x90 <= b <= 0x9F:
+            return [self.read() for _ in range(b & 0x0F)]
+        if 0x80 <= b <= 0x8F:
+            return {self.read(): self.read() for _ in range(b & 0x0F)}
+        if b == 0xC0:
+            return None
+        if b in (0xC2, 0xC3):
+            return b == 0xC3
+        if b in self._FIXED:
+            return self._num(self._FIXED[b])
+        if b in (0xD9, 0xDA, 0xDB):
+            return self._take(self._num({0xD9: ">B", 0xDA: ">H", 0xDB: ">I"}[b])).decode("utf-8")
+        if b in (0xC4, 0xC5, 0xC6):
+            return self._take(self._num({0xC4: ">B", 0xC5: ">H", 0xC6: ">I"}[b]))
+        if b in (0xDC, 0xDD):
+            return [self.read() for _ in range(self._num(">H" if b == 0xDC else ">I"))]
+        if b in (0xDE, 0xDF):
+            n = self._num(">H" if b == 0xDE else ">I")
+            return {self.read(): self.read() for _ in range(n)}
+        raise ValueError(f"unsupported msgpack type byte 0x{b:02x}")
@@ -0,0 +1,55 @@
+# app/repository/shard_vault.py
+"""
+Offline migration: split ``blockpass_vault.json`` into per-user shards.
+
+Stop the API first, run
+
+    python -m app.repository.shard_vault [--users-file ./data/blockpass_users.json]
+
+then start it again with ``FILE_VAULT_LAYOUT=sharded``.  The original file
+is kept as ``blockpass_vault.json.pre-shard`` so the move can be undone.
+"""
+import argparse
+from collections import defaultdict
+
+from app.core.config import get_settings
+from app.repository.file_repo import FileRepo, _atomic_write
+from app.repository.serializers import get_serializer, load_rows
+
+
+def split_vault(users_file: str) -> dict[str, int]:
+    repo = FileRepo(users_file)
+    src = repo._load_items_path()
+    if not src.exists():
+        raise SystemExit(f"nothing to migrate: {src} does not exist")
+
+    fmt = get_serializer(get_settings().FILE_FORMAT)
+    by_user: dict[str, list[dict]] = defaultdict(list)
+    for row in load_rows(src.read_bytes()):
+        by_user[str(row["user_id"])].append(row)
+
+    for user_id, rows in by_user.items():
+        shard = repo._shard_path(user_id)
+        if shard.exists():                      # re-run after a partial migration
+            existing = {r["id"]: r for r in load_rows(shard.read_bytes())}
+            existing.update((r["id"], r) for r in rows)
+            rows = list(existing.values())
+        _atomic_write(shard, fmt.dumps(rows))
+
+    src.rename(src.with_name(src.name + ".pre-shard"))
+    return {u: len(r) for u, r in by_user.items()}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Split the file-backend vault into per-user shards.")
+    ap.add_argument("--users-file", default=get_settings().FILE_PATH,
+                    help="path of blockpass_users.json (shards go next to it)")
+    args = ap.parse_args()
+
+    counts = split_vault(args.users_file)
+    print(f"migrated {sum(counts.values())} items for {len(counts)} users")
+    print("now set FILE_VAULT_LAYOUT=sharded and restart the API")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+# app/repository/sqlite_repo.py
+"""
+SQLite backend for single-node deployments – no database server needed.
+
+Talks to ``sqlite3`` directly instead of through the ORM: a primary-key
+lookup is a few microseconds in SQLite and several hundred in a
+SQLAlchemy session, so the ORM would be nearly the whole cost.
+
+  * one connection per thread (``threading.local``), opened lazily with the
+    same pragmas as the engine – WAL, ``synchronous=NORMAL``, big cache;
+  * fixed SQL text, so every statement is compiled once per connection and
+    then served from ``sqlite3``'s statement cache (``cached_statements``);
+  * autocommit: each write is a single statement, hence its own transaction.
+
+The schema is still owned by ``app.database.migrations``; ``startup()``
+applies them (there is no separate container to run the CLI against).
+"""
+import datetime
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from app.core import encryption, kdf
+from app.core.config import get_settings
+from app.database import engine, migrations, sqlite_pragmas
+from app.database.instrumentation import record_statement
+from app.repository.async_thread_repo import ThreadedAsyncRepo
+from app.repository.base import UserRepository
+from app.repository.bulk import BATCH, batched
+from app.repository.file_lock import FileLock
+from app.repository.records import VaultMeta, VaultRecord, decode_cursor, make_page, naive_utc
+
+_USER_COLS = "id, username, password, kdf_salt, kdf_mem, kdf_time, kdf_lanes, vault_key"
+_ITEM_COLS = "id, user_id, title, data, created_at"
+
+
+_SET_KEYS = "UPDATE users SET kdf_salt = ?, kdf_mem = ?, kdf_time = ?, kdf_lanes = ?, vault_key = ?"
+
+
+def _key_values(kdf_params: dict) -> tuple:
+    return (kdf_params["kdf_salt"], kdf_params["kdf_mem"], kdf_params["kdf_time"],
+            kdf_params["kdf_lanes"], kdf_params["vault_key"])
+
+
+def _ts(value: datetime.datetime) -> str:
+    # the text layout SQLAlchemy's DateTime uses on SQLite, so both agree
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _user(row: tuple | None) -> Optional[dict]:
+    if row is None:
+        return None
+    return {
+        "id":         str(row[0]),
+        "username":   row[1],
+        "password":   row[2],
+        "kdf_salt":   bytes(row[3]).hex(),
+        "kdf_mem":    row[4],
+        "kdf_time":   row[5],
+        "kdf_lanes":  row[6],
+        "vault_key":  bytes(row[7]).hex() if row[7] else None,
+    }
+
+
+def _item(row: tuple) -> VaultRecord:
+    return VaultRecord(row[0], str(row[1]), row[2], row[3],
+                       datetime.datetime.fromisoformat(row[4]))
+
+
+class SqliteRepo(UserRepository):
+    def __init__(self, path: str | None = None):
+        self.path = path or get_settings().SQLITE_PATH
+        self._local = threading.local()
+        self._opened: list[sqlite3.Connection] = []
+        self._opened_lock = threading.Lock()
+
+    # ───────────────────────── lifecycle ────────────────────────────────
+    def startup(self) -> None:
+        # several uvicorn workers may start at once: migrate under a file lock
+        with FileLock(Path(self.path)).exclusive():
+            migrations.upgrade(engine)
+        self._conn()
+
+    def shutdown(self) -> None:
+        with self._opened_lock:
+            conns, self._opened = self._opened, []
+        for conn in conns:
+            conn.close()
+        self._local = threading.local()
+
+    # ───────────────────────── private helpers ──────────────────────────
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                isolation_level=None,          # autocommit
+                check_same_thread=False,       # only so shutdown() may close it
+                cached_statements=256,
+            )
+            sqlite_pragmas(conn)
+            self._local.conn = conn
+            with self._opened_lock:
+                self._opened.append(conn)
+        return conn
+
+    def _one(self, sql: str, params: tuple) -> tuple | None:
+        record_statement()
+        return self._conn().execute(sql, params).fetchone()
+
+    def _all(self, sql: str, params: tuple) -> list[tuple]:
+        record_statement()
+        return self._conn().execute(sql, params).fetchall()
+
+    def _run(self, sql: str, params: tuple) -> sqlite3.Cursor:
+        record_statement()
+        return self._conn().execute(sql, params)
+
+    # ───────────────────────── UserRepository API ───────────────────────
+    def create_user(
+        self,
+        username: str,
+        hashed_pw: str,
+        *,
+        kdf_salt: bytes | None = None,
+        kdf_mem: int = 19 * 1024,  # KiB ≈ 19 MiB
+        kdf_time: int = 2,
+        kdf_lanes: int = 1,
+    ) -> dict:
+        if kdf_salt is None:
+            kdf_salt = kdf.generate_salt()
+        try:
+            cur = self._run(
+                "INSERT INTO users (username, password, created_at, kdf_salt, kdf_mem, kdf_time, kdf_lanes)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (username, hashed_pw, _ts(datetime.datetime.utcnow()),
+                 kdf_salt, kdf_mem, kdf_time, kdf_lanes),
+            )
+        except sqlite3.IntegrityError:         # UNIQUE(username)
+            raise ValueError("exists") from None
+        return {"id": str(cur.lastrowid), "username": username}
+
+    def get_by_username(self, username: str) -> Optional[dict]:
+        return _user(self._one(f"SELECT {_USER_COLS} FROM users WHERE username = ?", (username,)))
+
+    def get_by_id(self, user_id: str) -> Optional[dict]:
+        return _user(self._one(f"SELECT {_USER_COLS} FROM users WHERE id = ?", (int(user_id),)))
+
+    def rekey_user(
+        self, user_id: str, kdf_params: dict, blobs: dict[str, bytes], expected: bytes | None = None
+    ) -> bool:
+        """See ``FileRepo.rekey_user`` – here one transaction."""
+        conn = self._conn()
+        uid = int(user_id)
+        record_statement()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ids = {r[0] for r in conn.execute("SELECT id FROM vault_items WHERE user_id = ?", (uid,))}
+            stored = conn.execute("SELECT vault_key FROM users WHERE id = ?", (uid,)).fetchone()
+            if ids != blobs.keys() or stored is None or stored[0] != expected:
+                conn.execute("ROLLBACK")
+                return False
+            conn.executemany(
+                "UPDATE vault_items SET data = ? WHERE id = ? AND user_id = ?",
+                [(blob, item_id, uid) for item_id, blob in blobs.items()],
+            )
+            conn.execute(_SET_KEYS + " WHERE id = ?", (*_key_values(kdf_params), uid))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return True
+
+    def rewrap_user(self, user_id: str, kdf_params: dict, expected: bytes) -> bool:
+        """See ``FileRepo.rewrap_user`` – a single conditional UPDATE."""
+        cur = self._run(_SET_KEYS + " WHERE id = ? AND vault_key = ?",
+                        (*_key_values(kdf_params), int(user_id), expected))
+        return cur.rowcount == 1
+
+    # ───────────────────────── Vault methods ────────────────────────────
+    def create_item(self, user_id: str, title: str, ciphertext: bytes) -> VaultRecord:
+        record = VaultRecord(uuid.uuid4().hex, str(user_id), title,
+                             ciphertext, datetime.datetime.utcnow())
+        self._run(
+            f"INSERT INTO vault_items ({_ITEM_COLS}) VALUES (?, ?, ?, ?, ?)",
+            (record.id, int(user_id), title, record.data, _ts(record.created_at)),
+        )
+        return record
+
+    def list_items(self, user_id: str) -> List[VaultRecord]:
+        rows = self._all(
+            f"SELECT {_ITEM_COLS} FROM vault_items WHERE user_id = ? ORDER BY created_at DESC",
+            (int(user_id),),
+        )
+        return [_item(r) for r in rows]
+
+    def list_item_meta(
+        self, user_id: str, limit: int = 50, after: str | None = None
+    ) -> tuple[List[VaultMeta], str | None]:
+        """Keyset page on ix_vault_items_user_created – see ``PostgresRepo.list_item_meta``."""
+        if after is None:
+            rows = self._all(
+                "SELECT id, title, created_at FROM vault_items WHERE user_id = ?"
+                " ORDER BY created_at DESC, id DESC LIMIT ?",
+                (int(user_id), limit + 1),
+            )
+        else:
+            created, item_id = decode_cursor(after)
+            rows = self._all(
+                "SELECT id, title, created_at FROM vault_items"
+                " WHERE user_id = ? AND (created_at, id) < (?, ?)"
+                " ORDER BY created_at DESC, id DESC LIMIT ?",
+                (int(user_id), _ts(created), item_id, limit + 1),
+            )
+        metas = [VaultMeta(r[0], r[1], datetime.datetime.fromisoformat(r[2])) for r in rows]
+        return make_page(metas, limit)
+
+    def get_item(self, user_id: str, item_id: str) -> Optional[VaultRecord]:
+        row = self._one(
+            f"SELECT {_ITEM_COLS} FROM vault_items WHERE id = ? AND user_id = ?",
+            (item_id, int(user_id)),
+        )
+        return _item(row) if row else None
+
+    def get_items(self, user_id: str, item_ids: List[str]) -> List[VaultRecord]:
+        """One ``IN (…)`` query per 500 ids – a handful of cached statement shapes."""
+        found: List[VaultRecord] = []
+        for chunk in batched(dict.fromkeys(item_ids), 500):
+            marks = ", ".join("?" * len(chunk))
+            rows = self._all(
+                f"SELECT {_ITEM_COLS} FROM vault_items WHERE user_id = ? AND id IN ({marks})",
+                (int(user_id), *chunk),
+            )
+            found.extend(_item(r) for r in rows)
+        return found
+
+    def delete_item(self, user_id: str, item_id: str) -> None:
+        self._run("DELETE FROM vault_items WHERE id = ? AND user_id = ?", (item_id, int(user_id)))
+
+    # ───────────────────────── bulk transfer (app.repository.bulk) ──────
+    def export_items(self, user_id: str) -> Iterator[VaultRecord]:
+        """Oldest first, BATCH rows per keyset query – safe to resume on another thread."""
+        uid = int(user_id)
+        rows = self._all(
+            f"SELECT {_ITEM_COLS} FROM vault_items WHERE user_id = ?"
+            " ORDER BY created_at, id LIMIT ?",
+            (uid, BATCH),
+        )
+        while rows:
+            yield from (_item(r) for r in rows)
+            last = rows[-1]
+            rows = self._all(
+                f"SELECT {_ITEM_COLS} FROM vault_items WHERE user_id = ?"
+                " AND (created_at, id) > (?, ?) ORDER BY created_at, id LIMIT ?",
+                (uid, last[4], last[0], BATCH),
+            )
+
+    def import_items(self, user_id: str, items: Iterable[dict]) -> int:
+        """One transaction and one ``executemany`` per batch."""
+        conn = self._conn()
+        n = 0
+        for batch in batched(items):
+            rows = [
+                (uuid.uuid4().hex, int(user_id), i["title"], encryption.to_bytes(i["data"]),
+                 _ts(naive_utc(i["created_at"])))
+                for i in batch
+            ]
+            record_statement()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    f"INSERT INTO vault_items ({_ITEM_COLS}) VALUES (?, ?, ?, ?, ?)", rows
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            n += len(rows)
+        return n
+
+    # ───────────────────────── maintenance (app.core.repack) ────────────
+    def user_ids(self) -> Iterator[str]:
+        return (str(r[0]) for r in self._all("SELECT id FROM users ORDER BY id", ()))
+
+    def swap_item_data(self, user_id: str, swaps: dict[str, tuple]) -> int:
+        """See ``FileRepo.swap_item_data`` – one transaction."""
+        conn = self._conn()
+        uid = int(user_id)
+        record_statement()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.executemany(
+                "UPDATE vault_items SET data = ? WHERE id = ? AND user_id = ? AND data = ?",
+                [(new, item_id, uid, old) for item_id, (old, new) in swaps.items()],
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return cur.rowcount
+
+
+class AsyncSqliteRepo(ThreadedAsyncRepo):
+    """
+    Reads run inline on the event loop: in WAL mode a reader never waits
+    for a lock and a lookup costs less than the hop to a worker thread.
+    Writes keep the thread hop – they may wait on ``busy_timeout`` or an
+    fsync during a checkpoint.
+    """
+
+    sync: SqliteRepo
+
+    async def get_by_username(self, username: str) -> Optional[dict]:
+        return self.sync.get_by_username(username)
+
+    async def get_by_id(self, user_id: str) -> Optional[dict]:
+        return self.sync.get_by_id(user_id)
+
+    async def list_items(self, user_id: str) -> List[VaultRecord]:
+        return self.sync.list_items(user_id)
+
+    async def list_item_meta(self, user_id: str, limit: int = 50, after: str | None = None):
+        return self.sync.list_item_meta(user_id, limit, after)
+
+    async def get_item(self, user_id: str, item_id: str) -> Optional[VaultRecord]:
+        return self.sync.get_item(user_id, item_id)
+
+    async def get_items(self, user_id: str, item_ids: List[str]) -> List[VaultRecord]:
+        return self.sync.get_items(user_id, item_ids)
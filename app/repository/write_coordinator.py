@@ -0,0 +1,76 @@
+# app/repository/write_coordinator.py
+"""
+Group commit for the file backends.
+
+Writers hand their journal ops to a ``WriteCoordinator`` and block on the
+returned future.  A single flusher thread per file waits ``window`` seconds
+after the first op arrives, so every write that lands in that window is made
+durable by one atomic rename-and-fsync instead of one full rewrite each.
+A future only resolves once its ops are on disk.  The flusher thread exits
+as soon as its queue is empty and is restarted by the next ``submit``.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+
+class WriteCoordinator:
+    def __init__(
+        self,
+        flush: Callable[[list[list[dict]]], Optional[list[Optional[BaseException]]]],
+        window: float,
+        name: str = "writer",
+    ):
+        """
+        ``flush`` receives the batch as one op-list per ``submit`` call and may
+        return a matching list of per-submit errors (``None`` = committed).
+        """
+        self._flush = flush
+        self._window = window
+        self._name = name
+        self._lock = threading.Lock()
+        self._queue: list[tuple[list[dict], Future]] = []
+        self._thread: threading.Thread | None = None
+
+    def submit(self, ops: list[dict]) -> Future:
+        """Queue ``ops`` for the next group commit; the future resolves once durable."""
+        fut: Future = Future()
+        with self._lock:
+            self._queue.append((ops, fut))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"group-commit:{self._name}", daemon=True
+                )
+                self._thread.start()
+        return fut
+
+    def drain(self) -> None:
+        """Block until everything queued so far is on disk (used at shutdown)."""
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _run(self) -> None:
+        # the thread only lives while there is work, so idle files cost nothing
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._thread = None
+                    return
+            if self._window:
+                time.sleep(self._window)          # let followers join this group
+            with self._lock:
+                batch, self._queue = self._queue, []
+            try:
+                errors = self._flush([group for group, _ in batch]) or [None] * len(batch)
+            except BaseException as exc:          # every waiter learns the write failed
+                for _, fut in batch:
+                    fut.set_exception(exc)
+            else:
+                for (_, fut), err in zip(batch, errors):
+                    if err is None:
+                        fut.set_result(len(batch))
+                    else:
+                        fut.set_exception(err)
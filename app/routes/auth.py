@@ -3,9 +3,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app.schemas.user import UserCreate, UserOut, Token
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import hash_password_async, verify_password_async, create_access_token
 from app.core import kdf                          # ← NEW
-from app.repository import pick_repo
+from app.repository import get_repo
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -16,23 +16,22 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
     status_code=status.HTTP_201_CREATED,
     summary="Create a new user",
 )
-def register(user: UserCreate):
+async def register(user: UserCreate, repo=Depends(get_repo)):
     """
     1.  Hash the password with bcrypt (login auth).
     2.  Generate a unique Argon2id salt for this user.
-    3.  Store salt + default KDF params in the user record.
+    3.  Store salt + the configured KDF params in the user record.
     """
-    repo = pick_repo()
 
-    pwd_hash = hash_password(user.password)     # bcrypt‑12
+    pwd_hash = await hash_password_async(user.password)   # bcrypt‑12
     salt     = kdf.generate_salt()              # 16‑byte random salt
 
     try:
-        new = repo.create_user(
+        new = await repo.create_user(
             username=user.username,
             hashed_pw=pwd_hash,
             kdf_salt=salt,                      # per‑user KDF info
-            # kdf_mem / time / lanes keep their defaults (19 MiB, 2, 1)
+            **kdf.current_params(),             # KDF_MEM_KIB / KDF_TIME / KDF_LANES
         )
     except ValueError:
         raise HTTPException(
@@ -47,14 +46,13 @@ def register(user: UserCreate):
     response_model=Token,
     summary="Obtain a JWT token",
 )
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), repo=Depends(get_repo)):
     """
     Login flow stays the same—bcrypt for authentication,
     Argon2id is only used later when encrypting/decrypting vault items.
     """
-    repo = pick_repo()
-    user = repo.get_by_username(form_data.username)
-    if not user or not verify_password(form_data.password, user["password"]):
+    user = await repo.get_by_username(form_data.username)
+    if not user or not await verify_password_async(form_data.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect username or password",
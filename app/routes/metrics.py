@@ -0,0 +1,22 @@
+# app/routes/metrics.py
+from fastapi import APIRouter
+
+from app.core.hashpool import pool as hash_pool
+from app.database.pool import pool_metrics
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/pool")
+async def pool():
+    """
+    Live state and cumulative checkout figures of every SQL connection
+    pool – empty on the file / journal / sqlite backends.
+    """
+    return {"pools": pool_metrics()}
+
+
+@router.get("/hashing")
+async def hashing():
+    """Argon2id / bcrypt executor: running, waiting and turned-away (503) calls."""
+    return hash_pool.stats()
@@ -1,15 +1,28 @@
 # app/routes/vault.py
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, List, Literal
+from urllib.parse import quote
+
+from cryptography.exceptions import InvalidTag
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from app.core import kdf, encryption
-from app.repository import pick_repo
-from app.routes.auth import login  # JWT dependency if you have one
-from typing import List
+from app.core import encryption, keycache, rekey
+from app.core.config import get_settings
+from app.core.auth import get_current_user
+from app.core.streaming import HEADER, StreamDecryptor, StreamEncryptor, parse_header, plaintext_size
+from app.repository import attachments, get_repo
+from app.repository.bulk import abatched, parse_stream, to_ndjson
+from app.repository.serializers import json_dumps
+from app.schemas.vault import VaultItemPage
 
 router = APIRouter(prefix="/vault", tags=["Vault"])
+log = logging.getLogger("blockpass.vault")
 
 class SecretIn(BaseModel):
-    master_password: str
+    master_password: str | None = None     # omit after POST /vault/session/unlock
     title: str
     secret_value: str
 
@@ -18,51 +31,313 @@ class SecretOut(BaseModel):
     title: str
     secret_value: str
 
+vault_locked = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Vault locked: send master_password or unlock via /vault/session/unlock",
+)
+wrong_master_password = HTTPException(status.HTTP_403_FORBIDDEN, "Wrong master password")
+
+
+class UnlockIn(BaseModel):
+    master_password: str
+
+
+@router.post("/session/unlock")
+async def unlock_vault(payload: UnlockIn, user=Depends(get_current_user), repo=Depends(get_repo)):
+    """
+    Derive the vault key once and cache it for this session (re-keying the
+    vault first if its KDF parameters are outdated).  The returned token
+    goes back as the ``X-Vault-Session`` header (also set as a cookie).
+    """
+    token = await keycache.unlock(repo, user, payload.master_password)
+    if token is None:
+        raise wrong_master_password
+    ttl = get_settings().KEY_CACHE_TTL_SECONDS
+    resp = JSONResponse({"vault_session": token, "expires_in": ttl})
+    resp.set_cookie(keycache.COOKIE, token, httponly=True, samesite="strict", max_age=ttl)
+    return resp
+
+
+@router.post("/session/lock", status_code=204)
+async def lock_vault(request: Request, user=Depends(get_current_user)):
+    keycache.cache.lock(keycache.session_token(request))
+    resp = Response(status_code=204)
+    resp.delete_cookie(keycache.COOKIE)
+    return resp
+
+
+class PasswordChangeIn(BaseModel):
+    master_password: str
+    new_master_password: str
+
+
+@router.post("/password/change", status_code=204)
+async def change_master_password(
+    payload: PasswordChangeIn, user=Depends(get_current_user), repo=Depends(get_repo)
+):
+    """
+    Re-wrap the vault key under the new master password – no item is
+    re-encrypted.  Every unlocked session of the user is locked.
+    """
+    vault_key = await keycache.open_vault(repo, user, payload.master_password)
+    if vault_key is None:
+        raise wrong_master_password
+    user = await repo.get_by_id(user["id"])      # opening may have just stored a new key
+    if not await rekey.set_master_password(repo, user, payload.new_master_password, vault_key):
+        raise HTTPException(status.HTTP_409_CONFLICT, "Master password changed concurrently, retry")
+    keycache.cache.lock_user(user["id"])
+    resp = Response(status_code=204)
+    resp.delete_cookie(keycache.COOKIE)
+    return resp
+
+
 @router.post("/", response_model=SecretOut, status_code=201)
-def create_secret(payload: SecretIn, user_id: str = Depends(login)):
-    repo = pick_repo()
-    user = repo.get_by_id(user_id)
-
-    if not user:
-        raise HTTPException(404, "User not found")
-
-    # 1) derive per‑user vault key
-    key = kdf.derive_key(
-        master_pwd=payload.master_password,
-        salt=bytes.fromhex(user["kdf_salt"]),
-        mem_kib=user["kdf_mem"],
-        time=user["kdf_time"],
-        lanes=user["kdf_lanes"],
-    )
+async def create_secret(
+    payload: SecretIn, request: Request, user=Depends(get_current_user), repo=Depends(get_repo)
+):
+    # 1) per‑user vault key: unlocked session, else derived from the payload
+    key = await keycache.user_key(request, repo, user, payload.master_password)
+    if key is None:
+        raise wrong_master_password if payload.master_password else vault_locked
 
     try:
         blob = encryption.encrypt(payload.secret_value, key)
     finally:
         del key  # secure wipe
 
-    item = repo.create_item(user_id, payload.title, blob)
+    item = await repo.create_item(user["id"], payload.title, blob)
     return {"id": item.id, "title": item.title, "secret_value": payload.secret_value}
 
 
+# two path segments: GET /vault/{item_id} is taken by the HTML router
+@router.get("/items/meta", response_model=VaultItemPage)
+async def list_secrets(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    user=Depends(get_current_user),
+    repo=Depends(get_repo),
+):
+    """One page of id/title/created_at, newest first; pass ``next_cursor`` back for the next."""
+    try:
+        items, next_cursor = await repo.list_item_meta(user["id"], limit=limit, after=cursor)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/bulk/export")
+async def export_secrets(user=Depends(get_current_user), repo=Depends(get_repo)):
+    """Every item, still encrypted, as NDJSON (oldest first) – streamed, not buffered."""
+    async def lines():
+        async for item in repo.export_items(user["id"]):
+            yield to_ndjson(item)
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="vault-{user["username"]}.ndjson"'},
+    )
+
+
+@router.post("/bulk/import")
+async def import_secrets(request: Request, user=Depends(get_current_user), repo=Depends(get_repo)):
+    """
+    NDJSON body in the export format; items get fresh ids.  All-or-nothing
+    on Postgres; the other backends keep the batches written before a bad line.
+    """
+    try:
+        n = await repo.import_items(user["id"], parse_stream(request.stream()))
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    return {"imported": n}
+
+
+REVEAL_MAX_IDS = 1000
+
+
+class BatchRevealIn(BaseModel):
+    master_password: str | None = None
+    ids: List[str] | Literal["all"]
+
+
+async def _in_order(item_ids: List[str], found: dict) -> AsyncIterator:
+    for item_id in dict.fromkeys(item_ids):
+        yield found.get(item_id, item_id)           # the bare id when missing
+
+
+def _reveal_lines(batch: list, key: bytes) -> bytes:
+    plaintexts = iter(encryption.decrypt_many(
+        [item.data for item in batch if not isinstance(item, str)], key, return_exceptions=True
+    ))
+    out = []
+    for item in batch:
+        if isinstance(item, str):
+            line = {"id": item, "error": "not found"}
+        else:
+            plaintext = next(plaintexts)
+            if isinstance(plaintext, Exception):
+                line = {"id": item.id, "title": item.title, "error": "decryption failed"}
+            else:
+                line = {"id": item.id, "title": item.title, "secret_value": plaintext}
+        out.append(json_dumps(line) + b"\n")
+    return b"".join(out)
+
+
+@router.post("/batch/reveal")
+async def reveal_secrets(
+    payload: BatchRevealIn, request: Request, user=Depends(get_current_user), repo=Depends(get_repo)
+):
+    """
+    Decrypt many items with one key derivation (none when unlocked).
+    ``ids`` is a list of item ids – fetched in one query, answered in that
+    order – or ``"all"`` for the whole vault, oldest first.  Streams one
+    NDJSON line per item: ``{"id", "title", "secret_value"}`` or
+    ``{"id", "error"}``.
+    """
+    if payload.ids != "all" and len(payload.ids) > REVEAL_MAX_IDS:
+        raise HTTPException(400, f'At most {REVEAL_MAX_IDS} ids per request; use "all"')
+    key = await keycache.user_key(request, repo, user, payload.master_password)
+    if key is None:
+        raise wrong_master_password if payload.master_password else vault_locked
+
+    if payload.ids == "all":
+        items = repo.export_items(user["id"])
+    else:
+        found = {item.id: item for item in await repo.get_items(user["id"], payload.ids)}
+        items = _in_order(payload.ids, found)
+
+    async def lines():
+        # AES-GCM for a few hundred items at a time, off the event loop
+        async for batch in abatched(items, 256):
+            yield await asyncio.to_thread(_reveal_lines, batch, key)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+# ── attachments: encrypted segment by segment (app.core.streaming) ─────
+ATTACHMENT_IO = 1 << 20                 # bytes per thread hop, either way
+
+
+def _attachment_aad(user_id: str, item_id: str) -> bytes:
+    # a file moved to another item (or user) no longer decrypts
+    return f"attachment|{user_id}|{item_id}".encode()
+
+
+async def _attachment_key(request: Request, repo, user: dict, item_id: str):
+    """The item (404 if not the user's) and the session's vault key (401 if locked)."""
+    item = await repo.get_item(user["id"], item_id)
+    if not item:
+        raise HTTPException(404, "Secret not found")
+    key = keycache.cache.get(user["id"], keycache.session_token(request))
+    if key is None:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Vault locked: unlock via /vault/session/unlock")
+    return item, key
+
+
+@router.put("/items/{item_id}/attachment", status_code=204)
+async def upload_attachment(
+    item_id: str, request: Request, user=Depends(get_current_user), repo=Depends(get_repo)
+):
+    """
+    Attach a file (the raw request body) to an item, replacing any earlier
+    one.  It is encrypted as it arrives, so memory use does not depend on
+    its size.  Needs an unlocked session – there is no body left to carry
+    a master password.
+    """
+    _, key = await _attachment_key(request, repo, user, item_id)
+    limit = get_settings().ATTACHMENT_MAX_MB * 2**20
+    enc = StreamEncryptor(key, _attachment_aad(user["id"], item_id))
+    upload = await asyncio.to_thread(attachments.store.begin, user["id"], item_id)
+    try:
+        received, pending = 0, []
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > limit:
+                raise HTTPException(413, f"Attachments are limited to {limit // 2**20} MiB")
+            pending.append(chunk)
+            if sum(map(len, pending)) >= ATTACHMENT_IO:
+                data, pending = b"".join(pending), []
+                await asyncio.to_thread(lambda: upload.write(enc.update(data)))
+        data = b"".join(pending)
+        await asyncio.to_thread(lambda: upload.commit(enc.update(data) + enc.finalize()))
+    except BaseException:
+        await asyncio.to_thread(upload.abort)
+        raise
+    return Response(status_code=204)
+
+
+def _read_plain(fh, dec: StreamDecryptor) -> tuple[bytes, bool]:
+    data = fh.read(ATTACHMENT_IO)
+    return (dec.update(data), False) if data else (dec.finalize(), True)
+
+
+@router.get("/items/{item_id}/attachment")
+async def download_attachment(
+    item_id: str, request: Request, user=Depends(get_current_user), repo=Depends(get_repo)
+):
+    """
+    The decrypted attachment, streamed as it is decrypted.  A tampered file
+    aborts the response mid-way; the Content-Length makes that visible.
+    """
+    item, key = await _attachment_key(request, repo, user, item_id)
+    fh = await asyncio.to_thread(attachments.store.open, user["id"], item_id)
+    if fh is None:
+        raise HTTPException(404, "No attachment")
+    try:
+        _, segment = parse_header(fh.read(HEADER.size))
+        length = plaintext_size(os.fstat(fh.fileno()).st_size, segment)
+        fh.seek(0)
+    except ValueError:
+        fh.close()
+        raise HTTPException(500, "Attachment is corrupt")
+    dec = StreamDecryptor(key, _attachment_aad(user["id"], item_id))
+
+    async def body():
+        try:
+            done = False
+            while not done:
+                data, done = await asyncio.to_thread(_read_plain, fh, dec)
+                yield data
+        except (InvalidTag, ValueError):
+            log.error("attachment %s of user %s failed authentication", item_id, user["id"])
+            raise
+        finally:
+            fh.close()
+
+    return StreamingResponse(body(), media_type="application/octet-stream", headers={
+        "Content-Length": str(length),
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(item.title, safe='')}",
+    })
+
+
+@router.delete("/items/{item_id}/attachment", status_code=204)
+async def delete_attachment(item_id: str, user=Depends(get_current_user), repo=Depends(get_repo)):
+    if not await repo.get_item(user["id"], item_id):
+        raise HTTPException(404, "Secret not found")
+    if not await asyncio.to_thread(attachments.store.delete, user["id"], item_id):
+        raise HTTPException(404, "No attachment")
+    return Response(status_code=204)
+
+
 class SecretFetchIn(BaseModel):
-    master_password: str
+    master_password: str | None = None
 
 @router.get("/{item_id}", response_model=SecretOut)
-def get_secret(item_id: str, query: SecretFetchIn = Depends(), user_id: str = Depends(login)):
-    repo = pick_repo()
-    user  = repo.get_by_id(user_id)
-    item  = repo.get_item(user_id, item_id)
+async def get_secret(
+    item_id: str,
+    request: Request,
+    query: SecretFetchIn = Depends(),
+    user=Depends(get_current_user),
+    repo=Depends(get_repo),
+):
+    item  = await repo.get_item(user["id"], item_id)
 
     if not item:
         raise HTTPException(404, "Secret not found")
 
-    key = kdf.derive_key(
-        master_pwd=query.master_password,
-        salt=bytes.fromhex(user["kdf_salt"]),
-        mem_kib=user["kdf_mem"],
-        time=user["kdf_time"],
-        lanes=user["kdf_lanes"],
-    )
+    key = await keycache.user_key(request, repo, user, query.master_password)
+    if key is None:
+        raise wrong_master_password if query.master_password else vault_locked
 
     try:
         plaintext = encryption.decrypt(item.data, key)
@@ -1,13 +1,15 @@
 # app/routes/views.py
+import asyncio
+
 from fastapi import APIRouter, Request, Form, Depends, status, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 
-from app.repository import pick_repo
+from app.repository import attachments, get_repo
 from app.core.auth import get_current_user
-from app.core.security import verify_password, create_access_token, hash_password
+from app.core.security import verify_password_async, create_access_token, hash_password_async
 from app.core.config import get_settings
-from app.core import kdf, encryption           # ← NEW: AES‑256‑GCM helpers
+from app.core import encryption, kdf, keycache  # AES‑256‑GCM helpers, unlocked keys
 
 templates = Jinja2Templates(directory="templates")
 router = APIRouter()
@@ -15,19 +17,19 @@ settings = get_settings()
 
 # ── REGISTER ───────────────────────────────────────────────────────────
 @router.get("/register", response_class=HTMLResponse)
-def reg_form(request: Request):
+async def reg_form(request: Request):
     return templates.TemplateResponse("register.html", {"request": request})
 
 @router.post("/register", response_class=HTMLResponse)
-def reg_submit(
+async def reg_submit(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
+    repo=Depends(get_repo),
 ):
-    repo = pick_repo()
     try:
         # create_user() now auto‑generates kdf_salt when omitted
-        repo.create_user(username, hash_password(password))
+        await repo.create_user(username, await hash_password_async(password), **kdf.current_params())
     except ValueError:
         return templates.TemplateResponse(
             "register.html",
@@ -37,18 +39,18 @@ def reg_submit(
 
 # ── LOGIN ──────────────────────────────────────────────────────────────
 @router.get("/login", response_class=HTMLResponse)
-def login_form(request: Request):
+async def login_form(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
 @router.post("/login", response_class=HTMLResponse)
-def login_submit(
+async def login_submit(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
+    repo=Depends(get_repo),
 ):
-    repo = pick_repo()
-    user = repo.get_by_username(username)
-    if not user or not verify_password(password, user["password"]):
+    user = await repo.get_by_username(username)
+    if not user or not await verify_password_async(password, user["password"]):
         return templates.TemplateResponse(
             "login.html",
             {"request": request, "error": "Invalid credentials"},
@@ -60,88 +62,136 @@ def login_submit(
 
 # ── LOGOUT ─────────────────────────────────────────────────────────────
 @router.get("/logout")
-def logout():
+async def logout(request: Request):
+    keycache.cache.lock(keycache.session_token(request))
     resp = RedirectResponse("/login", status_code=status.HTTP_303_SEE_OTHER)
     resp.delete_cookie("access_token")
+    resp.delete_cookie(keycache.COOKIE)
     return resp
 
 # ── VAULT LIST ─────────────────────────────────────────────────────────
 @router.get("/vault", response_class=HTMLResponse)
-def vault_list(request: Request, user=Depends(get_current_user)):
-    items = pick_repo().list_items(user_id=user["id"])
+async def vault_list(
+    request: Request,
+    cursor: str | None = None,
+    user=Depends(get_current_user),
+    repo=Depends(get_repo),
+):
+    # titles only – the ciphertext is never loaded for the listing
+    try:
+        items, next_cursor = await repo.list_item_meta(user["id"], after=cursor)
+    except ValueError:                           # stale / mangled cursor → first page
+        items, next_cursor = await repo.list_item_meta(user["id"])
     return templates.TemplateResponse(
         "vault_list.html",
-        {"request": request, "items": items},
+        {"request": request, "items": items, "next_cursor": next_cursor,
+         "paged": cursor is not None, "unlocked": _unlocked(request, user)},
     )
 
+def _unlocked(request: Request, user: dict) -> bool:
+    return keycache.cache.get(user["id"], keycache.session_token(request)) is not None
+
+# ── VAULT UNLOCK / LOCK ────────────────────────────────────────────────
+# declared before /vault/{item_id}, which would otherwise match "unlock"
+@router.get("/vault/unlock", response_class=HTMLResponse)
+async def vault_unlock_form(request: Request, user=Depends(get_current_user)):
+    return templates.TemplateResponse("vault_unlock.html", {"request": request})
+
+@router.post("/vault/unlock", response_class=HTMLResponse)
+async def vault_unlock(
+    request: Request,
+    master_password: str = Form(...),
+    user=Depends(get_current_user),
+    repo=Depends(get_repo),
+):
+    # one Argon2id run here; reveals and creates then use the cached key
+    token = await keycache.unlock(repo, user, master_password)
+    if token is None:
+        return templates.TemplateResponse(
+            "vault_unlock.html",
+            {"request": request, "error": "Wrong master password"},
+        )
+    resp = RedirectResponse("/vault", status_code=status.HTTP_303_SEE_OTHER)
+    resp.set_cookie(keycache.COOKIE, token, httponly=True, samesite="strict",
+                    max_age=settings.KEY_CACHE_TTL_SECONDS)
+    return resp
+
+@router.post("/vault/lock")
+async def vault_lock(request: Request, user=Depends(get_current_user)):
+    keycache.cache.lock(keycache.session_token(request))
+    resp = RedirectResponse("/vault", status_code=status.HTTP_303_SEE_OTHER)
+    resp.delete_cookie(keycache.COOKIE)
+    return resp
+
 # ── VAULT CREATE ───────────────────────────────────────────────────────
 @router.get("/vault/create", response_class=HTMLResponse)
-def vault_create_form(request: Request, user=Depends(get_current_user)):
-    return templates.TemplateResponse("vault_create.html", {"request": request})
+async def vault_create_form(request: Request, user=Depends(get_current_user)):
+    return templates.TemplateResponse(
+        "vault_create.html", {"request": request, "unlocked": _unlocked(request, user)}
+    )
 
 @router.post("/vault/create", response_class=HTMLResponse)
-def vault_create(
+async def vault_create(
     request: Request,
     title: str = Form(...),
     secret: str = Form(...),
-    master_password: str = Form(...),          # ← NEW field in the form
+    master_password: str | None = Form(None),  # not needed once unlocked
     user=Depends(get_current_user),
+    repo=Depends(get_repo),
 ):
-    repo = pick_repo()
-
-    # derive per‑user key
-    key = kdf.derive_key(
-        master_password,
-        salt=bytes.fromhex(user["kdf_salt"]),
-        mem_kib=user["kdf_mem"],
-        time=user["kdf_time"],
-        lanes=user["kdf_lanes"],
-    )
+    # per‑user key: from the unlocked session, else derived right here
+    key = await keycache.user_key(request, repo, user, master_password)
+    if key is None:
+        error = "Wrong master password" if master_password else "Vault locked – enter the master password"
+        return templates.TemplateResponse(
+            "vault_create.html",
+            {"request": request, "unlocked": False, "error": error},
+        )
 
     try:
         blob = encryption.encrypt(secret, key)
     finally:
         del key                                  # secure‑wipe
 
-    repo.create_item(user_id=user["id"], title=title, ciphertext=blob)
+    await repo.create_item(user_id=user["id"], title=title, ciphertext=blob)
     return RedirectResponse("/vault", status_code=status.HTTP_303_SEE_OTHER)
 
 # ── VAULT DETAIL ───────────────────────────────────────────────────────
 @router.get("/vault/{item_id}", response_class=HTMLResponse)
-def vault_detail(
+async def vault_detail(
     request: Request,
     item_id: str,
     user=Depends(get_current_user),
+    repo=Depends(get_repo),
 ):
-    repo = pick_repo()
-    item = repo.get_item(user_id=user["id"], item_id=item_id)
+    item = await repo.get_item(user_id=user["id"], item_id=item_id)
     if not item:
         return RedirectResponse("/vault", status_code=status.HTTP_303_SEE_OTHER)
-    # show a small form asking for the master password
+    # show a small form asking for the master password (unless unlocked)
     return templates.TemplateResponse(
         "vault_detail.html",
-        {"request": request, "item": item, "secret": None},
+        {"request": request, "item": item, "secret": None, "unlocked": _unlocked(request, user)},
     )
 
 @router.post("/vault/{item_id}", response_class=HTMLResponse)
-def vault_reveal(
+async def vault_reveal(
     request: Request,
     item_id: str,
-    master_password: str = Form(...),
+    master_password: str | None = Form(None),
     user=Depends(get_current_user),
+    repo=Depends(get_repo),
 ):
-    repo = pick_repo()
-    item = repo.get_item(user_id=user["id"], item_id=item_id)
+    item = await repo.get_item(user_id=user["id"], item_id=item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    key = kdf.derive_key(
-        master_password,
-        salt=bytes.fromhex(user["kdf_salt"]),
-        mem_kib=user["kdf_mem"],
-        time=user["kdf_time"],
-        lanes=user["kdf_lanes"],
-    )
+    key = await keycache.user_key(request, repo, user, master_password)
+    if key is None:                              # wrong password, or unlock expired meanwhile
+        return templates.TemplateResponse(
+            "vault_detail.html",
+            {"request": request, "item": item, "secret": None, "unlocked": False,
+             "error": "Wrong master password" if master_password else None},
+        )
 
     try:
         plaintext = encryption.decrypt(item.data, key)
@@ -157,7 +207,7 @@ def vault_reveal(
 
 # ── VAULT DELETE ───────────────────────────────────────────────────────
 @router.post("/vault/{item_id}/delete")
-def vault_delete(item_id: str, user=Depends(get_current_user)):
-    repo = pick_repo()
-    repo.delete_item(user_id=user["id"], item_id=item_id)
+async def vault_delete(item_id: str, user=Depends(get_current_user), repo=Depends(get_repo)):
+    await repo.delete_item(user_id=user["id"], item_id=item_id)
+    await asyncio.to_thread(attachments.store.delete, user["id"], item_id)
     return RedirectResponse("/vault", status_code=303)
\ No newline at end of file
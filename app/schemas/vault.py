@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Union
+from typing import List, Optional, Union
 
 class VaultItemCreate(BaseModel):
     title: str
@@ -14,4 +14,8 @@ class VaultItemOut(BaseModel):
     model_config = {"from_attributes": True}
 
 class VaultItemDetail(VaultItemOut):
-    secret: str
\ No newline at end of file
+    secret: str
+
+class VaultItemPage(BaseModel):
+    items: List[VaultItemOut]
+    next_cursor: Optional[str] = None
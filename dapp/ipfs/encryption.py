@@ -1,7 +1,17 @@
 # dapp/ipfs/encryption.py
 
-import secrets, base64
+import secrets, base64, struct, zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterable
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+try:
+    import zstandard                         # optional: compress="zstd"
+except ImportError:
+    zstandard = None
 
 def generate_key() -> bytes:
     """
@@ -10,22 +20,169 @@ def generate_key() -> bytes:
     raw_key = secrets.token_bytes(32)
     return base64.urlsafe_b64encode(raw_key)
 
-def encrypt_blob(key: bytes, data: bytes) -> bytes:
+# ── compression before encryption ────────────────────────────────────
+# A compressed blob gets the vault's envelope header (app/core/encryption.py)
+#   version 1 | alg 4 (zlib) / 5 (zstd) | key id 0 | nonce (12) | ciphertext+tag
+# with the header as AAD.  Anything else is the plain nonce||ciphertext||tag
+# form – what every blob pinned so far is, and what is still written when
+# compression would not pay, so older readers keep working for those.
+COMPRESS_MIN = 1024          # smaller payloads are never compressed
+_ZLIB, _ZSTD = 4, 5
+
+def _codec(alg: int):
+    if alg == _ZLIB:
+        return lambda d: zlib.compress(d, 6), zlib.decompress
+    if zstandard is None:
+        raise ValueError("zstd-compressed blob but the zstandard package is not installed")
+    return zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress
+
+def _compress(data: bytes, compress: str | None) -> tuple[int, bytes] | None:
+    """(alg, compressed) when it saves at least an eighth, else None."""
+    if not compress or len(data) < COMPRESS_MIN:
+        return None
+    alg = _ZSTD if compress == "zstd" and zstandard is not None else _ZLIB
+    packed = _codec(alg)[0](data)
+    return (alg, packed) if len(packed) <= len(data) - len(data) // 8 else None
+
+def _seal(aesgcm: AESGCM, data: bytes, compress: str | None) -> bytes:
+    nonce   = secrets.token_bytes(12)            # 96-bit nonce for GCM
+    packed  = _compress(data, compress)
+    if packed is None:
+        return nonce + aesgcm.encrypt(nonce, data, None)  # no AAD here
+    alg, data = packed
+    header = bytes((1, alg, 0))
+    return header + nonce + aesgcm.encrypt(nonce, data, header)
+
+def _open(aesgcm: AESGCM, blob: bytes) -> bytes:
+    header = blob[:3]
+    if header in (bytes((1, _ZLIB, 0)), bytes((1, _ZSTD, 0))):
+        try:
+            data = aesgcm.decrypt(blob[3:15], blob[15:], header)
+        except InvalidTag:
+            pass    # or a plain blob whose random nonce starts like a header
+        else:
+            return _codec(header[1])[1](data)
+    nonce, ct = blob[:12], blob[12:]
+    return aesgcm.decrypt(nonce, ct, None)
+
+def encrypt_blob(key: bytes, data: bytes, compress: str | None = "zlib") -> bytes:
     """
-    Encrypt plaintext → ciphertext. We pack nonce||ciphertext||tag together.
+    Encrypt plaintext → ciphertext. We pack nonce||ciphertext||tag together,
+    behind a header if ``compress`` ("zlib", "zstd" or None) shrank the data.
     """
     # key comes in Base64 form, so decode it:
     raw_key = base64.urlsafe_b64decode(key)
-    aesgcm  = AESGCM(raw_key)
-    nonce   = secrets.token_bytes(12)            # 96-bit nonce for GCM
-    ct      = aesgcm.encrypt(nonce, data, None)  # no AAD here
-    return nonce + ct
+    return _seal(AESGCM(raw_key), data, compress)
 
 def decrypt_blob(key: bytes, blob: bytes) -> bytes:
     """
-    Decrypt nonce||ciphertext||tag → original plaintext.
+    Decrypt either form of ``encrypt_blob`` → original plaintext.
     """
     raw_key = base64.urlsafe_b64decode(key)
-    aesgcm  = AESGCM(raw_key)
-    nonce, ct = blob[:12], blob[12:]
-    return aesgcm.decrypt(nonce, ct, None)
+    return _open(AESGCM(raw_key), blob)
+
+
+# ── batches: one key, one cipher context, optionally several threads ───
+MIN_CHUNK = 256              # fewer items per thread are not worth the hop
+
+def _map(fn, values: Iterable, workers: int) -> list:
+    """``[fn(v) for v in values]``, in contiguous chunks on up to ``workers`` threads."""
+    values  = list(values)
+    workers = min(workers, len(values) // MIN_CHUNK)
+    if workers <= 1:
+        return [fn(v) for v in values]
+    size   = -(-len(values) // workers)
+    chunks = [values[i:i + size] for i in range(0, len(values), size)]
+    with ThreadPoolExecutor(workers, thread_name_prefix="aead") as pool:
+        return [r for part in pool.map(lambda c: [fn(v) for v in c], chunks) for r in part]
+
+def encrypt_many(key: bytes, items: Iterable[bytes], compress: str | None = "zlib",
+                 workers: int = 1) -> list[bytes]:
+    """
+    ``encrypt_blob`` for every item, results in order – the key is decoded
+    and the cipher built once for the whole batch.
+    """
+    aesgcm = AESGCM(base64.urlsafe_b64decode(key))
+    return _map(lambda data: _seal(aesgcm, data, compress), items, workers)
+
+def decrypt_many(key: bytes, blobs: Iterable[bytes], workers: int = 1) -> list[bytes]:
+    """
+    ``decrypt_blob`` for every blob, results in order; raises on the first
+    one that fails to authenticate.
+    """
+    aesgcm = AESGCM(base64.urlsafe_b64decode(key))
+    return _map(lambda blob: _open(aesgcm, blob), blobs, workers)
+
+
+# ── streaming: files too big for one encrypt_blob() call ──────────────
+# Same layout as the vault's attachments (app/core/streaming.py):
+#   version 1 | alg 3 | key id 0 | segment size (u32) | salt (16)
+#   then AES-GCM segments under HKDF(key, salt), nonce = counter || final flag
+SEGMENT = 64 * 1024
+MAX_SEGMENT = 1 << 24       # the header is read before anything is authenticated
+_HEADER = struct.Struct(">BBBI16s")
+_TAG = 16
+
+def _stream_aead(key: bytes, salt: bytes) -> AESGCM:
+    raw_key = base64.urlsafe_b64decode(key)
+    return AESGCM(HKDF(hashes.SHA256(), 32, salt, b"blockpass stream v1").derive(raw_key))
+
+def _nonce(index: int, final: bool) -> bytes:
+    return index.to_bytes(11, "big") + (b"\x01" if final else b"\x00")
+
+def _read_exactly(src: BinaryIO, n: int) -> bytes:
+    parts, got = [], 0
+    while got < n:
+        chunk = src.read(n - got)
+        if not chunk:
+            break
+        parts.append(chunk)
+        got += len(chunk)
+    return b"".join(parts)
+
+def encrypt_stream(key: bytes, src: BinaryIO, dst: BinaryIO, segment: int = SEGMENT) -> int:
+    """
+    Encrypt ``src`` into ``dst`` one segment at a time – memory stays at a
+    couple of segments whatever the file size.  Returns the plaintext size.
+    """
+    if not 0 < segment <= MAX_SEGMENT:
+        raise ValueError(f"segment size must be 1..{MAX_SEGMENT}")
+    salt   = secrets.token_bytes(16)
+    header = _HEADER.pack(1, 3, 0, segment, salt)
+    aesgcm = _stream_aead(key, salt)
+    dst.write(header)
+    index, total = 0, 0
+    chunk = _read_exactly(src, segment)
+    while True:
+        nxt   = _read_exactly(src, segment)      # look ahead: is this the last one?
+        final = not nxt
+        dst.write(aesgcm.encrypt(_nonce(index, final), chunk, header))
+        total += len(chunk)
+        if final:
+            return total
+        chunk, index = nxt, index + 1
+
+def decrypt_stream(key: bytes, src: BinaryIO, dst: BinaryIO) -> int:
+    """
+    Inverse of ``encrypt_stream``.  Raises ``InvalidTag`` if any segment was
+    altered, reordered or dropped – ``dst`` then holds an unauthenticated
+    prefix and must be discarded.  Returns the plaintext size.
+    """
+    header = _read_exactly(src, _HEADER.size)
+    if len(header) < _HEADER.size:
+        raise ValueError("truncated stream header")
+    version, alg, _key_id, segment, salt = _HEADER.unpack(header)
+    if (version, alg) != (1, 3) or not 0 < segment <= MAX_SEGMENT:
+        raise ValueError("not an encrypted stream")
+    aesgcm = _stream_aead(key, salt)
+    index, total = 0, 0
+    chunk = _read_exactly(src, segment + _TAG)
+    while True:
+        nxt   = _read_exactly(src, segment + _TAG)
+        final = not nxt
+        plain = aesgcm.decrypt(_nonce(index, final), chunk, header)
+        dst.write(plain)
+        total += len(plain)
+        if final:
+            return total
+        chunk, index = nxt, index + 1
@@ -0,0 +1,85 @@
+# scripts/bench_async_repo.py
+"""
+Concurrent requests per worker: sync repo on the thread pool vs. async repo.
+
+"sync" is what a ``def`` route did – each call holds one of anyio's 40
+worker threads for its whole duration, including the wait for the group
+commit.  "async" is ``AsyncFileRepo``: reads stay on the event loop and a
+write only borrows a thread to stage its change, then awaits the fsync.
+
+    python scripts/bench_async_repo.py --concurrency 100 1000
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import anyio.to_thread
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.repository import file_repo                       # noqa: E402
+from app.repository.async_file_repo import AsyncFileRepo   # noqa: E402
+from app.repository.file_repo import FileRepo               # noqa: E402
+
+
+async def peak_threads(work) -> int:
+    """Run ``work`` while sampling how many threads the process has."""
+    peak = threading.active_count()
+    task = asyncio.ensure_future(work)
+    while not task.done():
+        peak = max(peak, threading.active_count())
+        await asyncio.sleep(0.001)
+    await task
+    return peak
+
+
+async def run_sync(repo: FileRepo, users: list[str], n: int) -> None:
+    async def one(i: int) -> None:
+        u = users[i % len(users)]
+        await anyio.to_thread.run_sync(repo.create_item, u, f"t{i}", "x" * 160)
+        await anyio.to_thread.run_sync(repo.list_items, u)
+
+    await asyncio.gather(*(one(i) for i in range(n)))
+
+
+async def run_async(repo: AsyncFileRepo, users: list[str], n: int) -> None:
+    async def one(i: int) -> None:
+        u = users[i % len(users)]
+        await repo.create_item(u, f"t{i}", "x" * 160)
+        await repo.list_items(u)
+
+    await asyncio.gather(*(one(i) for i in range(n)))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[100, 1000])
+    ap.add_argument("--users", type=int, default=50)
+    args = ap.parse_args()
+
+    file_repo.settings.FILE_VAULT_LAYOUT = "sharded"
+    print(f"{'requests':>9} {'mode':>6} {'total ms':>9} {'req/s':>8} {'threads':>8}")
+    for n in args.concurrency:
+        for mode in ("sync", "async"):
+            with tempfile.TemporaryDirectory() as tmp:
+                repo = FileRepo(str(Path(tmp) / "blockpass_users.json"))
+                users = [str(uuid.uuid4()) for _ in range(args.users)]
+                t0 = time.perf_counter()
+                if mode == "sync":
+                    peak = asyncio.run(peak_threads(run_sync(repo, users, n)))
+                else:
+                    peak = asyncio.run(peak_threads(run_async(AsyncFileRepo(repo), users, n)))
+                elapsed = time.perf_counter() - t0
+                repo.shutdown()
+                file_repo._tables.clear()
+            print(f"{n:>9} {mode:>6} {elapsed * 1000:>9.0f} {n / elapsed:>8.0f} {peak:>8}")
+
+
+if __name__ == "__main__":
+    main()
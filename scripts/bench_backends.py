@@ -0,0 +1,111 @@
+# scripts/bench_backends.py
+"""
+Storage backends head to head: file, journal, sqlite and postgres.
+
+Each backend runs in its own interpreter (``app.database`` builds its engine
+from ``DB_BACKEND`` at import) against a fresh data directory.  Writes are
+``create_item`` from ``--threads`` threads at once; reads are auth
+lookups, first listing pages and single-item fetches.  Postgres is
+skipped when the server in ``POSTGRES_*`` cannot be reached.
+
+    python scripts/bench_backends.py --items 5000 --threads 8
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+BACKENDS = ("file", "journal", "sqlite", "postgres")
+
+
+def run_child(args) -> dict:
+    from app.repository import pick_repo
+
+    repo = pick_repo()
+    try:
+        repo.startup()
+    except Exception as exc:                          # e.g. no Postgres server
+        return {"error": f"{type(exc).__name__}: {exc}".splitlines()[0]}
+
+    suffix = os.urandom(4).hex()                      # postgres keeps old runs
+    users = [repo.create_user(f"bench-{suffix}-{u}", "x")["id"] for u in range(args.users)]
+    per_thread = args.items // args.threads
+
+    def writer(t: int) -> list[tuple[str, str]]:
+        made = []
+        for i in range(per_thread):
+            u = users[(t + i) % len(users)]
+            made.append((u, repo.create_item(u, f"item {t}/{i}", "x" * 160).id))
+        return made
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        items = [it for chunk in pool.map(writer, range(args.threads)) for it in chunk]
+    write_s = time.perf_counter() - t0
+
+    def timed(fn, n: int) -> float:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        return (time.perf_counter() - t0) / n * 1e6
+
+    n = args.reads
+    out = {
+        "write/s": len(items) / write_s,
+        "get_by_id us": timed(lambda: repo.get_by_id(random.choice(users)), n),
+        "list page us": timed(lambda: repo.list_item_meta(random.choice(users), 50), n),
+        "get_item us": timed(lambda: repo.get_item(*random.choice(items)), n),
+    }
+    repo.shutdown()
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    ap.add_argument("--items", type=int, default=5000)
+    ap.add_argument("--users", type=int, default=50)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--reads", type=int, default=2000)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    cols = ("write/s", "get_by_id us", "list page us", "get_item us")
+    print(f"{'backend':>9} " + " ".join(f"{c:>13}" for c in cols))
+    for backend in args.backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                DB_BACKEND=backend,
+                FILE_PATH=str(Path(tmp) / "blockpass_users.json"),
+                SQLITE_PATH=str(Path(tmp) / "blockpass.db"),
+            )
+            cmd = [sys.executable, __file__, "--child",
+                   "--items", str(args.items), "--users", str(args.users),
+                   "--threads", str(args.threads), "--reads", str(args.reads)]
+            proc = subprocess.run(cmd, env=env, cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{backend:>9}  failed: {proc.stderr.strip().splitlines()[-1]}")
+            continue
+        res = json.loads(proc.stdout.strip().splitlines()[-1])
+        if "error" in res:
+            print(f"{backend:>9}  skipped ({res['error']})")
+            continue
+        print(f"{backend:>9} " + " ".join(f"{res[c]:>13.1f}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
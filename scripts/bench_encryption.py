@@ -0,0 +1,66 @@
+# scripts/bench_encryption.py
+"""
+Per-item encrypt/decrypt against the batch API (encrypt_many / decrypt_many).
+
+    python scripts/bench_encryption.py --items 10000 50000 --size 64 2048 --workers 1 4
+"""
+import argparse
+import os
+import secrets
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.core import encryption   # noqa: E402
+
+
+def make_plaintexts(n: int, size: int) -> list[str]:
+    # token_urlsafe: about as (in)compressible as real secrets
+    return [secrets.token_urlsafe(size)[:size] for _ in range(n)]
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--items", type=int, nargs="+", default=[10_000, 50_000])
+    ap.add_argument("--size", type=int, nargs="+", default=[64, 2048])
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    key = os.urandom(32)
+    print(f"{'items':>7} {'bytes':>6} {'path':>12} {'enc/s':>10} {'dec/s':>10}")
+    for n in args.items:
+        for size in args.size:
+            plaintexts = make_plaintexts(n, size)
+            blobs = encryption.encrypt_many(plaintexts, key)
+            assert encryption.decrypt_many(blobs, key) == plaintexts
+
+            runs = {"per item": (
+                lambda: [encryption.encrypt(p, key) for p in plaintexts],
+                lambda: [encryption.decrypt(b, key) for b in blobs],
+            )}
+            for w in dict.fromkeys(args.workers):
+                runs[f"many w={w}"] = (
+                    lambda w=w: encryption.encrypt_many(plaintexts, key, workers=w),
+                    lambda w=w: encryption.decrypt_many(blobs, key, workers=w),
+                )
+            for name, (enc, dec) in runs.items():
+                e = best_of(enc, args.repeat)
+                d = best_of(dec, args.repeat)
+                print(f"{n:>7} {size:>6} {name:>12} {n / e:>10,.0f} {n / d:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# scripts/bench_serializers.py
+"""
+Load/save time and file size of the file-backend formats (FILE_FORMAT).
+
+    python scripts/bench_serializers.py --items 10000 100000 1000000
+"""
+import argparse
+import datetime
+import sys
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.repository.serializers import get_serializer, load_rows   # noqa: E402
+
+FORMATS = ("json", "orjson", "binary")
+
+
+def make_rows(n: int, users: int = 1000) -> list[dict]:
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    now = datetime.datetime(2025, 1, 1).isoformat()
+    blob = '{"nonce": "s4zCeu3DpF54PTKc", "ciphertext": "n2M9x0Q2bWk=", "tag": "k2fnHyreR5sTJ4DKUtJM8w=="}'
+    return [
+        {
+            "id": uuid.uuid4().hex,
+            "user_id": user_ids[i % users],
+            "title": f"login #{i}",
+            "data": blob,
+            "created_at": now,
+        }
+        for i in range(n)
+    ]
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--items", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'items':>9} {'format':>7} {'save ms':>9} {'load ms':>9} {'size MiB':>9}")
+    for n in args.items:
+        rows = make_rows(n)
+        repeat = args.repeat if n < 1_000_000 else 1
+        for name in FORMATS:
+            fmt = get_serializer(name)
+            data = fmt.dumps(rows)
+            save = best_of(lambda rows=rows: fmt.dumps(rows), repeat)
+            load = best_of(lambda: load_rows(data), repeat)   # auto-detected, as the repo reads
+            assert len(load_rows(data)) == n
+            print(f"{n:>9} {name:>7} {save:>9.1f} {load:>9.1f} {len(data) / 2**20:>9.2f}")
+        del rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# scripts/bench_sharded_list.py
+"""
+list_items latency vs. total number of users: single vault file vs. shards.
+
+Each user owns ``--items`` vault rows.  "cold" is the first request after
+the file changed on disk (what another worker's write, or a restart, costs);
+"warm" is served straight from the resident index.
+
+    python scripts/bench_sharded_list.py --users 100 1000 10000
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.repository import file_repo                       # noqa: E402
+from app.repository.file_repo import FileRepo               # noqa: E402
+from app.repository.shard_vault import split_vault          # noqa: E402
+
+
+def populate(data_dir: Path, users: int, per_user: int) -> list[str]:
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    rows = [
+        {
+            "id": uuid.uuid4().hex,
+            "user_id": u,
+            "title": f"item {i}",
+            "data": "x" * 160,
+            "created_at": "2025-01-01T00:00:00",
+        }
+        for u in user_ids
+        for i in range(per_user)
+    ]
+    (data_dir / "blockpass_users.json").write_text("[]")
+    (data_dir / "blockpass_vault.json").write_text(json.dumps(rows))
+    return user_ids
+
+
+def time_lists(users_file: Path, user_ids: list[str], samples: int, cold: bool) -> float:
+    picks = random.sample(user_ids, min(samples, len(user_ids)))
+    timings = []
+    for u in picks:
+        if cold:
+            file_repo._tables.clear()
+        t0 = time.perf_counter()
+        FileRepo(str(users_file)).list_items(u)
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--users", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--items", type=int, default=20, help="vault items per user")
+    ap.add_argument("--samples", type=int, default=30)
+    args = ap.parse_args()
+
+    print(f"{'users':>7} {'layout':>8} {'cold ms':>9} {'warm ms':>9}")
+    for n in args.users:
+        with tempfile.TemporaryDirectory() as tmp:
+            data = Path(tmp)
+            users_file = data / "blockpass_users.json"
+            ids = populate(data, n, args.items)
+            for layout in ("single", "sharded"):
+                if layout == "sharded":
+                    split_vault(str(users_file))
+                file_repo.settings.FILE_VAULT_LAYOUT = layout
+                cold = time_lists(users_file, ids, args.samples, cold=True)
+                warm = time_lists(users_file, ids, args.samples, cold=False)
+                print(f"{n:>7} {layout:>8} {cold:>9.3f} {warm:>9.3f}")
+            file_repo._tables.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# scripts/bench_vault_records.py
+"""
+Cost of materialising file-backend vault rows: SQLAlchemy ``VaultItem``
+instances (what ``FileRepo._load_items`` used to build for every row on
+every call) vs. the slotted ``VaultRecord``.
+
+    python scripts/bench_vault_records.py --items 100000
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import datetime                                             # noqa: E402
+
+from app.models.vault import VaultItem                      # noqa: E402
+from app.repository.records import VaultRecord              # noqa: E402
+
+
+def make_rows(n: int) -> list[dict]:
+    user_ids = [str(uuid.uuid4()) for _ in range(max(1, n // 100))]
+    now = datetime.datetime(2025, 1, 1).isoformat()
+    return [
+        {
+            "id": uuid.uuid4().hex,
+            "user_id": user_ids[i % len(user_ids)],
+            "title": f"login #{i}",
+            "data": '{"nonce": "...", "ciphertext": "...", "tag": "..."}',
+            "created_at": now,
+        }
+        for i in range(n)
+    ]
+
+
+def as_orm(row: dict) -> VaultItem:
+    return VaultItem(**{**row, "created_at": datetime.datetime.fromisoformat(row["created_at"])})
+
+
+def measure(build, rows: list[dict]) -> tuple[float, float]:
+    t0 = time.perf_counter()
+    objs = [build(r) for r in rows]
+    elapsed = time.perf_counter() - t0
+    del objs
+
+    tracemalloc.start()                      # separate pass: tracing skews timings
+    objs = [build(r) for r in rows]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objs
+    return elapsed * 1000, peak / 2**20
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--items", type=int, default=100_000)
+    args = ap.parse_args()
+
+    rows = make_rows(args.items)
+    print(f"{args.items} vault rows")
+    print(f"{'type':<12} {'build ms':>9} {'peak MiB':>9} {'µs/row':>8}")
+    for label, build in (("VaultItem", as_orm), ("VaultRecord", VaultRecord.from_row)):
+        ms, mib = measure(build, rows)
+        print(f"{label:<12} {ms:>9.1f} {mib:>9.1f} {ms * 1000 / len(rows):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
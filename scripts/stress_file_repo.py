@@ -0,0 +1,146 @@
+# scripts/stress_file_repo.py
+"""
+Concurrency stress test for the file backends.
+
+Hammers ``create_item`` from many threads, then re-reads the vault from disk
+with a cold cache and checks that every single item survived.  The same load
+is replayed against the old per-call read-modify-write of the whole JSON file
+for a throughput (and lost-update) comparison, both as it was (unlocked,
+no fsync) and made correct (locked, atomic rename + fsync on every call).
+
+    python scripts/stress_file_repo.py --threads 16 --per-thread 50
+    python scripts/stress_file_repo.py --processes 4    # one repo per worker process
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.repository import file_repo                       # noqa: E402
+from app.repository.file_repo import FileRepo               # noqa: E402
+from app.repository.journal_repo import JournalRepo         # noqa: E402
+
+
+def legacy_create_item(vault: Path, user_id: str, title: str, blob: str, durable=False) -> None:
+    """What FileRepo.create_item used to do: load everything, append, rewrite."""
+    items = json.loads(vault.read_text())
+    items.append({"id": uuid.uuid4().hex, "user_id": user_id, "title": title, "data": blob})
+    data = json.dumps(items, indent=2)
+    if durable:
+        file_repo._atomic_write(vault, data.encode("utf-8"))
+    else:
+        vault.write_text(data)
+
+
+def hammer(create, threads: int, per_thread: int) -> float:
+    errors: list[BaseException] = []
+
+    def worker(n: int) -> None:
+        try:
+            for i in range(per_thread):
+                create(f"user-{n % 4}", f"item {n}/{i}", "x" * 120)
+        except BaseException as exc:            # legacy path may hit torn JSON
+            errors.append(exc)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    if errors:
+        print(f"    {len(errors)} worker(s) crashed, first: {errors[0]!r}")
+    return elapsed
+
+
+def run(repo_cls, label: str, threads: int, per_thread: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        users = Path(tmp) / "blockpass_users.json"
+        repo = repo_cls(str(users))
+        elapsed = hammer(repo.create_item, threads, per_thread)
+
+        file_repo._tables.clear()                   # cold cache: trust only the disk
+        stored = sum(len(repo_cls(str(users)).list_items(f"user-{u}")) for u in range(4))
+        expected = threads * per_thread
+        print(f"{label:<22} {expected / elapsed:>9.0f} writes/s   "
+              f"stored {stored}/{expected}")
+        assert stored == expected, f"{label}: lost {expected - stored} updates"
+
+
+def _process_worker(args) -> None:
+    repo_cls, users, threads, per_thread = args
+    hammer(repo_cls(users).create_item, threads, per_thread)
+
+
+def run_processes(repo_cls, label: str, processes: int, threads: int, per_thread: int) -> None:
+    """Same check with several OS processes sharing the files, like uvicorn --workers."""
+    with tempfile.TemporaryDirectory() as tmp:
+        users = str(Path(tmp) / "blockpass_users.json")
+        repo_cls(users)
+        t0 = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            pool.map(_process_worker, [(repo_cls, users, threads, per_thread)] * processes)
+        elapsed = time.perf_counter() - t0
+
+        file_repo._tables.clear()
+        stored = sum(len(repo_cls(users).list_items(f"user-{u}")) for u in range(4))
+        expected = processes * threads * per_thread
+        print(f"{label:<22} {expected / elapsed:>9.0f} writes/s   "
+              f"stored {stored}/{expected}  ({processes} processes)")
+        assert stored == expected, f"{label}: lost {expected - stored} updates"
+
+
+def run_legacy(threads: int, per_thread: int, durable: bool) -> None:
+    lock = threading.Lock()
+
+    def create(u, t, b):
+        if durable:
+            with lock:
+                legacy_create_item(vault, u, t, b, durable=True)
+        else:
+            legacy_create_item(vault, u, t, b)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vault = Path(tmp) / "blockpass_vault.json"
+        vault.write_text("[]")
+        elapsed = hammer(create, threads, per_thread)
+        expected = threads * per_thread
+        try:
+            stored = len(json.loads(vault.read_text()))
+        except ValueError:
+            stored = 0
+        label = "per-call locked+fsync" if durable else "per-call rewrite (old)"
+        print(f"{label:<22} {expected / elapsed:>9.0f} writes/s   "
+              f"stored {stored}/{expected}  (lost {expected - stored})")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--per-thread", type=int, default=50)
+    ap.add_argument("--processes", type=int, default=0,
+                    help="also run the load from this many worker processes")
+    args = ap.parse_args()
+
+    print(f"{args.threads} threads × {args.per_thread} create_item calls\n")
+    run_legacy(args.threads, args.per_thread, durable=False)
+    run_legacy(args.threads, args.per_thread, durable=True)
+    run(FileRepo, "file (group commit)", args.threads, args.per_thread)
+    run(JournalRepo, "journal (group commit)", args.threads, args.per_thread)
+    if args.processes:
+        threads = max(1, args.threads // args.processes)
+        run_processes(FileRepo, "file, multi-process", args.processes, threads, args.per_thread)
+        run_processes(JournalRepo, "journal, multi-process", args.processes, threads, args.per_thread)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# tests/test_dapp_encryption.py
+import base64
+import os
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from ipfs import encryption
+
+KEY = encryption.generate_key()
+TEXT = b'{"rpc": "https://sepolia.example", "note": "rotate quarterly"}\n' * 100
+
+
+def plain_blob(data: bytes, nonce: bytes) -> bytes:
+    """What encrypt_blob wrote before compression: nonce||ciphertext||tag."""
+    return nonce + AESGCM(base64.urlsafe_b64decode(KEY)).encrypt(nonce, data, None)
+
+
+def test_short_blob_keeps_the_plain_form():
+    blob = encryption.encrypt_blob(KEY, b"hunter2")
+    assert len(blob) == 12 + 7 + 16
+    assert encryption.decrypt_blob(KEY, blob) == b"hunter2"
+
+
+def test_compressed_blob():
+    blob = encryption.encrypt_blob(KEY, TEXT)
+    assert blob[:3] == bytes((1, 4, 0))
+    assert len(blob) < len(TEXT) // 4
+    assert encryption.decrypt_blob(KEY, blob) == TEXT
+
+
+def test_zstd_blob():
+    pytest.importorskip("zstandard")
+    blob = encryption.encrypt_blob(KEY, TEXT, compress="zstd")
+    assert blob[:3] == bytes((1, 5, 0))
+    assert encryption.decrypt_blob(KEY, blob) == TEXT
+
+
+@pytest.mark.parametrize("data, compress", [(TEXT, None), (os.urandom(4096), "zlib")])
+def test_uncompressed_blob_keeps_the_plain_form(data, compress):
+    blob = encryption.encrypt_blob(KEY, data, compress=compress)
+    assert len(blob) == 12 + len(data) + 16
+    assert AESGCM(base64.urlsafe_b64decode(KEY)).decrypt(blob[:12], blob[12:], None) == data
+
+
+def test_pre_compression_blob():
+    assert encryption.decrypt_blob(KEY, plain_blob(TEXT, os.urandom(12))) == TEXT
+
+
+def test_plain_blob_whose_nonce_looks_like_a_header():
+    nonce = bytes((1, 4, 0)) + os.urandom(9)
+    assert encryption.decrypt_blob(KEY, plain_blob(b"legacy", nonce)) == b"legacy"
+
+
+def test_compressed_header_is_authenticated():
+    blob = bytearray(encryption.encrypt_blob(KEY, TEXT))
+    blob[1] = 5
+    with pytest.raises(InvalidTag):
+        encryption.decrypt_blob(KEY, bytes(blob))
+
+
+def test_wrong_key():
+    with pytest.raises(InvalidTag):
+        encryption.decrypt_blob(encryption.generate_key(), encryption.encrypt_blob(KEY, TEXT))
+
+
+# ── batches ──────────────────────────────────────────────────────────
+@pytest.mark.parametrize("workers", [1, 3])
+def test_many_round_trip_in_order(workers):
+    items = [os.urandom(40) for _ in range(600)] + [TEXT] * 3
+    blobs = encryption.encrypt_many(KEY, items, workers=workers)
+    assert [encryption.decrypt_blob(KEY, b) for b in blobs] == items
+    assert encryption.decrypt_many(KEY, blobs, workers=workers) == items
+
+
+def test_decrypt_many_raises_on_failure():
+    blobs = encryption.encrypt_many(KEY, [b"x"] * 10)
+    blobs[5] = encryption.encrypt_blob(encryption.generate_key(), b"x")
+    with pytest.raises(InvalidTag):
+        encryption.decrypt_many(KEY, blobs)
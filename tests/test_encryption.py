@@ -0,0 +1,238 @@
+# tests/test_encryption.py
+import base64
+import json
+import os
+from zlib import decompress as zlib_decompress
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from app.core import encryption
+
+
+@pytest.fixture
+def key():
+    return os.urandom(32)
+
+
+def legacy_blob(plaintext: str, key: bytes) -> str:
+    """The pre-envelope format: a JSON object of base64 nonce, ciphertext and tag."""
+    nonce = os.urandom(12)
+    ct = AESGCM(key).encrypt(nonce, plaintext.encode(), None)
+    return json.dumps({
+        "nonce": base64.b64encode(nonce).decode(),
+        "ciphertext": base64.b64encode(ct[:-16]).decode(),
+        "tag": base64.b64encode(ct[-16:]).decode(),
+    })
+
+
+def flipped(blob: bytes, index: int, value: int) -> bytes:
+    out = bytearray(blob)
+    out[index] = value
+    return bytes(out)
+
+
+# ── binary envelope ──────────────────────────────────────────────────
+def test_round_trip(key):
+    blob = encryption.encrypt("hunter2", key)
+    assert blob[:3] == bytes((encryption.VERSION, encryption.ALG_AES256GCM, encryption.KEY_VAULT))
+    assert len(blob) == len("hunter2") + 31
+    assert encryption.decrypt(blob, key) == "hunter2"
+    assert encryption.key_id(blob) == encryption.KEY_VAULT
+
+
+def test_key_id_is_recorded(key):
+    blob = encryption.encrypt("x", key, key_id=encryption.KEY_PASSWORD)
+    assert encryption.key_id(blob) == encryption.KEY_PASSWORD
+    assert encryption.decrypt(blob, key) == "x"
+
+
+def test_wrong_key(key):
+    with pytest.raises(InvalidTag):
+        encryption.decrypt(encryption.encrypt("x", key), os.urandom(32))
+
+
+def test_header_is_authenticated(key):
+    blob = encryption.encrypt("x", key)
+    with pytest.raises(InvalidTag):             # relabelled key id
+        encryption.decrypt(flipped(blob, 2, encryption.KEY_PASSWORD), key)
+    with pytest.raises(InvalidTag):             # "legacy, no AAD"
+        encryption.decrypt(flipped(blob, 1, encryption.ALG_AES256GCM_LEGACY), key)
+
+
+def test_tampered_ciphertext(key):
+    blob = encryption.encrypt("secret", key)
+    with pytest.raises(InvalidTag):
+        encryption.decrypt(flipped(blob, 15, blob[15] ^ 1), key)
+
+
+@pytest.mark.parametrize("index, value", [(0, 2), (1, 99)])
+def test_unknown_version_or_alg(key, index, value):
+    with pytest.raises(ValueError):
+        encryption.decrypt(flipped(encryption.encrypt("x", key), index, value), key)
+
+
+def test_too_short():
+    with pytest.raises(ValueError):
+        encryption.decrypt(bytes((1, 1, 1)) + bytes(20), os.urandom(32))
+
+
+# ── text forms ───────────────────────────────────────────────────────
+def test_text_round_trip(key):
+    blob = encryption.encrypt("x", key)
+    text = encryption.to_text(blob)
+    assert encryption.from_text(text) == blob
+    assert encryption.to_bytes(text) == blob
+    assert encryption.decrypt(text, key) == "x"
+
+
+@pytest.mark.parametrize("text", ["not base64!", base64.b64encode(b"short").decode(), '{"nonce": 1'])
+def test_from_text_rejects_garbage(text):
+    with pytest.raises(ValueError):
+        encryption.from_text(text)
+
+
+# ── legacy JSON blobs ────────────────────────────────────────────────
+def test_legacy_blob_through_decrypt(key):
+    blob = legacy_blob("old secret", key)
+    assert encryption.is_legacy(blob)
+    assert encryption.key_id(blob) == encryption.KEY_PASSWORD
+    assert encryption.decrypt(blob, key) == "old secret"
+    assert encryption.decrypt(encryption.to_bytes(blob), key) == "old secret"
+    assert encryption.from_text(blob) == blob
+
+
+def test_repack_legacy(key):
+    blob = legacy_blob("old secret", key)
+    packed = encryption.repack_legacy(blob)
+    assert packed[:3] == bytes((encryption.VERSION, encryption.ALG_AES256GCM_LEGACY, encryption.KEY_PASSWORD))
+    assert len(packed) < len(blob)
+    assert encryption.decrypt(packed, key) == "old secret"
+    assert encryption.key_id(packed) == encryption.KEY_PASSWORD
+
+
+def test_tampered_legacy_blob(key):
+    obj = json.loads(legacy_blob("old secret", key))
+    obj["tag"] = base64.b64encode(bytes(16)).decode()
+    with pytest.raises(InvalidTag):
+        encryption.decrypt(json.dumps(obj), key)
+    with pytest.raises(InvalidTag):
+        encryption.decrypt(encryption.repack_legacy(json.dumps(obj)), key)
+
+
+# ── compression (alg 4 / 5) ──────────────────────────────────────────
+TEXT = "-----BEGIN CERTIFICATE-----\nMIIDdzCCAl+gAwIBAgIE\n" * 200
+
+
+@pytest.fixture
+def zstd(monkeypatch):
+    pytest.importorskip("zstandard")
+    monkeypatch.setattr(encryption, "_codec", lambda: (encryption.ALG_AES256GCM_ZSTD, 1024))
+
+
+def test_compressible_payload_is_compressed(key):
+    blob = encryption.encrypt(TEXT, key)
+    assert blob[1] == encryption.ALG_AES256GCM_ZLIB
+    assert len(blob) < len(TEXT) // 4
+    assert encryption.decrypt(blob, key) == TEXT
+    assert encryption.decrypt(encryption.to_text(blob), key) == TEXT
+
+
+def test_large_payload_passes_the_probe(key):
+    plaintext = TEXT * 20
+    blob = encryption.encrypt(plaintext, key)
+    assert len(plaintext) > 2 * encryption.PROBE_LEN
+    assert blob[1] == encryption.ALG_AES256GCM_ZLIB
+    assert encryption.decrypt(blob, key) == plaintext
+
+
+def test_zstd(key, zstd):
+    blob = encryption.encrypt(TEXT, key)
+    assert blob[1] == encryption.ALG_AES256GCM_ZSTD
+    assert encryption.decrypt(blob, key) == TEXT
+
+
+def test_zstd_blob_without_zstandard(key, zstd, monkeypatch):
+    blob = encryption.encrypt(TEXT, key)
+    monkeypatch.setattr(encryption, "zstandard", None)
+    with pytest.raises(ValueError):
+        encryption.decrypt(blob, key)
+
+
+def test_below_threshold_is_not_compressed(key):
+    plaintext = "a" * 1023
+    blob = encryption.encrypt(plaintext, key)
+    assert blob[1] == encryption.ALG_AES256GCM
+    assert len(blob) == len(plaintext) + 31
+
+
+def test_incompressible_payload_is_stored_as_is():
+    # text always shrinks a little; random bytes show the check itself
+    data = os.urandom(5000)
+    assert encryption._compress(data) == (encryption.ALG_AES256GCM, data)
+
+
+def test_probe_skips_incompressible_head(monkeypatch):
+    data = os.urandom(encryption.PROBE_LEN) + b"a" * (2 * encryption.PROBE_LEN)
+    calls = []
+    compress = encryption._CODECS[encryption.ALG_AES256GCM_ZLIB][0]
+    monkeypatch.setitem(
+        encryption._CODECS, encryption.ALG_AES256GCM_ZLIB,
+        (lambda chunk: calls.append(len(chunk)) or compress(chunk), zlib_decompress),
+    )
+    assert encryption._compress(data) == (encryption.ALG_AES256GCM, data)
+    assert calls == [encryption.PROBE_LEN]      # never the whole payload
+
+
+def test_compressed_header_is_authenticated(key):
+    blob = encryption.encrypt(TEXT, key)
+    for alg in (encryption.ALG_AES256GCM, encryption.ALG_AES256GCM_ZSTD):
+        with pytest.raises(InvalidTag):
+            encryption.decrypt(flipped(blob, 1, alg), key)
+
+
+# ── batches ──────────────────────────────────────────────────────────
+@pytest.mark.parametrize("workers", [1, 4])
+def test_many_round_trip_in_order(key, workers):
+    plaintexts = [f"secret {i}" for i in range(1000)] + [TEXT]
+    blobs = encryption.encrypt_many(plaintexts, key, workers=workers)
+    assert [encryption.decrypt(b, key) for b in blobs] == plaintexts
+    assert encryption.decrypt_many(blobs, key, workers=workers) == plaintexts
+
+
+def test_many_empty(key):
+    assert encryption.encrypt_many([], key) == []
+    assert encryption.decrypt_many([], key, workers=4) == []
+
+
+def test_many_key_id(key):
+    blobs = encryption.encrypt_many(["a", "b"], key, key_id=encryption.KEY_PASSWORD)
+    assert {encryption.key_id(b) for b in blobs} == {encryption.KEY_PASSWORD}
+
+
+def test_decrypt_many_mixed_forms(key):
+    blobs = [legacy_blob("old", key), encryption.encrypt("new", key)]
+    blobs.append(encryption.to_text(blobs[1]))
+    assert encryption.decrypt_many(blobs, key) == ["old", "new", "new"]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_decrypt_many_raises_on_failure(key, workers):
+    blobs = encryption.encrypt_many(["x"] * 1000, key)
+    blobs[700] = encryption.encrypt("x", os.urandom(32))
+    with pytest.raises(InvalidTag):
+        encryption.decrypt_many(blobs, key, workers=workers)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_decrypt_many_return_exceptions(key, workers):
+    blobs = encryption.encrypt_many([str(i) for i in range(1000)], key)
+    blobs[3] = encryption.encrypt("3", os.urandom(32))
+    blobs[900] = b"garbage"
+    out = encryption.decrypt_many(blobs, key, workers=workers, return_exceptions=True)
+    assert isinstance(out[3], InvalidTag)
+    assert isinstance(out[900], ValueError)
+    assert [p for i, p in enumerate(out) if i not in (3, 900)] == [
+        str(i) for i in range(1000) if i not in (3, 900)
+    ]
@@ -0,0 +1,184 @@
+# tests/test_file_repo.py
+import datetime
+import multiprocessing
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.repository import file_repo
+from app.repository.file_repo import FileRepo
+from app.repository.journal_repo import JournalRepo
+
+USERS = 4
+
+
+@pytest.fixture(params=[FileRepo, JournalRepo], ids=["file", "journal"])
+def repo_cls(request):
+    return request.param
+
+
+@pytest.fixture
+def users_path(tmp_path):
+    yield str(tmp_path / "blockpass_users.json")
+    file_repo._tables.clear()
+
+
+def cold(repo_cls, users_path):
+    """A fresh handle that trusts only the disk, as after a restart."""
+    file_repo._tables.clear()
+    return repo_cls(users_path)
+
+
+def titles(repo, user_id: str) -> set[str]:
+    return {item.title for item in repo.list_items(user_id)}
+
+
+def hammer(create, threads: int, per_thread: int, tag: str = "") -> None:
+    errors: list[BaseException] = []
+
+    def worker(n: int) -> None:
+        try:
+            for i in range(per_thread):
+                create(f"user-{n % USERS}", f"{tag}{n}/{i}", b"x" * 64)
+        except BaseException as exc:
+            errors.append(exc)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    assert not errors, errors[0]
+
+
+def stored(repo, user_count: int = USERS) -> int:
+    return sum(len(repo.list_items(f"user-{u}")) for u in range(user_count))
+
+
+# ── group commit ─────────────────────────────────────────────────────
+def test_concurrent_creates_lose_nothing(repo_cls, users_path):
+    first, second = repo_cls(users_path), repo_cls(users_path)
+    hammer(first.create_item, threads=8, per_thread=25, tag="a")
+    hammer(second.create_item, threads=8, per_thread=25, tag="b")
+    both = threading.Thread(target=hammer, args=(first.create_item, 4, 25, "c"))
+    both.start()
+    hammer(second.create_item, threads=4, per_thread=25, tag="d")
+    both.join()
+    assert stored(cold(repo_cls, users_path)) == 2 * 8 * 25 + 2 * 4 * 25
+
+
+def test_writes_are_durable_on_return(repo_cls, users_path):
+    repo = repo_cls(users_path)
+    item = repo.create_item("user-0", "one", b"blob")
+    repo.create_item("user-0", "two", b"blob")
+    repo.delete_item("user-0", item.id)
+    assert titles(cold(repo_cls, users_path), "user-0") == {"two"}
+
+
+# ── journal recovery and compaction ──────────────────────────────────
+def vault_log(users_path: str):
+    return Path(users_path).with_name("blockpass_vault.json.log")
+
+
+def test_torn_journal_tail_drops_only_that_record(users_path):
+    repo = JournalRepo(users_path)
+    for title in ("one", "two", "three"):
+        repo.create_item("user-0", title, b"blob")
+    log = vault_log(users_path)
+    data = log.read_bytes()
+    log.write_bytes(data[:-10])             # crash in the middle of the last append
+
+    repo = cold(JournalRepo, users_path)
+    assert titles(repo, "user-0") == {"one", "two"}
+
+    repo.create_item("user-0", "four", b"blob")     # cuts the torn tail off first
+    assert titles(cold(JournalRepo, users_path), "user-0") == {"one", "two", "four"}
+    assert all(line.endswith(b"}") for line in log.read_bytes().splitlines())
+
+
+def test_compaction_keeps_every_record(users_path):
+    repo = JournalRepo(users_path)
+    doomed = [repo.create_item("user-0", f"gone {i}", b"blob") for i in range(5)]
+    for i in range(50):
+        repo.create_item(f"user-{i % USERS}", f"kept {i}", b"blob")
+    for item in doomed:
+        repo.delete_item("user-0", item.id)
+
+    table = file_repo._tables[repo._load_items_path().resolve()]
+    table.compact()
+    assert vault_log(users_path).read_bytes() == b""
+    assert stored(cold(JournalRepo, users_path)) == 50
+
+
+def test_compaction_during_writes(users_path):
+    repo = JournalRepo(users_path)
+    repo.create_item("user-0", "seed", b"blob")
+    table = file_repo._tables[repo._load_items_path().resolve()]
+    done = threading.Event()
+
+    def compact_until_done() -> None:
+        while not done.is_set():
+            table.compact()
+
+    compactor = threading.Thread(target=compact_until_done)
+    compactor.start()
+    try:
+        hammer(repo.create_item, threads=8, per_thread=25)
+    finally:
+        done.set()
+        compactor.join()
+    assert stored(cold(JournalRepo, users_path)) == 1 + 8 * 25
+
+
+# ── several worker processes on the same files ───────────────────────
+def _worker(repo_cls, users_path: str, tag: str) -> None:
+    file_repo._tables.clear()               # nothing inherited from the parent
+    hammer(repo_cls(users_path).create_item, threads=4, per_thread=25, tag=tag)
+
+
+def test_processes_merge_instead_of_overwriting(repo_cls, users_path):
+    ctx = multiprocessing.get_context("fork")
+    repo_cls(users_path)
+    workers = [ctx.Process(target=_worker, args=(repo_cls, users_path, tag)) for tag in "ab"]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+    assert [p.exitcode for p in workers] == [0, 0]
+    assert stored(cold(repo_cls, users_path)) == 2 * 4 * 25
+
+
+def test_username_registered_by_another_process(repo_cls, users_path):
+    repo = repo_cls(users_path)
+    repo.create_user("alice", "hash")
+    ctx = multiprocessing.get_context("fork")
+    other = ctx.Process(target=lambda: cold(repo_cls, users_path).create_user("bob", "hash"))
+    other.start()
+    other.join()
+    assert other.exitcode == 0
+    with pytest.raises(ValueError):         # the other process's write is reloaded first
+        repo.create_user("bob", "hash")
+    assert repo.get_by_username("bob") is not None
+
+
+# ── listing ──────────────────────────────────────────────────────────
+def test_pages_over_imported_aware_timestamps(users_path):
+    repo = FileRepo(users_path)
+    base = datetime.datetime(2025, 1, 1, 12, 0)
+    plus2 = datetime.timezone(datetime.timedelta(hours=2))
+    items = []
+    for i in range(20):
+        created = base + datetime.timedelta(minutes=i)
+        if i % 2:       # same instant, written by an export from another zone
+            created = created.replace(tzinfo=datetime.timezone.utc).astimezone(plus2)
+        items.append({"title": f"{i:02}", "data": b"blob", "created_at": created})
+    repo.import_items("user-0", items)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = repo.list_item_meta("user-0", limit=3, after=cursor)
+        seen += [m.title for m in page]
+        if cursor is None:
+            break
+    assert seen == [f"{i:02}" for i in reversed(range(20))]
@@ -0,0 +1,194 @@
+# tests/test_rekey.py
+import base64
+import json
+import secrets
+
+import pytest
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from fastapi.testclient import TestClient
+
+from app.core import encryption, kdf, rekey
+from app.core.config import get_settings
+from app.core.security import create_access_token, hash_password
+from app.main import app
+from app.repository import file_repo
+from app.repository.async_file_repo import AsyncFileRepo
+from app.repository.file_repo import FileRepo
+
+PASSWORD = "correct horse"      # login and (until changed) master password
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "KDF_MEM_KIB", 1024)   # keep Argon2id cheap
+    monkeypatch.setattr(settings, "KDF_TIME", 1)
+    yield FileRepo(str(tmp_path / "blockpass_users.json"))
+    file_repo._tables.clear()
+
+
+@pytest.fixture
+def client(repo):
+    app.state.repo = AsyncFileRepo(repo)
+    yield TestClient(app)
+    del app.state.repo
+
+
+def legacy_user(repo, username: str = "alice") -> dict:
+    """A user from before the key hierarchy: no ``vault_key``."""
+    new = repo.create_user(username, hash_password(PASSWORD), **kdf.current_params())
+    return repo.get_by_id(new["id"])
+
+
+def password_key(user: dict, master_password: str = PASSWORD) -> bytes:
+    return kdf.derive_key(
+        master_password, bytes.fromhex(user["kdf_salt"]),
+        mem_kib=user["kdf_mem"], time=user["kdf_time"], lanes=user["kdf_lanes"],
+    )
+
+
+def legacy_json(plaintext: str, key: bytes) -> str:
+    """The JSON blob the first releases stored – AES-GCM, no AAD."""
+    nonce = secrets.token_bytes(12)
+    ct = AESGCM(key).encrypt(nonce, plaintext.encode(), None)
+    return json.dumps({
+        "nonce": base64.b64encode(nonce).decode(),
+        "ciphertext": base64.b64encode(ct[:-16]).decode(),
+        "tag": base64.b64encode(ct[-16:]).decode(),
+    })
+
+
+def auth(user: dict) -> dict:
+    return {"Authorization": "Bearer " + create_access_token({"sub": user["id"]})}
+
+
+def unlock(client, user: dict, master_password: str = PASSWORD):
+    return client.post(
+        "/vault/session/unlock", json={"master_password": master_password}, headers=auth(user)
+    )
+
+
+def reveal(client, user: dict, session: str) -> dict[str, str]:
+    """id → secret for the whole vault, through the unlocked session."""
+    resp = client.post(
+        "/vault/batch/reveal", json={"ids": "all"},
+        headers={**auth(user), "X-Vault-Session": session},
+    )
+    return {line["id"]: line["secret_value"] for line in map(json.loads, resp.text.splitlines())}
+
+
+def snapshot(repo, user_id: str) -> tuple[dict, dict]:
+    return repo.get_by_id(user_id), {i.id: i.data for i in repo.list_items(user_id)}
+
+
+def adopted(client, repo) -> tuple[dict, bytes, dict[str, str]]:
+    """A user moved to a vault key, with two items; (user, vault key, id → secret)."""
+    user = legacy_user(repo)
+    key = password_key(user)
+    secrets_by_id = {
+        repo.create_item(user["id"], "a", encryption.encrypt("a-secret", key, encryption.KEY_PASSWORD)).id: "a-secret",
+        repo.create_item(user["id"], "b", encryption.encrypt("b-secret", key, encryption.KEY_PASSWORD)).id: "b-secret",
+    }
+    assert unlock(client, user).status_code == 200
+    user = repo.get_by_id(user["id"])
+    return user, rekey.unwrap(user, key), secrets_by_id
+
+
+# ── adoption ─────────────────────────────────────────────────────────
+def test_legacy_vault_is_adopted_on_first_unlock(client, repo):
+    user = legacy_user(repo)
+    key = password_key(user)
+    envelope = repo.create_item(user["id"], "env", encryption.encrypt("one", key, encryption.KEY_PASSWORD))
+    old_json = repo.create_item(user["id"], "json", legacy_json("two", key))
+
+    resp = unlock(client, user)
+    assert resp.status_code == 200
+
+    user = repo.get_by_id(user["id"])
+    assert user["vault_key"]
+    vault_key = rekey.unwrap(user, key)
+    assert vault_key is not None and vault_key != key
+    expected = {envelope.id: "one", old_json.id: "two"}
+    for item_id, plaintext in expected.items():
+        blob = repo.get_item(user["id"], item_id).data
+        assert encryption.key_id(blob) == encryption.KEY_VAULT
+        assert encryption.decrypt(blob, vault_key) == plaintext
+    assert reveal(client, user, resp.json()["vault_session"]) == expected
+
+
+def test_empty_legacy_vault_is_adopted(client, repo):
+    user = legacy_user(repo)
+
+    resp = unlock(client, user)
+    assert resp.status_code == 200
+    user = repo.get_by_id(user["id"])
+    assert rekey.unwrap(user, password_key(user)) is not None
+
+    session = resp.json()["vault_session"]
+    created = client.post(
+        "/vault/", json={"title": "t", "secret_value": "s"},
+        headers={**auth(user), "X-Vault-Session": session},
+    )
+    assert reveal(client, user, session) == {created.json()["id"]: "s"}
+
+
+@pytest.mark.parametrize("items", [0, 1], ids=["empty", "one-item"])
+def test_wrong_master_password_writes_nothing(client, repo, items):
+    user = legacy_user(repo)
+    for i in range(items):
+        repo.create_item(user["id"], f"t{i}", encryption.encrypt("s", password_key(user), encryption.KEY_PASSWORD))
+    before = snapshot(repo, user["id"])
+
+    assert unlock(client, user, "not the password").status_code == 403
+    assert snapshot(repo, user["id"]) == before
+    assert before[0]["vault_key"] is None
+
+
+# ── password change ──────────────────────────────────────────────────
+def test_password_change_rewraps_the_vault_key(client, repo):
+    user, vault_key, secrets_by_id = adopted(client, repo)
+    _, blobs = snapshot(repo, user["id"])
+
+    resp = client.post(
+        "/vault/password/change",
+        json={"master_password": PASSWORD, "new_master_password": "new one"},
+        headers=auth(user),
+    )
+    assert resp.status_code == 204
+
+    user, after = snapshot(repo, user["id"])
+    assert after == blobs                                   # no item re-encrypted
+    assert rekey.unwrap(user, password_key(user, "new one")) == vault_key
+    assert unlock(client, user).status_code == 403
+    session = unlock(client, user, "new one").json()["vault_session"]
+    assert reveal(client, user, session) == secrets_by_id
+
+
+# ── compare-and-swap ─────────────────────────────────────────────────
+def test_rekey_with_stale_expected_changes_nothing(client, repo):
+    user, vault_key, _ = adopted(client, repo)
+    before = snapshot(repo, user["id"])
+    items = repo.list_items(user["id"])
+    other = AESGCM.generate_key(bit_length=256)
+    params = {"kdf_salt": kdf.generate_salt(), **kdf.current_params(),
+              "vault_key": rekey.wrap(other, password_key(user), user["id"])}
+    blobs = {i.id: encryption.encrypt("x", other) for i in items}
+
+    # a second first-unlock that lost the race, and a rekey against an old key
+    assert repo.rekey_user(user["id"], params, blobs, expected=None) is False
+    assert repo.rekey_user(user["id"], params, blobs, expected=secrets.token_bytes(60)) is False
+    assert repo.rewrap_user(user["id"], params, expected=secrets.token_bytes(60)) is False
+    assert snapshot(repo, user["id"]) == before
+
+
+def test_rekey_misses_no_item_added_meanwhile(client, repo):
+    user, vault_key, _ = adopted(client, repo)
+    items = repo.list_items(user["id"])
+    repo.create_item(user["id"], "late", encryption.encrypt("late", vault_key))
+    before = snapshot(repo, user["id"])
+    params = {"kdf_salt": kdf.generate_salt(), **kdf.current_params(),
+              "vault_key": rekey.wrap(vault_key, password_key(user), user["id"])}
+    blobs = {i.id: encryption.encrypt("x", vault_key) for i in items}
+
+    assert repo.rekey_user(user["id"], params, blobs, expected=bytes.fromhex(user["vault_key"])) is False
+    assert snapshot(repo, user["id"]) == before
@@ -0,0 +1,150 @@
+# tests/test_streaming.py
+import base64
+import io
+import os
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+from app.core import streaming
+from ipfs import encryption as dapp
+
+SEGMENT = 1024
+KEY = os.urandom(32)
+
+
+def encrypt(data: bytes, aad: bytes = b"", chunk: int = 700) -> bytes:
+    enc = streaming.StreamEncryptor(KEY, aad, segment=SEGMENT)
+    out = [enc.update(data[i:i + chunk]) for i in range(0, len(data), chunk)]
+    return b"".join(out) + enc.finalize()
+
+
+def decrypt(blob: bytes, aad: bytes = b"", chunk: int = 500) -> bytes:
+    dec = streaming.StreamDecryptor(KEY, aad)
+    out = [dec.update(blob[i:i + chunk]) for i in range(0, len(blob), chunk)]
+    return b"".join(out) + dec.finalize()
+
+
+def segments(blob: bytes) -> tuple[bytes, list[bytes]]:
+    size = SEGMENT + streaming.TAG_LEN
+    body = blob[streaming.HEADER.size:]
+    return blob[:streaming.HEADER.size], [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("size", [0, 1, SEGMENT - 1, SEGMENT, SEGMENT + 1, 5 * SEGMENT, 5 * SEGMENT + 17])
+def test_round_trip(size):
+    data = os.urandom(size)
+    blob = encrypt(data)
+    assert decrypt(blob) == data
+    assert streaming.plaintext_size(len(blob), SEGMENT) == size
+    assert streaming.parse_header(blob) == (streaming.KEY_VAULT, SEGMENT)
+
+
+def test_dropped_final_segment():
+    header, segs = segments(encrypt(os.urandom(3 * SEGMENT + 10)))
+    with pytest.raises(InvalidTag):         # the new last segment lacks the final flag
+        decrypt(header + b"".join(segs[:-1]))
+
+
+def test_truncated_inside_a_segment():
+    blob = encrypt(os.urandom(3 * SEGMENT))
+    with pytest.raises(InvalidTag):
+        decrypt(blob[:-5])
+
+
+def test_swapped_segments():
+    header, segs = segments(encrypt(os.urandom(3 * SEGMENT + 10)))
+    segs[0], segs[1] = segs[1], segs[0]
+    with pytest.raises(InvalidTag):
+        decrypt(header + b"".join(segs))
+
+
+def test_duplicated_segment():
+    header, segs = segments(encrypt(os.urandom(3 * SEGMENT + 10)))
+    with pytest.raises(InvalidTag):
+        decrypt(header + segs[0] + b"".join(segs))
+
+
+def test_aad_binds_the_stream():
+    blob = encrypt(b"attachment", aad=b"attachment|u1|i1")
+    assert decrypt(blob, aad=b"attachment|u1|i1") == b"attachment"
+    with pytest.raises(InvalidTag):
+        decrypt(blob, aad=b"attachment|u1|i2")
+
+
+def test_header_is_authenticated():
+    blob = bytearray(encrypt(os.urandom(100)))
+    blob[2] ^= 1                            # key id
+    with pytest.raises(InvalidTag):
+        decrypt(bytes(blob))
+
+
+@pytest.mark.parametrize("blob", [b"", b"\x01\x03", bytes(streaming.HEADER.size + 16)])
+def test_not_a_stream(blob):
+    with pytest.raises(ValueError):
+        decrypt(blob)
+
+
+@pytest.mark.parametrize("segment", [0, streaming.MAX_SEGMENT + 1])
+def test_segment_size_bounds(segment):
+    with pytest.raises(ValueError):
+        streaming.StreamEncryptor(KEY, segment=segment)
+    header = streaming.HEADER.pack(1, 3, 1, segment % 2**32, bytes(16))
+    with pytest.raises(ValueError):
+        streaming.parse_header(header)
+
+
+# ── dapp: same layout, file objects ──────────────────────────────────
+DAPP_KEY = dapp.generate_key()
+
+
+def dapp_encrypt(data: bytes, segment: int = SEGMENT) -> bytes:
+    out = io.BytesIO()
+    assert dapp.encrypt_stream(DAPP_KEY, io.BytesIO(data), out, segment) == len(data)
+    return out.getvalue()
+
+
+def dapp_decrypt(blob: bytes) -> bytes:
+    out = io.BytesIO()
+    dapp.decrypt_stream(DAPP_KEY, io.BytesIO(blob), out)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("size", [0, SEGMENT, 3 * SEGMENT + 5])
+def test_dapp_round_trip(size):
+    data = os.urandom(size)
+    assert dapp_decrypt(dapp_encrypt(data)) == data
+
+
+def test_dapp_dropped_final_segment():
+    header, segs = segments(dapp_encrypt(os.urandom(3 * SEGMENT + 10)))
+    with pytest.raises(InvalidTag):
+        dapp_decrypt(header + b"".join(segs[:-1]))
+
+
+def test_dapp_swapped_segments():
+    header, segs = segments(dapp_encrypt(os.urandom(3 * SEGMENT + 10)))
+    segs[1], segs[2] = segs[2], segs[1]
+    with pytest.raises(InvalidTag):
+        dapp_decrypt(header + b"".join(segs))
+
+
+@pytest.mark.parametrize("segment", [0, dapp.MAX_SEGMENT + 1, 2**32])
+def test_dapp_segment_size_bounds(segment):
+    with pytest.raises(ValueError):
+        dapp_encrypt(b"x", segment)
+
+
+def test_dapp_header_segment_size_is_bounded():
+    # checked before a single segment is read
+    header = streaming.HEADER.pack(1, 3, 0, 2**32 - 1, bytes(16))
+    with pytest.raises(ValueError):
+        dapp_decrypt(header + bytes(64))
+
+
+def test_dapp_stream_opens_in_app():
+    # the dapp writes key id 0 under its own base64 key; same construction
+    data = os.urandom(2 * SEGMENT + 3)
+    blob = dapp_encrypt(data)
+    dec = streaming.StreamDecryptor(base64.urlsafe_b64decode(DAPP_KEY))
+    assert dec.update(blob) + dec.finalize() == data